@@ -1,15 +1,96 @@
 from fastapi import FastAPI
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import PlainTextResponse
+from fastapi.responses import PlainTextResponse, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 from starlette.exceptions import HTTPException as StarletteHTTPException
 
 from source.api.orders import orders_router
+from source.api.orders.jobs import OrderJobManager
+from source.api.orders.journal import OrderJournal
+from source.clients.binance.client import BinanceClient
+from source.clients.binance.clock import server_clock
+from source.clients.binance.market_data import MarketDataFeed
+from source.clients.binance.rate_limits import rate_limit_governor
+from source.clients.binance.user_data import UserDataStream
+from source.config import config
+from source.metrics import binance_state_collector, registry
+from source.tracing import TracingMiddleware, tracing
 
 app = FastAPI(
     docs_url='/swagger',
 )
 
 
+app.add_middleware(TracingMiddleware)
+
+
+@app.on_event('startup')
+async def startup() -> None:
+    if config.TRACING_ENABLED:
+        tracing.setup(service_name=config.TRACING_SERVICE_NAME, endpoint=config.TRACING_OTLP_ENDPOINT)
+    market_data = None
+    if config.BINANCE_STREAM_URL:
+        market_data = MarketDataFeed(
+            url=config.BINANCE_STREAM_URL,
+            symbols=config.BINANCE_MARKET_DATA_SYMBOLS,
+            stale_after=config.BINANCE_MARKET_DATA_STALE_AFTER,
+        )
+    app.state.binance_client = BinanceClient(
+        exchange_info_ttl=config.BINANCE_EXCHANGE_INFO_TTL,
+        market_data=market_data,
+        clock_sync_interval=config.BINANCE_CLOCK_SYNC_INTERVAL or None,
+        trusted_exchange_info=config.BINANCE_EXCHANGE_INFO_TRUSTED,
+        exchange_info_whitelist=config.BINANCE_EXCHANGE_INFO_SYMBOLS,
+    )
+    await app.state.binance_client.start()
+    binance_state_collector.bind(
+        governor=rate_limit_governor,
+        clock=server_clock,
+        exchange_info_cache=app.state.binance_client.exchange_info_cache,
+    )
+    app.state.user_data_stream = None
+    if config.BINANCE_USER_DATA_STREAM and config.BINANCE_STREAM_URL:
+        app.state.user_data_stream = UserDataStream(
+            client=app.state.binance_client,
+            url=config.BINANCE_STREAM_URL,
+            keepalive_interval=config.BINANCE_LISTEN_KEY_KEEPALIVE_INTERVAL,
+        )
+        app.state.user_data_stream.start()
+    app.state.order_journal = None
+    if config.ORDERS_JOURNAL_PATH:
+        journal = OrderJournal(
+            config.ORDERS_JOURNAL_PATH,
+            fsync=config.ORDERS_JOURNAL_FSYNC,
+            compact_size=config.ORDERS_JOURNAL_COMPACT_SIZE,
+        )
+        # Лесенки, которые не успели создаться до остановки процесса, сверяются с Binance
+        await journal.recover(app.state.binance_client)
+        journal.start()
+        app.state.order_journal = journal
+    app.state.order_jobs = OrderJobManager(
+        client=app.state.binance_client,
+        workers=config.ORDERS_JOB_WORKERS,
+        queue_size=config.ORDERS_JOB_QUEUE_SIZE,
+        ttl=config.ORDERS_JOB_TTL,
+        journal=app.state.order_journal,
+    )
+    app.state.order_jobs.start()
+
+
+@app.on_event('shutdown')
+async def shutdown() -> None:
+    await app.state.order_jobs.stop()
+    if app.state.order_journal is not None:
+        await app.state.order_journal.stop()
+    # Остановленные очередь и журнал не должны попадать в запросы, см. get_order_jobs
+    app.state.order_jobs = None
+    app.state.order_journal = None
+    if app.state.user_data_stream is not None:
+        await app.state.user_data_stream.stop()
+    await app.state.binance_client.close()
+    tracing.shutdown()
+
+
 @app.exception_handler(StarletteHTTPException)
 async def http_exception_handler(request, exc):  # noqa
     return PlainTextResponse(str(exc.detail), status_code=exc.status_code)
@@ -20,4 +101,9 @@ async def validation_exception_handler(request, exc):  # noqa
     return PlainTextResponse(str(exc), status_code=400)
 
 
+@app.get('/metrics', include_in_schema=False)
+async def metrics() -> Response:
+    return Response(content=generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+
+
 app.include_router(orders_router)
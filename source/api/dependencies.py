@@ -0,0 +1,29 @@
+from typing import Optional
+
+from fastapi import Request
+
+from source.api.orders.jobs import OrderJobManager
+from source.api.orders.journal import OrderJournal
+from source.clients.binance.client import BinanceClient
+
+
+def get_binance_client(request: Request) -> BinanceClient:
+    """
+    Общий для всех запросов клиент Binance, создается на старте приложения.
+    В тестах подменяется через app.dependency_overrides
+    """
+    return request.app.state.binance_client
+
+
+def get_order_journal(request: Request) -> Optional[OrderJournal]:
+    """
+    Журнал лесенок, если задан ORDERS_JOURNAL_PATH
+    """
+    return getattr(request.app.state, 'order_journal', None)
+
+
+def get_order_jobs(request: Request) -> Optional[OrderJobManager]:
+    """
+    Очередь лесенок, которые создаются в фоне. None, если очередь не запущена на старте приложения
+    """
+    return getattr(request.app.state, 'order_jobs', None)
@@ -1,7 +1,22 @@
-from fastapi import APIRouter
+from http import HTTPStatus
+from typing import Optional, Union
 
-from source.api.orders.handlers.create_order import create_order_handler
-from source.api.orders.schemas import CreateOrderRequest, CreateOrderResponse
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from source.api.dependencies import get_binance_client, get_order_jobs, get_order_journal
+from source.api.orders.handlers.create_order import create_order_batch_handler, create_order_handler, plan_order_handler
+from source.api.orders.handlers.errors import JobQueueFullError, PreTradeCheckError
+from source.api.orders.jobs import OrderJobManager
+from source.api.orders.journal import OrderJournal
+from source.api.orders.schemas import (
+    CreateOrderBatchRequest,
+    CreateOrderBatchResponse,
+    CreateOrderRequest,
+    CreateOrderResponse,
+    OrderJobResponse,
+)
 from source.clients.binance.client import BinanceClient
 from source.clients.binance.errors import BinanceHttpError
 from source.logger import logger
@@ -9,11 +24,76 @@ from source.logger import logger
 orders_router = APIRouter(prefix='/order')
 
 
-@orders_router.post(path='/create', response_model=CreateOrderResponse)
-async def create_order(request: CreateOrderRequest) -> CreateOrderResponse:
-    logger.info('Request %s' % request)
+def _require_jobs(jobs: Optional[OrderJobManager]) -> OrderJobManager:
+    if jobs is None:
+        raise HTTPException(status_code=HTTPStatus.SERVICE_UNAVAILABLE, detail='Order jobs are not running')
+    return jobs
+
+
+@orders_router.post(
+    path='/create',
+    response_model=CreateOrderResponse,
+    responses={HTTPStatus.ACCEPTED.value: {'model': OrderJobResponse}},
+)
+async def create_order(
+        request: CreateOrderRequest,
+        async_mode: bool = Query(
+            default=False,
+            alias='async',
+            description='Создать лесенку в фоне: ответ 202 с id задания сразу после проверок и расчета',
+        ),
+        client: BinanceClient = Depends(get_binance_client),
+        journal: Optional[OrderJournal] = Depends(get_order_journal),
+        jobs: Optional[OrderJobManager] = Depends(get_order_jobs),
+) -> Union[CreateOrderResponse, JSONResponse]:
+    logger.info('Request %s', request, extra={'symbol': request.symbol.upper(), 'side': request.side.value})
     try:
-        async with BinanceClient() as client:
-            return await create_order_handler(request, client)
+        if not async_mode:
+            return await create_order_handler(request, client, journal)
+        manager = _require_jobs(jobs)
+        prices, lots = await plan_order_handler(request, client)
     except BinanceHttpError as error:
         return CreateOrderResponse(success=False, error=error.msg)
+    except PreTradeCheckError as error:
+        return CreateOrderResponse(success=False, error=error.msg)
+    try:
+        job = manager.submit(request, prices, lots)
+    except JobQueueFullError:
+        raise HTTPException(status_code=HTTPStatus.SERVICE_UNAVAILABLE, detail='Order job queue is full')
+    return JSONResponse(status_code=HTTPStatus.ACCEPTED, content=jsonable_encoder(job.to_response()))
+
+
+@orders_router.get(path='/jobs/{job_id}', response_model=OrderJobResponse)
+async def get_order_job(job_id: str, jobs: Optional[OrderJobManager] = Depends(get_order_jobs)) -> OrderJobResponse:
+    job = _require_jobs(jobs).get(job_id)
+    if job is None:
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail='Order job not found')
+    return job.to_response()
+
+
+@orders_router.delete(path='/jobs/{job_id}', response_model=OrderJobResponse)
+async def cancel_order_job(
+        job_id: str,
+        jobs: Optional[OrderJobManager] = Depends(get_order_jobs),
+) -> OrderJobResponse:
+    """
+    Отмена задания: ордера, которые еще не отправлены, не создаются. Уже отправленные запросы
+    завершаются до ответа, созданные ордера остаются в Binance
+    """
+    job = await _require_jobs(jobs).cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail='Order job not found')
+    return job.to_response()
+
+
+@orders_router.post(path='/create-batch', response_model=CreateOrderBatchResponse)
+async def create_order_batch(
+        request: CreateOrderBatchRequest,
+        client: BinanceClient = Depends(get_binance_client),
+        journal: Optional[OrderJournal] = Depends(get_order_journal),
+) -> CreateOrderBatchResponse:
+    logger.info('Batch request %s', request)
+    try:
+        return await create_order_batch_handler(request, client, journal)
+    except BinanceHttpError as error:
+        return CreateOrderBatchResponse(success=False, error=error.msg)
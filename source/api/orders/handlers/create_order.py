@@ -1,74 +1,370 @@
+import asyncio
+import bisect
+import itertools
+import logging
+import math
 import random
-from decimal import Decimal
-from typing import List, Tuple
+import time
+import uuid
+from decimal import ROUND_CEILING, ROUND_FLOOR, Decimal
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, TypeVar, Union
 
-from source.api.orders.handlers.errors import TooLowRequestedVolumeError, WrongPriceRangeError
-from source.api.orders.schemas import CreateOrderData, CreateOrderRequest, CreateOrderResponse
+import aiohttp
+
+from source.api.orders.handlers.errors import (
+    PreTradeCheckError,
+    TooLowRequestedVolumeError,
+    TooManyOrdersForPriceRangeError,
+    WrongPriceRangeError,
+)
+from source.api.orders.handlers.prices import generate_prices
+from source.api.orders.journal import OrderJournal
+from source.api.orders.schemas import (
+    CreateOrderBatchItem,
+    CreateOrderBatchRequest,
+    CreateOrderBatchResponse,
+    CreateOrderData,
+    CreateOrderRequest,
+    CreateOrderResponse,
+)
 from source.clients.binance.client import BinanceClient
+from source.clients.binance.errors import BINANCE_REQUEST_ERRORS, BinanceHttpError
 from source.clients.binance.schemas.market.errors import NotFoundSymbolInExchangeInfo
-from source.clients.binance.schemas.market.schemas import ExchangeInfoResponse, Symbol
+from source.clients.binance.schemas.market.schemas import ExchangeInfoResponse, LatestPriceResponse, Symbol
 from source.clients.binance.schemas.order.schemas import NewOrderRequest
 from source.clients.binance.schemas.wallet.schemas import APITradingStatusResponse
+from source.config import config
 from source.enums import OrderSide, OrderType, SymbolStatus, TimeInForce
 from source.logger import logger
+from source.metrics import ORDER_ERRORS, ORDER_PHASE_SECONDS, error_label
+from source.tracing import tracing
+
+T = TypeVar('T')
+
+# Ошибка ордеров, которые не отправлены в Binance из-за отмены лесенки
+CANCELLED = 'Cancelled'
 
 
-def _calculate_price(price_min: Decimal, price_max: Decimal, tick_size: Decimal) -> Decimal:
+def _calculate_min_quantity(min_notional: Decimal, price: Decimal, step: Decimal) -> Decimal:
     """
-    Вычисление цен ордеров
-    Исхожу из того, что в ТЗ в описании схемы сказано, что цены из диапазона
-    берутся случайным образом.
-    Дополнительно, значение цены должно удовлетворять условиям из PRICE_FILTER, т.е.
-    price % tick_size = 0
+    Минимально возможное значение quantity: price * quantity >= min_notional (фильтр NOTIONAL),
+    округленное вверх до шага step
     """
-    price = random.uniform(
-        a=float(price_min),
-        b=float(price_max),
-    )
-    price_dec = Decimal(price).quantize(Decimal('0.000000'))
-    return (price_dec + tick_size) - (price_dec + tick_size) % tick_size
+    min_quantity = min_notional / price
+    return (min_quantity + step) - (min_quantity + step) % step
+
+
+# Все цены и количества в сервисе квантуются до 6 знаков, см. Decimal('0.000000')
+_UNITS_EXPONENT = 6
+
+# Ограничение перекоса лотов при раздаче остатка, см. _allocate_steps
+_REMAINDER_SKEW = 8
+
+
+def _to_units(value: Decimal, exponent: int = _UNITS_EXPONENT, rounding: str = ROUND_FLOOR) -> int:
+    """
+    Перевод Decimal в целое число единиц 10^-exponent
+    """
+    return int(value.scaleb(exponent).to_integral_value(rounding=rounding))
+
+
+def _round_robin(sorted_costs: List[int], prefix_sums: List[int], budget: int) -> Tuple[List[int], int]:
+    """
+    Раздача бюджета budget по кругу: за проход каждый лот, шаг которого помещается в остаток,
+    получает один шаг, и так пока не поместится ни один шаг. Возвращает шаги лотов в порядке
+    sorted_costs (стоимости по возрастанию, prefix_sums - их префиксные суммы) и остаток бюджета.
+
+    Лоты, получающие шаг, всегда образуют префикс sorted_costs. Полные проходы по префиксу
+    считаются одним делением, а неполный - поиском по префиксным суммам, после каждого неполного
+    прохода префикс укорачивается, так что сложность O(n log n) и не зависит от budget
+    """
+    # added[k] - шаги, добавленные первым k лотам, см. разностный массив
+    added = [0] * (len(sorted_costs) + 1)
+    size = bisect.bisect_right(sorted_costs, budget)
+    while size:
+        rounds, budget = divmod(budget, prefix_sums[size])
+        added[size] += rounds
+        # Неполный проход: шаг получают самые дешевые лоты, пока помещается
+        size = bisect.bisect_right(prefix_sums, budget, hi=size) - 1
+        added[size] += 1
+        budget -= prefix_sums[size]
+        size = bisect.bisect_right(sorted_costs, budget, hi=size)
+    return list(itertools.accumulate(reversed(added[1:])))[::-1], budget
+
+
+def _distribute_remainder(
+        sorted_costs: List[int],
+        prefix_sums: List[int],
+        budget: int,
+        order: Sequence[int],
+        max_steps: int,
+) -> Tuple[List[int], int]:
+    """
+    Раздача остатка бюджета: сначала по одному шагу каждому лоту в порядке order, пока помещается,
+    затем лоту, после которого остается минимальный остаток, отдаем до max_steps шагов,
+    а то, что осталось, раздаем по кругу
+    """
+    extra = [0] * len(sorted_costs)
+    for position in order:
+        if sorted_costs[position] <= budget:
+            extra[position] += 1
+            budget -= sorted_costs[position]
+    best = min(range(len(sorted_costs)), key=lambda position: budget % sorted_costs[position])
+    steps = min(budget // sorted_costs[best], max_steps)
+    extra[best] += steps
+    budget -= steps * sorted_costs[best]
+    added, budget = _round_robin(sorted_costs, prefix_sums, budget)
+    return [count + more for count, more in zip(extra, added)], budget
+
+
+def _allocate_steps(costs: List[int], budget: int) -> List[int]:
+    """
+    Распределение бюджета budget по лотам со стоимостью шага costs.
+
+    Сначала раздаем шаги по кругу, см. _round_robin. Остаток после этого меньше самого дешевого
+    шага, но его можно уменьшить, если раздать шаги иначе, поэтому пробуем еще несколько вариантов:
+    одинаковая база шагов (или на шаг меньше) и остаток, розданный через _distribute_remainder
+    в порядке лотов или сразу лучшему лоту. Чтобы лоты не расходились, один лот получает сверх базы
+    не больше base // _REMAINDER_SKEW шагов. Оставляем вариант с минимальным остатком,
+    при равенстве - раздачу по кругу
+    """
+    order = sorted(range(len(costs)), key=costs.__getitem__)
+    sorted_costs = [costs[i] for i in order]
+    prefix_sums = [0, *itertools.accumulate(sorted_costs)]
+    # Порядок лотов во входном списке как позиции в sorted_costs
+    positions = sorted(range(len(costs)), key=order.__getitem__)
+    best_steps, best_remainder = _round_robin(sorted_costs, prefix_sums, budget)
+    base_steps, remainder = divmod(budget, prefix_sums[-1])
+    for base, base_remainder in ((base_steps, remainder), (base_steps - 1, remainder + prefix_sums[-1])):
+        if base < 0:
+            continue
+        for remainder_order in (positions, ()):
+            extra, left = _distribute_remainder(
+                sorted_costs, prefix_sums, base_remainder, remainder_order, max(base // _REMAINDER_SKEW, 1),
+            )
+            if left < best_remainder:
+                best_steps, best_remainder = [base + steps for steps in extra], left
+    steps = [0] * len(costs)
+    for position, i in enumerate(order):
+        steps[i] = best_steps[position]
+    return steps
 
 
 def _calculate_lots(prices: List[Decimal], min_quantity: Decimal, step: Decimal, volume: Decimal) -> List[Decimal]:
     """
     На данном этапе имеем список цен prices и теперь нужно для каждой цены
     рассчитать значение quantity, т.е. необходимо выполнение условия
-    Σ(Pi * Qi) = volume, где Pi - цена, Qi - quantity
-    """
-    lots = []
-    for _ in range(len(prices)):
-        lots.append(min_quantity)  # Изначально каждому Pi присваиваем минимальное quantity
-    current_volume = Decimal(0)
-    for price, quantity in zip(prices, lots):
-        current_volume += price * quantity  # Считаем получившийся объем
-    if volume < current_volume:
+    Σ(Pi * Qi) <= volume, где Pi - цена, Qi - quantity
+
+    Считаем в целых единицах: Qi = min_quantity + Ki * step, стоимость одного шага
+    лота Ci = Pi * step. Шаги раздаются лотам по кругу с доработкой остатка, см. _allocate_steps,
+    сложность O(n log n) и не зависит от volume
+    """
+    remaining_volume = volume - min_quantity * sum(prices)
+    if remaining_volume < 0:
         raise TooLowRequestedVolumeError
-    # Способ разбиения в "лоб", но вполне рабочий
-    while current_volume + step < volume:
-        current_volume_before = current_volume
-        for i in range(len(lots)):
-            # Если можем в оставшийся объем вместить prices[i] * min_quantity
-            if current_volume + prices[i] * min_quantity <= volume:
-                lots[i] += min_quantity
-                current_volume += prices[i] * min_quantity
-                continue
-            if min_quantity == step:
-                break
-            remaining_quantity = (volume - current_volume) / prices[i]
-            remaining_quantity -= remaining_quantity % step
-            remaining_quantity = remaining_quantity.quantize(Decimal('0.000000'))
-            # Добиваем оставшийся объем
-            if remaining_quantity and current_volume + prices[i] * remaining_quantity <= volume:
-                lots[i] += remaining_quantity
-                current_volume += prices[i] * remaining_quantity
-        # Если вдруг за полную итерацию не смогли найти такое Qi, что
-        # current_volume + Pi * Qi <= volume, то выходим
-        if current_volume == current_volume_before:
-            break
-    return lots
-
-
-async def _get_price_range(req: CreateOrderRequest, client: BinanceClient, symbol: Symbol) -> Tuple[Decimal, Decimal]:
+    step = step.quantize(Decimal('0.000000'))
+    # Стоимость округляем вверх, а бюджет вниз, чтобы Σ(Pi * Qi) <= volume выполнялось всегда
+    costs = [_to_units(price, rounding=ROUND_CEILING) * _to_units(step) for price in prices]
+    budget = _to_units(remaining_volume, exponent=2 * _UNITS_EXPONENT)
+    return [(min_quantity + step * steps).quantize(Decimal('0.000000')) for steps in _allocate_steps(costs, budget)]
+
+
+def _jitter_lots(
+        prices: List[Decimal],
+        lots: List[Decimal],
+        min_quantity: Decimal,
+        step: Decimal,
+        amount_dif: Decimal,
+        rng: random.Random,
+) -> List[Decimal]:
+    """
+    Разброс объемов ордеров на amountDif долларов в верхнюю и нижнюю сторону.
+    Ордера случайно разбиваются на пары, в паре один ордер получает до amount_dif долларов
+    объема, а второй отдает не меньше, чтобы Σ(Pi * Qi) <= volume сохранялось.
+    Объем ордера меняется не больше чем на amount_dif плюс стоимость одного шага лота,
+    quantity не опускается ниже min_quantity. Сложность O(n)
+    """
+    step = step.quantize(Decimal('0.000000'))
+    steps = [int((lot - min_quantity) / step) for lot in lots]
+    costs = [_to_units(price, rounding=ROUND_CEILING) * _to_units(step) for price in prices]
+    amount = _to_units(amount_dif, exponent=2 * _UNITS_EXPONENT)
+    indices = list(range(len(prices)))
+    rng.shuffle(indices)
+    for up, down in zip(indices[::2], indices[1::2]):
+        up_steps = int(rng.random() * amount) // costs[up]
+        # Округляем вверх, чтобы освобожденный объем покрывал добавленный
+        down_steps = -(-up_steps * costs[up] // costs[down])
+        if down_steps > steps[down]:
+            down_steps = steps[down]
+            up_steps = down_steps * costs[down] // costs[up]
+        steps[up] += up_steps
+        steps[down] -= down_steps
+    return [(min_quantity + step * count).quantize(Decimal('0.000000')) for count in steps]
+
+
+def _order_log_fields(
+        request: CreateOrderRequest,
+        client_order_id: str,
+        price: Decimal,
+        quantity: Decimal,
+        started_at: float,
+        **fields: Any,
+) -> Dict[str, Any]:
+    """
+    Поля JSON записи об ордере, latency - время запроса создания ордера в миллисекундах
+    """
+    return {
+        'symbol': request.symbol.upper(),
+        'side': request.side.value,
+        'client_order_id': client_order_id,
+        'price': price,
+        'quantity': quantity,
+        'latency': round((time.perf_counter() - started_at) * 1000, 3),
+        **fields,
+    }
+
+
+def _log_every(number: int) -> int:
+    """
+    Логируется каждый _log_every созданный ордер лесенки: у большой лесенки
+    не больше LOG_ORDERS_SAMPLE_SIZE записей, 0 - логировать все ордера
+    """
+    sample_size = config.LOG_ORDERS_SAMPLE_SIZE
+    if sample_size <= 0 or number <= sample_size:
+        return 1
+    return math.ceil(number / sample_size)
+
+
+async def _submit_order(
+        request: CreateOrderRequest,
+        client: BinanceClient,
+        price: Decimal,
+        quantity: Decimal,
+        semaphore: asyncio.Semaphore,
+        client_order_id: str,
+        log: bool = True,
+        cancelled: Optional[asyncio.Event] = None,
+) -> CreateOrderData:
+    """
+    Создание одного ордера лесенки. Ошибка создания ордера не прерывает
+    создание остальных, а возвращается в CreateOrderData.error.
+    client_order_id позволяет клиенту безопасно повторить запрос, см. BinanceClient.create_new_order
+    :param log: логировать созданный ордер, ошибки логируются всегда
+    :param cancelled: если установлен до отправки запроса, ордер не отправляется (ошибка CANCELLED).
+        Уже отправленный запрос не прерывается, чтобы результат соответствовал состоянию в Binance
+    """
+    def _cancelled() -> bool:
+        return cancelled is not None and cancelled.is_set()
+
+    async with semaphore:
+        if _cancelled():
+            return CreateOrderData(price=price, quantity=quantity, client_order_id=client_order_id, error=CANCELLED)
+        # Ордер, который ждет лимиты Binance, еще можно снять отменой
+        await client.wait_order_limits()
+        if _cancelled():
+            return CreateOrderData(price=price, quantity=quantity, client_order_id=client_order_id, error=CANCELLED)
+        started_at = time.perf_counter()
+        try:
+            response = await client.create_new_order(
+                request=NewOrderRequest(
+                    symbol=request.symbol, side=request.side, type=OrderType.LIMIT,
+                    quantity=quantity, price=price, timeInForce=TimeInForce.GTC,
+                    newClientOrderId=client_order_id,
+                ),
+            )
+        except BinanceHttpError as error:
+            logger.error(
+                'Create order %s error: %s', client_order_id, error,
+                extra=_order_log_fields(request, client_order_id, price, quantity, started_at, error=error.msg),
+            )
+            ORDER_ERRORS.labels('order', error_label(error)).inc()
+            return CreateOrderData(price=price, quantity=quantity, client_order_id=client_order_id, error=error.msg)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+            logger.error(
+                'Create order %s error: %r', client_order_id, error,
+                extra=_order_log_fields(request, client_order_id, price, quantity, started_at, error=repr(error)),
+            )
+            ORDER_ERRORS.labels('order', error_label(error)).inc()
+            return CreateOrderData(price=price, quantity=quantity, client_order_id=client_order_id, error=repr(error))
+    if log and logger.isEnabledFor(logging.INFO):
+        logger.info(
+            'Created order %s', client_order_id,
+            extra=_order_log_fields(request, client_order_id, price, quantity, started_at, order_id=response.orderId),
+        )
+    return CreateOrderData(
+        order_id=response.orderId,
+        client_order_id=client_order_id,
+        price=response.price,
+        quantity=quantity,
+        transact_time=response.transactTime,
+    )
+
+
+async def submit_orders(
+        request: CreateOrderRequest,
+        client: BinanceClient,
+        prices: List[Decimal],
+        lots: List[Decimal],
+        semaphore: Optional[asyncio.Semaphore] = None,
+        journal: Optional[OrderJournal] = None,
+        ladder_id: Optional[str] = None,
+        on_result: Optional[Callable[[int, CreateOrderData], None]] = None,
+        cancelled: Optional[asyncio.Event] = None,
+) -> List[CreateOrderData]:
+    """
+    Конкурентное создание ордеров: одновременно в полете не больше
+    BINANCE_ORDERS_CONCURRENCY запросов, а темп ограничен лимитами Binance
+    через rate_limit_governor. Порядок результатов совпадает с порядком prices.
+    semaphore передается, когда несколько лесенок создаются через общий лимит.
+    newClientOrderId ордера - id лесенки (ladder_id, по умолчанию случайный) и номер ордера в ней.
+    Если передан journal, план лесенки записывается в него до отправки первого ордера,
+    а результат каждого ордера - сразу после ответа Binance.
+    on_result вызывается с номером ордера и результатом по мере создания ордеров.
+    После установки cancelled новые ордера не отправляются, см. _submit_order.
+    Созданные ордера большой лесенки логируются выборочно, см. _log_every
+    """
+    orders_semaphore = semaphore or asyncio.Semaphore(config.BINANCE_ORDERS_CONCURRENCY)
+    ladder_id = ladder_id or uuid.uuid4().hex[:24]
+    client_order_ids = [f'{ladder_id}-{index}' for index in range(len(prices))]
+    log_every = _log_every(len(prices))
+    started_at = time.perf_counter()
+
+    async def _submit(index: int, price: Decimal, quantity: Decimal) -> CreateOrderData:
+        # span включает ожидание semaphore и лимитов Binance
+        with tracing.span('order.submit') as span:
+            if span is not None:
+                span.set_attribute('order.client_order_id', client_order_ids[index])
+            order = await _submit_order(
+                request, client, price, quantity, orders_semaphore, client_order_ids[index],
+                log=index % log_every == 0, cancelled=cancelled,
+            )
+        if journal is not None:
+            journal.ack(client_order_ids[index], order_id=order.order_id, error=order.error)
+        if on_result is not None:
+            on_result(index, order)
+        return order
+
+    if journal is not None:
+        await journal.plan(ladder_id, request.symbol, request.side, zip(client_order_ids, prices, lots))
+    orders = await asyncio.gather(*(
+        _submit(index, price, quantity) for index, (price, quantity) in enumerate(zip(prices, lots))
+    ))
+    if journal is not None:
+        journal.complete(ladder_id)
+    logger.info(
+        'Ladder %s: created %d of %d orders', ladder_id, sum(1 for order in orders if order.error is None), len(orders),
+        extra={
+            'symbol': request.symbol.upper(),
+            'side': request.side.value,
+            'ladder_id': ladder_id,
+            'latency': round((time.perf_counter() - started_at) * 1000, 3),
+        },
+    )
+    return orders
+
+
+def _check_price_range(req: CreateOrderRequest, symbol: Symbol, price: Decimal) -> Tuple[Decimal, Decimal]:
     """
     Для лимитных ордеров есть допустимый диапазон цен, по
     которым мы можем закинуть ордер в стакан.
@@ -80,8 +376,6 @@ async def _get_price_range(req: CreateOrderRequest, client: BinanceClient, symbo
     """
     Filter = symbol.percent_price_by_side_filter
 
-    price = (await client.get_latest_price(req.symbol)).price
-
     # См. фильтр PERCENT_PRICE_BY_SIDE
     # https://binance-docs.github.io/apidocs/spot/en/#filters
     if req.side is OrderSide.BUY:
@@ -104,101 +398,271 @@ async def _get_price_range(req: CreateOrderRequest, client: BinanceClient, symbo
     return price_min, price_max
 
 
-async def create_order_handler(request: CreateOrderRequest, client: BinanceClient) -> CreateOrderResponse:
+async def _get_price_range(
+        req: CreateOrderRequest,
+        client: BinanceClient,
+        symbol: Symbol,
+        latest_price: Optional[Decimal] = None,
+) -> Tuple[Decimal, Decimal]:
     """
-    Разбиение request.volume объема на request.number ордеров
+    Допустимый диапазон цен, см. _check_price_range.
+    latest_price можно передать заранее полученным, иначе он запрашивается у Binance
+    """
+    price = latest_price if latest_price is not None else (await client.get_latest_price(req.symbol)).price
+    return _check_price_range(req, symbol, price)
+
 
-    Важно:
-        Не полностью понял ТЗ, особенно момент с amountDif, потому
-        сделал просто разбиение обшего объема на request.number ордеров
+def _plan_ladder(
+        request: CreateOrderRequest,
+        symbol: Symbol,
+        price_min: Decimal,
+        price_max: Decimal,
+) -> Tuple[List[Decimal], List[Decimal]]:
     """
-    status: APITradingStatusResponse = await client.get_api_trading_status()
-    if status.data.isLocked:
-        logger.error('API trading function is locked')
+    Цены и объемы ордеров лесенки.
+    Цены распределяются по request.priceDistribution, см. generate_prices.
+    Объем делится между ордерами поровну, затем каждый ордер получает
+    случайный разброс объема в пределах amountDif, см. _jitter_lots
+    :raises WrongPriceRangeError: в диапазоне нет цены, кратной tickSize
+    :raises TooManyOrdersForPriceRangeError:
+    :raises TooLowRequestedVolumeError:
+    """
+    step_size = symbol.lot_size_filter.stepSize
+    tick_size = symbol.price_filter.tickSize
+    rng = random.Random(request.seed)
+
+    min_quantity = _calculate_min_quantity(symbol.notional_filter.minNotional, request.priceMin, step_size)
+
+    with tracing.span('order.calculate_prices'):
+        prices = generate_prices(
+            price_min, price_max, tick_size, request.number,
+            seed=request.seed, distribution=request.priceDistribution, side=request.side,
+        )
+
+    with tracing.span('order.calculate_lots'):
+        lots = _calculate_lots(prices, min_quantity, step_size, request.volume)
+        return prices, _jitter_lots(prices, lots, min_quantity, step_size, request.amountDif, rng)
+
+
+def _orders_response(orders: List[CreateOrderData]) -> CreateOrderResponse:
+    failed = sum(1 for order in orders if order.error is not None)
+    if failed:
+        logger.error('Failed to create %d of %d orders', failed, len(orders))
         return CreateOrderResponse(
             success=False,
-            error='API trading function is locked',
+            error=f'Failed to create {failed} of {len(orders)} orders',
+            orders=orders,
         )
-    exchange_info: ExchangeInfoResponse = await client.exchange_info(request.symbol)
+    return CreateOrderResponse(success=True, orders=orders)
+
+
+async def _timed(awaitable: Awaitable[T], timings: Dict[str, float], name: str) -> T:
+    started_at = time.perf_counter()
+    result = await awaitable
+    timings[name] = time.perf_counter() - started_at
+    return result
+
+
+def _check_symbol(request: CreateOrderRequest, exchange_info: ExchangeInfoResponse) -> Symbol:
     try:
         symbol = exchange_info.get_symbol(request.symbol.upper())
     except NotFoundSymbolInExchangeInfo:
         logger.error('Not found symbol in exchange info')
-        return CreateOrderResponse(
-            success=False,
-            error='Not found trading symbol',
-        )
+        raise PreTradeCheckError('Not found trading symbol')
     if not symbol.isSpotTradingAllowed:
         logger.error('Spot trading disabled')
-        return CreateOrderResponse(
-            success=False,
-            error='Spot trading disabled',
-        )
+        raise PreTradeCheckError('Spot trading disabled')
     if symbol.status in (SymbolStatus.HALT, SymbolStatus.BREAK, SymbolStatus.AUCTION_MATCH):
         logger.error('Wrong trading symbol status')
-        return CreateOrderResponse(
-            success=False,
-            error='Wrong trading symbol status',
-        )
-
-    # TODO по хорошему нужно проверки выше выносить в middleware
-    # так как они выглядят как общие для некоторого ряда api
-
+        raise PreTradeCheckError('Wrong trading symbol status')
     # Исхожу из того, что в схеме есть диапазон цен, по которому нужно раскинуть ордера
     # значит MARKET ордер нам не подходит и нужно использовать лимитку
     if OrderType.LIMIT not in symbol.orderTypes:
         logger.error('Limit order disabled')
-        return CreateOrderResponse(
-            success=False,
-            error='Limit order disabled',
-        )
+        raise PreTradeCheckError('Limit order disabled')
+    return symbol
+
 
+async def _pre_trade_checks(request: CreateOrderRequest, client: BinanceClient) -> Tuple[Symbol, Decimal, Decimal]:
+    """
+    Проверки перед созданием ордеров.
+    Статус торговли по API, exchangeInfo и последняя цена друг от друга не зависят,
+    поэтому запрашиваются одновременно, а проверяются в прежнем порядке.
+    Если проверка не прошла, оставшиеся запросы отменяются
+    """
+    timings: Dict[str, float] = {}
+    status_task = asyncio.create_task(_timed(client.get_api_trading_status(), timings, 'trading_status'))
+    exchange_info_task = asyncio.create_task(_timed(client.exchange_info(request.symbol), timings, 'exchange_info'))
+    price_task = asyncio.create_task(_timed(client.get_latest_price(request.symbol), timings, 'latest_price'))
+    tasks = (status_task, exchange_info_task, price_task)
     try:
-        price_min, price_max = await _get_price_range(request, client, symbol)
-    except WrongPriceRangeError:
-        logger.error('Wrong price range')
+        with ORDER_PHASE_SECONDS.labels('checks').time(), tracing.span('order.checks'):
+            status: APITradingStatusResponse = await status_task
+            if status.data.isLocked:
+                logger.error('API trading function is locked')
+                raise PreTradeCheckError('API trading function is locked')
+            symbol = _check_symbol(request, await exchange_info_task)
+
+        # TODO по хорошему нужно проверки выше выносить в middleware
+        # так как они выглядят как общие для некоторого ряда api
+
+        with ORDER_PHASE_SECONDS.labels('price_range').time(), tracing.span('order.price_range'):
+            try:
+                price_min, price_max = await _get_price_range(request, client, symbol, (await price_task).price)
+            except WrongPriceRangeError:
+                logger.error('Wrong price range')
+                raise PreTradeCheckError('Wrong price range')
+    finally:
+        for task in tasks:
+            task.cancel()
+        # Забираем результаты и исключения отмененных задач, чтобы они не потерялись в event loop
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info('Pre-trade checks timings: %s', ' '.join(
+                f'{name}={duration * 1000:.1f}ms' for name, duration in timings.items()
+            ))
+    return symbol, price_min, price_max
+
+
+async def plan_order_handler(request: CreateOrderRequest, client: BinanceClient) -> Tuple[List[Decimal], List[Decimal]]:
+    """
+    Проверки перед созданием ордеров и расчет цен и объемов лесенки без ее создания
+    :raises PreTradeCheckError: лесенку создать нельзя
+    """
+    try:
+        symbol, price_min, price_max = await _pre_trade_checks(request, client)
+        with ORDER_PHASE_SECONDS.labels('planning').time(), tracing.span('order.planning') as span:
+            if span is not None:
+                span.set_attribute('order.number', request.number)
+            try:
+                return _plan_ladder(request, symbol, price_min, price_max)
+            except WrongPriceRangeError:
+                logger.error('Wrong price range')
+                raise PreTradeCheckError('Wrong price range')
+            except TooManyOrdersForPriceRangeError:
+                logger.error('Too many orders for price range')
+                raise PreTradeCheckError('Too many orders for price range')
+            except TooLowRequestedVolumeError:
+                logger.error('Too low requested volume')
+                raise PreTradeCheckError('Too low requested volume')
+    except PreTradeCheckError as error:
+        ORDER_ERRORS.labels('pre_trade', error.msg).inc()
+        raise
+
+
+async def create_order_handler(
+        request: CreateOrderRequest,
+        client: BinanceClient,
+        journal: Optional[OrderJournal] = None,
+) -> CreateOrderResponse:
+    """
+    Разбиение request.volume объема на request.number ордеров
+    с разбросом объема ордеров в пределах amountDif, см. _plan_ladder
+    """
+    try:
+        prices, lots = await plan_order_handler(request, client)
+    except PreTradeCheckError as error:
         return CreateOrderResponse(
             success=False,
-            error='Wrong price range',
+            error=error.msg,
         )
 
-    step_size = symbol.lot_size_filter.stepSize
-    tick_size = symbol.price_filter.tickSize
+    with ORDER_PHASE_SECONDS.labels('submission').time(), tracing.span('order.submission'):
+        orders = await submit_orders(request, client, prices, lots, journal=journal)
+    return _orders_response(orders)
 
-    # Минимально возможное значение quantity
-    min_quantity = symbol.notional_filter.minNotional / request.priceMin
-    min_quantity = (min_quantity + step_size) - (min_quantity + step_size) % step_size
 
-    prices = []
-    for _ in range(request.number):
-        prices.append(_calculate_price(price_min, price_max, tick_size))
+async def _get_latest_prices(
+        client: BinanceClient,
+        symbols: Iterable[str],
+) -> Dict[str, Union[LatestPriceResponse, BaseException]]:
+    symbols = list(symbols)
+    responses = await asyncio.gather(
+        *(client.get_latest_price(symbol) for symbol in symbols),
+        return_exceptions=True,
+    )
+    for response in responses:
+        if isinstance(response, BaseException) and not isinstance(response, BINANCE_REQUEST_ERRORS):
+            raise response
+    return dict(zip(symbols, responses))
+
 
+def _plan_batch_item(
+        request: CreateOrderRequest,
+        exchange_info: ExchangeInfoResponse,
+        latest_price: Union[LatestPriceResponse, BaseException],
+) -> Tuple[List[Decimal], List[Decimal]]:
+    symbol = _check_symbol(request, exchange_info)
+    if isinstance(latest_price, BaseException):
+        # Текст ошибки только в логе: сообщение PreTradeCheckError - метка ORDER_ERRORS
+        logger.error(
+            'Latest price unavailable: %r', latest_price,
+            extra={'symbol': request.symbol.upper(), 'error': error_label(latest_price)},
+        )
+        raise PreTradeCheckError('Latest price unavailable')
     try:
-        lots = _calculate_lots(prices, min_quantity, step_size, request.volume)
+        price_min, price_max = _check_price_range(request, symbol, latest_price.price)
+    except WrongPriceRangeError:
+        logger.error('Wrong price range')
+        raise PreTradeCheckError('Wrong price range')
+    try:
+        return _plan_ladder(request, symbol, price_min, price_max)
+    except WrongPriceRangeError:
+        logger.error('Wrong price range')
+        raise PreTradeCheckError('Wrong price range')
+    except TooManyOrdersForPriceRangeError:
+        logger.error('Too many orders for price range')
+        raise PreTradeCheckError('Too many orders for price range')
     except TooLowRequestedVolumeError:
         logger.error('Too low requested volume')
-        return CreateOrderResponse(
-            success=False,
-            error='Too low requested volume',
-        )
+        raise PreTradeCheckError('Too low requested volume')
 
-    orders = []
-    for price, quantity in zip(prices, lots):
-        logger.info(f'Create order price={price} quantity={quantity}')
-
-        # TODO тут остаются неопределенные моменты
-        # Например, если ордеров много и есть вариант попасть на rate limits
-        # по этой же причине нельзя закинуть реквесты в asyncio.gather
-        # и вызывающий api код может попасть на 504 gateway timeout
-        response = await client.create_new_order(
-            request=NewOrderRequest(
-                symbol=request.symbol, side=request.side, type=OrderType.LIMIT,
-                quantity=quantity, price=price, timeInForce=TimeInForce.GTC,
-            ),
-        )
-        orders.append(CreateOrderData(
-            order_id=response.orderId,
-            price=response.price,
-            transact_time=response.transactTime,
-        ))
-    return CreateOrderResponse(success=True, orders=orders)
+
+async def create_order_batch_handler(
+        batch: CreateOrderBatchRequest,
+        client: BinanceClient,
+        journal: Optional[OrderJournal] = None,
+) -> CreateOrderBatchResponse:
+    """
+    Создание лесенок сразу по нескольким запросам.
+    Статус торговли по API и exchangeInfo запрашиваются один раз на весь батч,
+    последние цены - по одному разу на символ. exchangeInfo загружается целиком (или берется
+    из кэша) и символы ищутся в нем: с параметром symbols Binance отвечает ошибкой -1121 на весь
+    запрос, если неизвестен хотя бы один символ. Лесенки планируются по отдельности,
+    а создаются через общий semaphore и rate_limit_governor.
+    Ошибка одного запроса не прерывает остальные
+    """
+    symbols = sorted({request.symbol.upper() for request in batch.requests})
+    status, exchange_info, latest_prices = await asyncio.gather(
+        client.get_api_trading_status(),
+        client.exchange_info(whitelist=symbols),
+        _get_latest_prices(client, symbols),
+    )
+    if status.data.isLocked:
+        logger.error('API trading function is locked')
+        return CreateOrderBatchResponse(success=False, error='API trading function is locked')
+
+    results: List[Optional[CreateOrderBatchItem]] = []
+    ladders = []
+    for request in batch.requests:
+        try:
+            prices, lots = _plan_batch_item(request, exchange_info, latest_prices[request.symbol.upper()])
+        except PreTradeCheckError as error:
+            ORDER_ERRORS.labels('pre_trade', error.msg).inc()
+            results.append(CreateOrderBatchItem(symbol=request.symbol.upper(), success=False, error=error.msg))
+            continue
+        results.append(None)
+        ladders.append((len(results) - 1, request, prices, lots))
+
+    semaphore = asyncio.Semaphore(config.BINANCE_ORDERS_CONCURRENCY)
+    submitted = await asyncio.gather(*(
+        submit_orders(request, client, prices, lots, semaphore, journal)
+        for _, request, prices, lots in ladders
+    ))
+    for (index, request, _, _), orders in zip(ladders, submitted):
+        results[index] = CreateOrderBatchItem(symbol=request.symbol.upper(), **_orders_response(orders).dict())
+
+    return CreateOrderBatchResponse(
+        success=all(result is not None and result.success for result in results),
+        results=results,
+    )
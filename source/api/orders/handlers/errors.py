@@ -4,3 +4,20 @@ class WrongPriceRangeError(Exception):
 
 class TooLowRequestedVolumeError(Exception):
     ...
+
+
+class PreTradeCheckError(Exception):
+
+    def __init__(self, msg: str) -> None:
+        self.msg = msg
+
+    def __str__(self) -> str:
+        return self.msg
+
+
+class JobQueueFullError(Exception):
+    ...
+
+
+class TooManyOrdersForPriceRangeError(Exception):
+    ...
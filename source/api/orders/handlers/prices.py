@@ -0,0 +1,175 @@
+import importlib
+import math
+import random
+from decimal import ROUND_CEILING, ROUND_FLOOR, Decimal
+from statistics import NormalDist
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from source.api.orders.handlers.errors import TooManyOrdersForPriceRangeError, WrongPriceRangeError
+from source.enums import OrderSide, PriceDistribution
+
+# None, если numpy не установлен (см. requirements-numpy.txt)
+numpy: Optional[Any]
+try:
+    numpy = importlib.import_module('numpy')
+except ImportError:  # pragma: no cover
+    numpy = None
+
+# Цены не грубее 6 знаков, как и везде в сервисе, см. Decimal('0.000000')
+_PRICE_EXPONENT = -6
+
+# numpy.random.Generator.integers работает с int64
+_NUMPY_MAX_TICK = 2 ** 63 - 1
+
+# Диапазон цен для GAUSSIAN - ±3 стандартных отклонения от середины
+_GAUSSIAN_SIGMAS = 3
+
+
+def price_tick_range(price_min: Decimal, price_max: Decimal, tick_size: Decimal) -> Tuple[int, int]:
+    """
+    Диапазон цен в целых tick_size: все цены price_min <= tick * tick_size <= price_max
+    удовлетворяют PRICE_FILTER (price % tick_size = 0)
+    :raises WrongPriceRangeError: в диапазоне нет ни одной цены, кратной tick_size
+    """
+    tick_min = int((price_min / tick_size).to_integral_value(rounding=ROUND_CEILING))
+    tick_max = int((price_max / tick_size).to_integral_value(rounding=ROUND_FLOOR))
+    if tick_min > tick_max:
+        raise WrongPriceRangeError
+    return tick_min, tick_max
+
+
+def random_ticks(tick_min: int, tick_max: int, number: int, seed: Optional[int] = None) -> List[int]:
+    """
+    number равномерно распределенных целых из [tick_min; tick_max].
+    С numpy все значения генерируются одним вызовом, без него - random.Random.
+    С одним seed результат повторяется, но у numpy и random.Random последовательности разные
+    """
+    if numpy is not None and tick_max <= _NUMPY_MAX_TICK:
+        return numpy.random.default_rng(seed).integers(tick_min, tick_max, size=number, endpoint=True).tolist()
+    randrange = random.Random(seed).randrange
+    return [randrange(tick_min, tick_max + 1) for _ in range(number)]
+
+
+def ticks_to_prices(ticks: List[int], tick_size: Decimal) -> List[Decimal]:
+    """
+    Перевод целых tick_size в Decimal без float. tick_size приводится к экспоненте
+    не больше -6, тогда произведение на целое точное и сразу с нужным числом знаков
+    """
+    # У конечного Decimal экспонента всегда int, строковые 'n', 'N', 'F' только у NaN и Infinity
+    exponent = min(int(tick_size.as_tuple().exponent), _PRICE_EXPONENT)
+    step = Decimal(int(tick_size.scaleb(-exponent))).scaleb(exponent)
+    return [Decimal(tick) * step for tick in ticks]
+
+
+def _distinct_ticks(ticks: List[int], tick_min: int, tick_max: int) -> List[int]:
+    """
+    Неубывающие ticks из [tick_min; tick_max] -> строго возрастающие за два прохода:
+    совпавшие сдвигаются вверх, вышедшие за tick_max - обратно вниз.
+    Требует len(ticks) <= tick_max - tick_min + 1
+    """
+    for index in range(1, len(ticks)):
+        if ticks[index] <= ticks[index - 1]:
+            ticks[index] = ticks[index - 1] + 1
+    limit = tick_max
+    for index in range(len(ticks) - 1, -1, -1):
+        if ticks[index] > limit:
+            ticks[index] = limit
+        limit = ticks[index] - 1
+    return ticks
+
+
+def _linear_ticks(tick_min: int, tick_max: int, number: int, side: OrderSide, rng: random.Random) -> List[int]:
+    """
+    Равный шаг между ценами от tick_min до tick_max, при number <= числа цен шаг не меньше tick_size
+    """
+    if number == 1:
+        return [(tick_min + tick_max) // 2]
+    span = tick_max - tick_min
+    return [tick_min + index * span // (number - 1) for index in range(number)]
+
+
+def _geometric_ticks(tick_min: int, tick_max: int, number: int, side: OrderSide, rng: random.Random) -> List[int]:
+    """
+    Постоянный шаг в процентах: каждая следующая цена в ratio раз больше предыдущей.
+    Внизу диапазона шаг меньше tick_size округляется до соседних цен
+    """
+    if number == 1:
+        return [tick_min]
+    ratio = (tick_max / tick_min) ** (1 / (number - 1))
+    ticks = [min(round(tick_min * ratio ** index), tick_max) for index in range(number)]
+    return _distinct_ticks(ticks, tick_min, tick_max)
+
+
+def _gaussian_ticks(tick_min: int, tick_max: int, number: int, side: OrderSide, rng: random.Random) -> List[int]:
+    """
+    Квантили нормального распределения с центром в середине диапазона: чем ближе
+    к середине, тем плотнее цены. Края диапазона - ±_GAUSSIAN_SIGMAS отклонения
+    """
+    middle = (tick_min + tick_max) / 2
+    distribution = NormalDist(middle, (tick_max - tick_min) / (2 * _GAUSSIAN_SIGMAS) or 1)
+    ticks = [
+        min(max(round(distribution.inv_cdf((index + 0.5) / number)), tick_min), tick_max)
+        for index in range(number)
+    ]
+    return _distinct_ticks(ticks, tick_min, tick_max)
+
+
+def _weighted_random_ticks(
+        tick_min: int,
+        tick_max: int,
+        number: int,
+        side: OrderSide,
+        rng: random.Random,
+) -> List[int]:
+    """
+    Случайные цены, плотность которых линейно убывает от рыночной стороны диапазона:
+    от priceMin у SELL и от priceMax у BUY. Диапазон вероятностей делится на number
+    равных частей, из каждой берется одна цена, так что лесенка покрывает весь диапазон
+    """
+    span = tick_max - tick_min
+    # Обратная функция распределения треугольной плотности с максимумом в 0
+    offsets = [
+        round(span * (1 - math.sqrt(1 - (index + rng.random()) / number))) for index in range(number)
+    ]
+    if side is OrderSide.BUY:
+        ticks = [tick_max - offset for offset in reversed(offsets)]
+    else:
+        ticks = [tick_min + offset for offset in offsets]
+    return _distinct_ticks(ticks, tick_min, tick_max)
+
+
+_TICKS_TYPE = Callable[[int, int, int, OrderSide, random.Random], List[int]]
+
+# Распределения с разными ценами, RANDOM - см. random_ticks
+
+PRICE_DISTRIBUTIONS: Dict[PriceDistribution, _TICKS_TYPE] = {
+    PriceDistribution.LINEAR: _linear_ticks,
+    PriceDistribution.GEOMETRIC: _geometric_ticks,
+    PriceDistribution.GAUSSIAN: _gaussian_ticks,
+    PriceDistribution.WEIGHTED_RANDOM: _weighted_random_ticks,
+}
+
+
+def generate_prices(
+        price_min: Decimal,
+        price_max: Decimal,
+        tick_size: Decimal,
+        number: int,
+        seed: Optional[int] = None,
+        distribution: PriceDistribution = PriceDistribution.RANDOM,
+        side: OrderSide = OrderSide.SELL,
+) -> List[Decimal]:
+    """
+    Цены ордеров лесенки из [price_min; price_max], кратные tick_size.
+    RANDOM - number независимых случайных цен, цены могут совпадать.
+    Остальные распределения дают number разных цен по возрастанию за O(number), см. PRICE_DISTRIBUTIONS
+    :raises WrongPriceRangeError: в диапазоне нет цены, кратной tick_size
+    :raises TooManyOrdersForPriceRangeError: разных цен в диапазоне меньше number
+    """
+    tick_min, tick_max = price_tick_range(price_min, price_max, tick_size)
+    if distribution is PriceDistribution.RANDOM:
+        return ticks_to_prices(random_ticks(tick_min, tick_max, number, seed), tick_size)
+    if number > tick_max - tick_min + 1:
+        raise TooManyOrdersForPriceRangeError
+    ticks = PRICE_DISTRIBUTIONS[distribution](tick_min, tick_max, number, side, random.Random(seed))
+    return ticks_to_prices(ticks, tick_size)
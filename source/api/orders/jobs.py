@@ -0,0 +1,183 @@
+import asyncio
+import time
+import uuid
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+from source.api.orders.handlers.create_order import CANCELLED, submit_orders
+from source.api.orders.handlers.errors import JobQueueFullError
+from source.api.orders.journal import OrderJournal
+from source.api.orders.schemas import CreateOrderData, CreateOrderRequest, OrderJobResponse
+from source.clients.binance.client import BinanceClient
+from source.config import config
+from source.enums import JobStatus
+from source.logger import logger
+
+FINAL_JOB_STATUSES = (JobStatus.DONE, JobStatus.FAILED, JobStatus.CANCELLED)
+
+
+class OrderJob:
+    """
+    Лесенка, которая создается в фоне. Результаты ордеров появляются в orders по мере создания
+    """
+
+    def __init__(self, request: CreateOrderRequest, prices: List[Decimal], lots: List[Decimal]) -> None:
+        self.id = uuid.uuid4().hex[:24]
+        self.request = request
+        self.prices = prices
+        self.lots = lots
+        self.status = JobStatus.QUEUED
+        self.error: Optional[str] = None
+        self.orders: List[Optional[CreateOrderData]] = [None] * len(prices)
+        self.finished_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+        # Новые ордера не отправляются, см. _submit_order
+        self._cancel = asyncio.Event()
+        self._finished = asyncio.Event()
+
+    def _set_order(self, index: int, order: CreateOrderData) -> None:
+        self.orders[index] = order
+
+    def _finish(self, status: JobStatus, error: Optional[str] = None) -> None:
+        self.status = status
+        self.error = error
+        self.finished_at = time.monotonic()
+        self._finished.set()
+
+    def to_response(self) -> OrderJobResponse:
+        completed = [order for order in self.orders if order is not None]
+        return OrderJobResponse(
+            job_id=self.id,
+            status=self.status,
+            total=len(self.orders),
+            completed=len(completed),
+            failed=sum(1 for order in completed if order.error is not None),
+            error=self.error,
+            orders=self.orders,
+        )
+
+
+class OrderJobManager:
+    """
+    Очередь лесенок, которые создаются в фоне пулом из workers задач.
+
+    Очередь ограничена queue_size, при переполнении submit бросает JobQueueFullError.
+    Ордера всех заданий создаются через общий semaphore (BINANCE_ORDERS_CONCURRENCY),
+    так что несколько больших лесенок не превышают лимит одновременных запросов.
+    Отмена задания из очереди снимает его целиком. У выполняющегося задания не отправляются
+    новые ордера, а уже отправленные запросы завершаются и записывают свой настоящий результат,
+    так что ордер, созданный в Binance, не помечается отмененным. Завершенные задания хранятся ttl секунд
+    """
+
+    def __init__(
+            self,
+            client: BinanceClient,
+            workers: int = 4,
+            queue_size: int = 100,
+            ttl: float = 3600,
+            journal: Optional[OrderJournal] = None,
+    ) -> None:
+        self.workers = workers
+        self.ttl = ttl
+        self._client = client
+        self._journal = journal
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self._jobs: Dict[str, OrderJob] = {}
+        self._semaphore = asyncio.Semaphore(config.BINANCE_ORDERS_CONCURRENCY)
+        self._tasks: List[asyncio.Task] = []
+
+    def _evict(self) -> None:
+        expired_at = time.monotonic() - self.ttl
+        for job_id in [
+            job.id for job in self._jobs.values()
+            if job.finished_at is not None and job.finished_at < expired_at
+        ]:
+            del self._jobs[job_id]
+
+    def submit(self, request: CreateOrderRequest, prices: List[Decimal], lots: List[Decimal]) -> OrderJob:
+        """
+        :raises JobQueueFullError: в очереди уже queue_size заданий
+        """
+        self._evict()
+        job = OrderJob(request, prices, lots)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise JobQueueFullError
+        self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str) -> Optional[OrderJob]:
+        return self._jobs.get(job_id)
+
+    async def cancel(self, job_id: str) -> Optional[OrderJob]:
+        """
+        Отмена задания. Для выполняющегося задания ждет завершения уже отправленных запросов
+        """
+        job = self._jobs.get(job_id)
+        if job is None or job.status in FINAL_JOB_STATUSES:
+            return job
+        job._cancel.set()
+        if job._task is None:
+            self._cancelled(job)
+        else:
+            await job._finished.wait()
+        return job
+
+    @staticmethod
+    def _cancelled(job: OrderJob) -> None:
+        for index, (price, quantity) in enumerate(zip(job.prices, job.lots)):
+            if job.orders[index] is None:
+                job.orders[index] = CreateOrderData(
+                    price=price, quantity=quantity, client_order_id=f'{job.id}-{index}', error=CANCELLED,
+                )
+        job._finish(JobStatus.CANCELLED)
+
+    async def _run(self, job: OrderJob) -> None:
+        job.status = JobStatus.RUNNING
+        job._task = asyncio.create_task(submit_orders(
+            job.request, self._client, job.prices, job.lots,
+            semaphore=self._semaphore, journal=self._journal, ladder_id=job.id, on_result=job._set_order,
+            cancelled=job._cancel,
+        ))
+        try:
+            orders = await asyncio.shield(job._task)
+        except asyncio.CancelledError:
+            # Останавливается сам worker: дожидаемся уже отправленных запросов
+            job._cancel.set()
+            await asyncio.wait({job._task})
+            self._cancelled(job)
+            raise
+        except Exception as error:
+            logger.exception('Order job %s failed', job.id, extra={'ladder_id': job.id})
+            job._finish(JobStatus.FAILED, repr(error))
+            return
+        finally:
+            job._task = None
+        if job._cancel.is_set():
+            job._finish(JobStatus.CANCELLED)
+            return
+        failed = sum(1 for order in orders if order.error is not None)
+        if failed:
+            job._finish(JobStatus.DONE, f'Failed to create {failed} of {len(orders)} orders')
+        else:
+            job._finish(JobStatus.DONE)
+
+    async def _worker(self) -> None:
+        while True:
+            job: OrderJob = await self._queue.get()
+            try:
+                if job.status is JobStatus.QUEUED:
+                    await self._run(job)
+            finally:
+                self._queue.task_done()
+
+    def start(self) -> None:
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
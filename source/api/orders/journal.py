@@ -0,0 +1,288 @@
+import asyncio
+import os
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import orjson
+from pydantic import BaseModel
+
+from source.clients.binance.client import ORDER_DOES_NOT_EXIST, BinanceClient
+from source.clients.binance.errors import BINANCE_REQUEST_ERRORS, BinanceHttpError
+from source.enums import OrderSide
+from source.logger import logger
+
+# Ордер из журнала, которого нет в Binance: процесс упал до отправки
+NOT_SUBMITTED = 'Not submitted'
+
+
+class JournalOrder(BaseModel):
+    client_order_id: str
+    price: Decimal
+    quantity: Decimal
+    acked: bool = False
+    order_id: Optional[int] = None
+    error: Optional[str] = None
+
+
+class JournalLadder(BaseModel):
+    ladder_id: str
+    symbol: str
+    side: OrderSide
+    orders: List[JournalOrder]
+    completed: bool = False
+
+    @property
+    def unacked(self) -> List[JournalOrder]:
+        return [order for order in self.orders if not order.acked]
+
+
+def _find_order(ladders: Dict[str, JournalLadder], client_order_id: str) -> Optional[JournalOrder]:
+    # newClientOrderId ордера лесенки - '{ladder_id}-{index}', см. submit_orders
+    ladder_id, _, index = client_order_id.rpartition('-')
+    ladder = ladders.get(ladder_id)
+    if ladder is None or not index.isdigit() or int(index) >= len(ladder.orders):
+        return None
+    order = ladder.orders[int(index)]
+    return order if order.client_order_id == client_order_id else None
+
+
+def load_journal(path: str) -> Dict[str, JournalLadder]:
+    """
+    Лесенки из журнала в порядке записи. Последняя строка могла записаться
+    не полностью, если процесс упал во время записи, такая строка пропускается
+    """
+    ladders: Dict[str, JournalLadder] = {}
+    if not os.path.exists(path):
+        return ladders
+    with open(path, 'rb') as file:
+        for line in file:
+            try:
+                record = orjson.loads(line)
+            except orjson.JSONDecodeError:
+                logger.warning('Skip broken order journal record: %r', line[:100])
+                continue
+            kind = record.pop('t')
+            if kind == 'ladder':
+                ladders[record['ladder_id']] = JournalLadder.parse_obj(record)
+            elif kind == 'ack':
+                order = _find_order(ladders, record['client_order_id'])
+                if order is None:
+                    continue
+                order.acked = True
+                order.order_id = record.get('order_id')
+                order.error = record.get('error')
+            elif kind == 'done' and record['ladder_id'] in ladders:
+                ladders[record['ladder_id']].completed = True
+    return ladders
+
+
+class OrderJournal:
+    """
+    Write-ahead журнал лесенок ордеров: append-only файл, по одной JSON записи на строку.
+
+    Перед отправкой лесенки записывается план (цены, объемы, newClientOrderId), после ответа
+    Binance на каждый ордер - ack, после всей лесенки - done. plan ждет, пока запись
+    окажется на диске, ack и done только попадают в буфер.
+    Все накопившиеся записи пишутся одним write и одним fsync (group commit) в фоновой задаче,
+    пока идет fsync, следующие записи копятся в буфере. Так fsync приходится на пачку записей,
+    а не на каждый ордер, и event loop его не ждет.
+    Потерянный при падении ack не страшен: recover сверит такой ордер с Binance.
+
+    Когда журнал вырастает на compact_size байт с прошлого сжатия, фоновая задача между записями
+    перезаписывает его без завершенных лесенок, см. _compact
+    """
+
+    def __init__(self, path: str, fsync: bool = True, compact_size: int = 64 * 1024 * 1024) -> None:
+        self.path = path
+        self.fsync = fsync
+        self.compact_size = compact_size
+        self.writes = 0
+        self.records = 0
+        self.compactions = 0
+        self._size = 0
+        self._compacted_size = 0
+        self._fd: Optional[int] = None
+        self._buffer: List[bytes] = []
+        self._flushed: List[asyncio.Future] = []
+        self._writing = False
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def _append(self, record: Dict[str, Any]) -> None:
+        if self._task is None:
+            raise RuntimeError('Order journal is not started')
+        self._buffer.append(orjson.dumps(record, default=str) + b'\n')
+        self._wakeup.set()
+
+    async def flush(self) -> None:
+        """
+        Ожидание, пока все записанные до вызова записи окажутся на диске
+        """
+        if not self._buffer and not self._writing:
+            return
+        future = asyncio.get_running_loop().create_future()
+        self._flushed.append(future)
+        self._wakeup.set()
+        await future
+
+    async def plan(
+            self,
+            ladder_id: str,
+            symbol: str,
+            side: OrderSide,
+            orders: Iterable[Tuple[str, Decimal, Decimal]],
+    ) -> None:
+        """
+        :param orders: newClientOrderId, цена и объем каждого ордера лесенки
+        """
+        self._append({
+            't': 'ladder',
+            'ladder_id': ladder_id,
+            'symbol': symbol.upper(),
+            'side': side.value,
+            'orders': [
+                {'client_order_id': client_order_id, 'price': price, 'quantity': quantity}
+                for client_order_id, price, quantity in orders
+            ],
+        })
+        await self.flush()
+
+    def ack(self, client_order_id: str, order_id: Optional[int] = None, error: Optional[str] = None) -> None:
+        self._append({'t': 'ack', 'client_order_id': client_order_id, 'order_id': order_id, 'error': error})
+
+    def complete(self, ladder_id: str) -> None:
+        self._append({'t': 'done', 'ladder_id': ladder_id})
+
+    def _write(self, data: bytes) -> None:
+        assert self._fd is not None
+        view = memoryview(data)
+        while view:
+            view = view[os.write(self._fd, view):]
+        if self.fsync:
+            os.fsync(self._fd)
+        self._size += len(data)
+
+    def _open(self) -> None:
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self._size = self._compacted_size = os.fstat(self._fd).st_size
+
+    def _compact_written(self) -> None:
+        """
+        Сжатие журнала на ходу. Вызывается из _write_loop между записями, так что все
+        записанные строки уже в файле, а новые копятся в буфере и попадут в новый файл
+        """
+        assert self._fd is not None
+        self._compact(load_journal(self.path).values())
+        os.close(self._fd)
+        self._open()
+        self.compactions += 1
+
+    async def _write_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            buffer, self._buffer = self._buffer, []
+            flushed, self._flushed = self._flushed, []
+            if buffer:
+                self._writing = True
+                try:
+                    await loop.run_in_executor(None, self._write, b''.join(buffer))
+                except OSError as error:
+                    logger.error('Failed to write order journal: %r', error)
+                    for future in flushed:
+                        if not future.done():
+                            future.set_exception(error)
+                    continue
+                finally:
+                    self._writing = False
+                self.writes += 1
+                self.records += len(buffer)
+                if self._size - self._compacted_size >= self.compact_size:
+                    try:
+                        await loop.run_in_executor(None, self._compact_written)
+                    except OSError as error:
+                        logger.error('Failed to compact order journal: %r', error)
+                        self._compacted_size = self._size
+            # Без новых записей flush ждал только уже завершенную запись
+            for future in flushed:
+                if not future.done():
+                    future.set_result(None)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._open()
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._write_loop())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        try:
+            await self.flush()
+        finally:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            assert self._fd is not None
+            os.close(self._fd)
+            self._fd = None
+
+    async def _reconcile(self, client: BinanceClient, ladder: JournalLadder) -> None:
+        for order in ladder.unacked:
+            try:
+                response = await client.query_order(ladder.symbol, order.client_order_id)
+            except BinanceHttpError as error:
+                if error.code != ORDER_DOES_NOT_EXIST:
+                    raise
+                order.error = NOT_SUBMITTED
+            else:
+                order.order_id = response.orderId
+            order.acked = True
+        ladder.completed = True
+
+    def _compact(self, ladders: Iterable[JournalLadder]) -> None:
+        """
+        Журнал перезаписывается атомарно: только незавершенные лесенки в виде плана и ack
+        """
+        temporary = f'{self.path}.tmp'
+        with open(temporary, 'wb') as file:
+            for ladder in ladders:
+                if ladder.completed:
+                    continue
+                file.write(orjson.dumps({'t': 'ladder', **ladder.dict(exclude={'completed'})}, default=str) + b'\n')
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, self.path)
+
+    async def recover(self, client: BinanceClient) -> List[JournalLadder]:
+        """
+        Сверка незавершенных лесенок с Binance после перезапуска, вызывается до start.
+        Ордера без ack ищутся по newClientOrderId: найденные считаются созданными, остальные -
+        не отправленными (NOT_SUBMITTED). Лесенки, которые не удалось сверить из-за ошибок
+        запросов, остаются в журнале до следующего запуска.
+        :return: сверенные лесенки
+        """
+        if self._task is not None:
+            raise RuntimeError('Order journal must be recovered before start')
+        ladders = load_journal(self.path)
+        recovered = []
+        for ladder in ladders.values():
+            if ladder.completed:
+                continue
+            try:
+                await self._reconcile(client, ladder)
+            except BINANCE_REQUEST_ERRORS as error:
+                logger.error('Failed to recover ladder %s: %r', ladder.ladder_id, error)
+                continue
+            recovered.append(ladder)
+            submitted = sum(1 for order in ladder.orders if order.error is None)
+            logger.warning(
+                'Recovered ladder %s %s: %s of %s orders were created',
+                ladder.ladder_id, ladder.symbol, submitted, len(ladder.orders),
+            )
+        await asyncio.get_running_loop().run_in_executor(None, self._compact, ladders.values())
+        return recovered
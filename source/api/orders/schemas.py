@@ -4,7 +4,7 @@ from typing import Dict, List, Optional
 import pydantic
 from pydantic import Field, root_validator
 
-from source.enums import OrderSide
+from source.enums import JobStatus, OrderSide, PriceDistribution
 
 
 class CreateOrderRequest(pydantic.BaseModel):
@@ -31,6 +31,18 @@ class CreateOrderRequest(pydantic.BaseModel):
             'Верхний диапазон цены, в пределах которого нужно случайным образом выбрать цену'
         ),
     )
+    priceDistribution: PriceDistribution = Field(
+        default=PriceDistribution.RANDOM,
+        description=(
+            'Распределение цен в диапазоне: RANDOM - независимые случайные цены, LINEAR - равный шаг, '
+            'GEOMETRIC - равный шаг в процентах, GAUSSIAN - гуще к середине диапазона, '
+            'WEIGHTED_RANDOM - случайные цены, гуще к рыночной стороне. Кроме RANDOM, все цены разные'
+        ),
+    )
+    seed: Optional[int] = Field(
+        default=None,
+        description='Seed генератора цен и разброса объемов: с одним seed лесенка повторяется',
+    )
 
     @root_validator
     def _root(cls, values: Dict) -> Dict:
@@ -44,12 +56,39 @@ class CreateOrderRequest(pydantic.BaseModel):
 
 
 class CreateOrderData(pydantic.BaseModel):
-    order_id: int
+    order_id: Optional[int]
+    client_order_id: Optional[str] = Field(description='newClientOrderId ордера в Binance')
     price: Decimal
-    transact_time: int
+    quantity: Optional[Decimal]
+    transact_time: Optional[int]
+    error: Optional[str] = Field(description='Ошибка, если ордер не был создан')
 
 
 class CreateOrderResponse(pydantic.BaseModel):
     success: bool
     error: Optional[str]
     orders: Optional[List[CreateOrderData]]
+
+
+class CreateOrderBatchRequest(pydantic.BaseModel):
+    requests: List[CreateOrderRequest] = Field(description='Запросы на создание лесенок', min_items=1)
+
+
+class CreateOrderBatchItem(CreateOrderResponse):
+    symbol: str
+
+
+class CreateOrderBatchResponse(pydantic.BaseModel):
+    success: bool
+    error: Optional[str]
+    results: Optional[List[CreateOrderBatchItem]] = Field(description='Результаты в порядке запросов')
+
+
+class OrderJobResponse(pydantic.BaseModel):
+    job_id: str = Field(description='id задания, он же префикс newClientOrderId ордеров')
+    status: JobStatus
+    total: int = Field(description='Сколько ордеров в лесенке')
+    completed: int = Field(description='Сколько ордеров уже обработано, включая ошибки')
+    failed: int = Field(description='Сколько ордеров не создано')
+    error: Optional[str]
+    orders: List[Optional[CreateOrderData]] = Field(description='Результаты в порядке цен, null - еще не обработан')
@@ -0,0 +1,87 @@
+import asyncio
+from typing import Awaitable, Callable, Optional
+
+from source.clients.binance.errors import BINANCE_REQUEST_ERRORS
+from source.clients.binance.schemas.market.schemas import ExchangeInfoResponse
+from source.logger import logger
+
+EXCHANGE_INFO_LOADER_TYPE = Callable[[], Awaitable[ExchangeInfoResponse]]
+
+# ValueError включает ValidationError, KeyError и TypeError - ответ не того формата при construct_trusted
+_REFRESH_ERRORS = (*BINANCE_REQUEST_ERRORS, KeyError, TypeError, ValueError)
+
+
+class ExchangeInfoCache:
+    """
+    Кэш exchangeInfo по всем символам.
+    Фильтры символов меняются редко, поэтому данные обновляются в фоне
+    каждые ttl / 2 секунд, а при неудачном обновлении отдаются устаревшие данные
+    """
+
+    def __init__(self, loader: EXCHANGE_INFO_LOADER_TYPE, ttl: float) -> None:
+        self._loader = loader
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._exchange_info: Optional[ExchangeInfoResponse] = None
+        self._updated_at: Optional[float] = None
+        self._refreshing: Optional[asyncio.Task] = None
+        self._refresh_loop_task: Optional[asyncio.Task] = None
+
+    @property
+    def is_stale(self) -> bool:
+        if self._updated_at is None:
+            return True
+        return asyncio.get_running_loop().time() - self._updated_at > self.ttl
+
+    async def _load(self) -> ExchangeInfoResponse:
+        exchange_info = await self._loader()
+        self._exchange_info = exchange_info
+        self._updated_at = asyncio.get_running_loop().time()
+        return exchange_info
+
+    async def refresh(self) -> ExchangeInfoResponse:
+        """
+        Загрузка exchangeInfo. Одновременные вызовы ждут один и тот же запрос
+        """
+        if self._refreshing is None or self._refreshing.done():
+            self._refreshing = asyncio.create_task(self._load())
+        return await asyncio.shield(self._refreshing)
+
+    async def get(self) -> ExchangeInfoResponse:
+        if self._exchange_info is not None and not self.is_stale:
+            self.hits += 1
+            return self._exchange_info
+        self.misses += 1
+        if self._exchange_info is None:
+            return await self.refresh()
+        try:
+            return await self.refresh()
+        except _REFRESH_ERRORS as error:
+            logger.warning('Failed to refresh exchange info, serving stale data: %r', error)
+            return self._exchange_info
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except _REFRESH_ERRORS as error:
+                logger.warning('Failed to refresh exchange info: %r', error)
+            await asyncio.sleep(self.ttl / 2)
+
+    def start(self) -> None:
+        """
+        Запуск фонового обновления, первая загрузка выполняется сразу
+        """
+        if self._refresh_loop_task is None:
+            self._refresh_loop_task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self) -> None:
+        for task in (self._refresh_loop_task, self._refreshing):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._refresh_loop_task = None
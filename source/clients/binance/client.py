@@ -1,21 +1,103 @@
-from typing import Any, Optional
+import asyncio
+import json
+from typing import Any, Iterable, List, Optional
 
-from source.clients.binance.connector import BinanceConnectorAbstract, DefaultBinanceConnector
-from source.clients.binance.schemas.market.schemas import ExchangeInfoResponse, LatestPriceResponse
-from source.clients.binance.schemas.order.schemas import NewOrderRequest, NewOrderResponse
+from source.clients.binance.cache import ExchangeInfoCache
+from source.clients.binance.clock import TIMESTAMP_OUTSIDE_RECV_WINDOW, server_clock
+from source.clients.binance.connector import (
+    RESPONSE_MODEL_TYPE,
+    BinanceConnectorAbstract,
+    DefaultBinanceConnector,
+    ResponseModel,
+)
+from source.clients.binance.errors import BINANCE_REQUEST_ERRORS, BinanceHttpError
+from source.clients.binance.market_data import MarketDataFeed
+from source.clients.binance.retry import RetryPolicy
+from source.clients.binance.schemas.market.schemas import (
+    ExchangeInfoResponse,
+    LatestPriceResponse,
+    ServerTimeResponse,
+    Symbol,
+)
+from source.clients.binance.schemas.order.schemas import (
+    NewOrderRequest,
+    NewOrderResponse,
+    QueryOrderRequest,
+    QueryOrderResponse,
+)
+from source.clients.binance.schemas.user_data.schemas import EmptyResponse, ListenKeyResponse
 from source.clients.binance.schemas.wallet.schemas import APITradingStatusResponse
-from source.clients.binance.signature import BaseSignature
+from source.clients.binance.signature import BaseSignature, Signer
+from source.config import config
+from source.logger import logger
+
+ORDER_DOES_NOT_EXIST = -2013
+NEW_ORDER_REJECTED = -2010
 
 
 class BinanceClient:
 
-    def __init__(self, connector: Optional[BinanceConnectorAbstract] = None, **kwargs: Any):
+    def __init__(
+            self,
+            connector: Optional[BinanceConnectorAbstract] = None,
+            exchange_info_ttl: Optional[float] = None,
+            market_data: Optional[MarketDataFeed] = None,
+            signer: Optional[Signer] = None,
+            clock_sync_interval: Optional[float] = None,
+            order_retry_policy: Optional[RetryPolicy] = None,
+            trusted_exchange_info: bool = False,
+            exchange_info_whitelist: Optional[Iterable[str]] = None,
+            **kwargs: Any,
+    ):
+        """
+        :param exchange_info_ttl: если задан, exchangeInfo по всем символам
+            кэшируется и обновляется в фоне, см. ExchangeInfoCache
+        :param market_data: если задан, последняя цена берется из WebSocket стримов,
+            а REST запрос делается только если данных нет или они устарели
+        :param signer: подпись запросов, по умолчанию Signer.from_config() по BINANCE_SIGNATURE_TYPE
+        :param clock_sync_interval: если задан, смещение часов сервера Binance (server_clock)
+            обновляется в фоне с этим интервалом, timestamp подписанных запросов считается по нему
+        :param order_retry_policy: повторы создания ордера с newClientOrderId, см. create_new_order
+        :param trusted_exchange_info: exchangeInfo по всем символам собирается без валидации pydantic,
+            см. ExchangeInfoResponse.construct_trusted
+        :param exchange_info_whitelist: если задан, в кэше exchangeInfo только эти символы, см. exchange_info
+        """
         self._connector = connector or DefaultBinanceConnector(**kwargs)
+        self._market_data = market_data
+        self._signer = signer
+        self._clock_sync_interval = clock_sync_interval
+        self._trusted_exchange_info = trusted_exchange_info
+        self._exchange_info_whitelist = list(exchange_info_whitelist) if exchange_info_whitelist else None
+        self._order_retry_policy = order_retry_policy or RetryPolicy(
+            max_attempts=config.BINANCE_ORDER_RETRY_ATTEMPTS,
+            base_delay=config.BINANCE_RETRY_BASE_DELAY,
+            max_delay=config.BINANCE_RETRY_MAX_DELAY,
+        )
+        self._exchange_info_cache: Optional[ExchangeInfoCache] = None
+        if exchange_info_ttl is not None:
+            self._exchange_info_cache = ExchangeInfoCache(self._load_exchange_info, exchange_info_ttl)
 
     async def __aenter__(self) -> 'BinanceClient':
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def start(self) -> None:
+        if self._clock_sync_interval is not None:
+            server_clock.start(self.get_server_time, self._clock_sync_interval)
+        if self._exchange_info_cache is not None:
+            self._exchange_info_cache.start()
+        if self._market_data is not None:
+            self._market_data.start()
+
+    async def close(self) -> None:
+        if self._market_data is not None:
+            await self._market_data.stop()
+        if self._exchange_info_cache is not None:
+            await self._exchange_info_cache.stop()
+        if self._clock_sync_interval is not None:
+            await server_clock.stop()
         await self._connector.close()
 
     @property
@@ -24,7 +106,65 @@ class BinanceClient:
             raise TypeError('Connector is not initialized')
         return self._connector
 
-    async def exchange_info(self, symbol: str) -> ExchangeInfoResponse:
+    @property
+    def signer(self) -> Signer:
+        return self._signer or Signer.from_config()
+
+    @property
+    def exchange_info_cache(self) -> Optional[ExchangeInfoCache]:
+        return self._exchange_info_cache
+
+    async def _load_exchange_info(self) -> ExchangeInfoResponse:
+        if self._exchange_info_whitelist is not None:
+            return await self._stream_exchange_info(self._exchange_info_whitelist)
+        return await self._connector.request(
+            path='/api/v3/exchangeInfo',
+            method='GET',
+            response_model=ExchangeInfoResponse,
+            trusted=self._trusted_exchange_info,
+        )
+
+    async def _stream_exchange_info(self, whitelist: Iterable[str]) -> ExchangeInfoResponse:
+        """
+        exchangeInfo по всем символам разбирается потоково, Symbol собираются только для whitelist
+        """
+        names = {name.upper() for name in whitelist}
+        items = await self._connector.request_items(
+            path='/api/v3/exchangeInfo',
+            method='GET',
+            prefix='symbols.item',
+            item_filter=lambda item: item.get('symbol') in names,
+        )
+        build = Symbol.construct_trusted if self._trusted_exchange_info else Symbol.parse_obj
+        return ExchangeInfoResponse.from_symbols([build(item) for item in items])
+
+    async def exchange_info(
+            self,
+            symbol: Optional[str] = None,
+            symbols: Optional[List[str]] = None,
+            whitelist: Optional[Iterable[str]] = None,
+    ) -> ExchangeInfoResponse:
+        """
+        При включенном кэше возвращается exchangeInfo по всем символам (или по exchange_info_whitelist),
+        нужный символ ищется через ExchangeInfoResponse.get_symbol.
+        symbols фильтрует символы на стороне Binance. whitelist загружает exchangeInfo целиком,
+        но разбирает его потоково и оставляет только эти символы
+        """
+        if self._exchange_info_cache is not None:
+            return await self._exchange_info_cache.get()
+        if whitelist:
+            return await self._stream_exchange_info(whitelist)
+        if symbols:
+            return await self._connector.request(
+                path='/api/v3/exchangeInfo',
+                method='GET',
+                params={
+                    'symbols': json.dumps([symbol.upper() for symbol in symbols], separators=(',', ':')),
+                },
+                response_model=ExchangeInfoResponse,
+            )
+        if symbol is None:
+            return await self._load_exchange_info()
         return await self._connector.request(
             path='/api/v3/exchangeInfo',
             method='GET',
@@ -34,26 +174,140 @@ class BinanceClient:
             response_model=ExchangeInfoResponse,
         )
 
+    async def get_server_time(self) -> ServerTimeResponse:
+        return await self._connector.request(
+            path='/api/v3/time',
+            method='GET',
+            response_model=ServerTimeResponse,
+        )
+
+    async def _signed_request(self, response_model: RESPONSE_MODEL_TYPE, **kwargs: Any) -> ResponseModel:
+        try:
+            return await self._connector.request(response_model=response_model, **kwargs)
+        except BinanceHttpError as error:
+            if error.code == TIMESTAMP_OUTSIDE_RECV_WINDOW:
+                # Часы разошлись с сервером, не ждем следующей плановой синхронизации
+                server_clock.request_sync()
+            raise
+
     async def get_api_trading_status(self, params: Optional[BaseSignature] = None) -> APITradingStatusResponse:
         params = params or BaseSignature()
-        params.sign()
-        return await self._connector.request(
+        params.sign(self.signer)
+        return await self._signed_request(
             path='/sapi/v1/account/apiTradingStatus',
             method='GET',
             params=params.dict(exclude_none=True),
             response_model=APITradingStatusResponse,
         )
 
-    async def create_new_order(self, request: NewOrderRequest) -> NewOrderResponse:
-        request.sign()
-        return await self._connector.request(
+    async def wait_order_limits(self) -> None:
+        """
+        Ожидание, пока ордер поместится в лимиты Binance, без резервирования
+        """
+        await self._connector.wait_limits(orders=1)
+
+    async def _send_order(self, request: NewOrderRequest) -> NewOrderResponse:
+        # Лимиты ждем до подписи, чтобы timestamp не устарел за время ожидания (см. recvWindow),
+        # резервирует их коннектор при отправке
+        await self.wait_order_limits()
+        return await self._signed_request(
             path='/api/v3/order',
             method='POST',
-            body=request.to_query(),
+            body=request.sign(self.signer),
             response_model=NewOrderResponse,
         )
 
+    async def query_order(self, symbol: str, client_order_id: str) -> QueryOrderResponse:
+        params = QueryOrderRequest(symbol=symbol, origClientOrderId=client_order_id)
+        params.sign(self.signer)
+        return await self._signed_request(
+            path='/api/v3/order',
+            method='GET',
+            params=params.dict(exclude_none=True),
+            response_model=QueryOrderResponse,
+        )
+
+    async def _find_order(self, symbol: str, client_order_id: str) -> Optional[NewOrderResponse]:
+        try:
+            order = await self.query_order(symbol, client_order_id)
+        except BinanceHttpError as error:
+            if error.code == ORDER_DOES_NOT_EXIST:
+                return None
+            raise
+        return order.to_new_order_response()
+
+    async def create_new_order(self, request: NewOrderRequest) -> NewOrderResponse:
+        """
+        Ордер без newClientOrderId отправляется один раз.
+        После временной ошибки (см. RetryPolicy) неизвестно, создан ли ордер, поэтому перед повтором
+        ордер ищется по newClientOrderId через GET /api/v3/order и отправляется заново, только если его нет
+        """
+        client_order_id = request.newClientOrderId
+        if client_order_id is None:
+            return await self._send_order(request)
+        delays = self._order_retry_policy.delays()
+        retried = False
+        while True:
+            try:
+                return await self._send_order(request)
+            except BINANCE_REQUEST_ERRORS as error:
+                if retried and isinstance(error, BinanceHttpError) and error.code == NEW_ORDER_REJECTED:
+                    # Duplicate order sent: ордер с этим newClientOrderId появился после нашей проверки
+                    order = await self._find_order(request.symbol, client_order_id)
+                    if order is not None:
+                        return order
+                delay = next(delays, None)
+                if delay is None or not self._order_retry_policy.is_retryable(error):
+                    raise
+                logger.warning(
+                    'Retry order %s in %.3fs after error: %r', client_order_id, delay, error,
+                    extra={'client_order_id': client_order_id},
+                )
+                await asyncio.sleep(delay)
+            order = await self._find_order(request.symbol, client_order_id)
+            if order is not None:
+                return order
+            retried = True
+            # Подпись с новым timestamp, старый мог выйти за recvWindow
+            request = request.copy(update={'timestamp': server_clock.timestamp(), 'signature': None})
+
+    async def create_listen_key(self) -> ListenKeyResponse:
+        """
+        listenKey для user data stream, действует 60 минут после последнего keepalive
+        """
+        return await self._connector.request(
+            path='/api/v3/userDataStream',
+            method='POST',
+            response_model=ListenKeyResponse,
+        )
+
+    async def keepalive_listen_key(self, listen_key: str) -> EmptyResponse:
+        return await self._connector.request(
+            path='/api/v3/userDataStream',
+            method='PUT',
+            params={
+                'listenKey': listen_key,
+            },
+            response_model=EmptyResponse,
+        )
+
+    async def close_listen_key(self, listen_key: str) -> EmptyResponse:
+        return await self._connector.request(
+            path='/api/v3/userDataStream',
+            method='DELETE',
+            params={
+                'listenKey': listen_key,
+            },
+            response_model=EmptyResponse,
+        )
+
     async def get_latest_price(self, symbol: str) -> LatestPriceResponse:
+        if self._market_data is not None:
+            price = self._market_data.get_price(symbol)
+            if price is not None:
+                return LatestPriceResponse(symbol=symbol.upper(), price=price)
+            # Подписываемся, чтобы следующие запросы по символу обслуживались из стрима
+            self._market_data.subscribe(symbol)
         return await self._connector.request(
             path='/api/v3/ticker/price',
             method='GET',
@@ -0,0 +1,104 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+from pydantic import ValidationError
+
+from source.clients.binance.errors import BINANCE_REQUEST_ERRORS
+from source.clients.binance.schemas.market.schemas import ServerTimeResponse
+from source.config import config
+from source.logger import logger
+
+SERVER_TIME_LOADER_TYPE = Callable[[], Awaitable[ServerTimeResponse]]
+
+# Timestamp for this request is outside of the recvWindow / ahead of the server's time
+TIMESTAMP_OUTSIDE_RECV_WINDOW = -1021
+
+_SYNC_ERRORS = (*BINANCE_REQUEST_ERRORS, ValidationError)
+
+
+def _now_ms() -> float:
+    return time.time() * 1000
+
+
+class ServerClock:
+    """
+    Смещение часов сервера Binance относительно локальных, в миллисекундах.
+
+    Оценка как в NTP: для запроса /api/v3/time, отправленного в t0 и полученного в t1,
+    offset = serverTime - (t0 + t1) / 2, rtt = t1 - t0. Из нескольких замеров берется
+    замер с минимальным rtt, у него меньше всего погрешность (не больше rtt / 2).
+    offset и rtt последней синхронизации доступны как метрики
+    """
+
+    def __init__(self, samples: int = 5) -> None:
+        self.samples = samples
+        self.offset: float = 0
+        self.rtt: Optional[float] = None
+        self.synced_at: Optional[float] = None
+        self._sync_requested = asyncio.Event()
+        self._sync_loop_task: Optional[asyncio.Task] = None
+
+    def timestamp(self) -> int:
+        """
+        Текущее время сервера Binance в миллисекундах
+        """
+        return int(_now_ms() + self.offset)
+
+    @staticmethod
+    async def _sample(loader: SERVER_TIME_LOADER_TYPE) -> Tuple[float, float]:
+        sent_at = _now_ms()
+        response = await loader()
+        received_at = _now_ms()
+        return response.serverTime - (sent_at + received_at) / 2, received_at - sent_at
+
+    async def sync(self, loader: SERVER_TIME_LOADER_TYPE) -> float:
+        """
+        Замеры делаются последовательно, чтобы они не мешали друг другу
+        """
+        samples: List[Tuple[float, float]] = []
+        for _ in range(self.samples):
+            samples.append(await self._sample(loader))
+        self.offset, self.rtt = min(samples, key=lambda sample: sample[1])
+        self.synced_at = time.monotonic()
+        logger.info('Binance server time offset %.1fms, rtt %.1fms', self.offset, self.rtt)
+        return self.offset
+
+    def request_sync(self) -> None:
+        """
+        Внеочередная синхронизация, например после ошибки -1021
+        """
+        self._sync_requested.set()
+
+    async def _sync_loop(self, loader: SERVER_TIME_LOADER_TYPE, interval: float) -> None:
+        while True:
+            self._sync_requested.clear()
+            try:
+                await self.sync(loader)
+            except _SYNC_ERRORS as error:
+                logger.warning('Failed to sync Binance server time: %r', error)
+            try:
+                await asyncio.wait_for(self._sync_requested.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self, loader: SERVER_TIME_LOADER_TYPE, interval: float) -> None:
+        """
+        Запуск фоновой синхронизации, первая выполняется сразу
+        """
+        if self._sync_loop_task is None:
+            self._sync_requested = asyncio.Event()
+            self._sync_loop_task = asyncio.create_task(self._sync_loop(loader, interval))
+
+    async def stop(self) -> None:
+        task = self._sync_loop_task
+        self._sync_loop_task = None
+        if task is not None and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+
+server_clock = ServerClock(samples=config.BINANCE_CLOCK_SYNC_SAMPLES)
@@ -1,19 +1,66 @@
 import abc
+import time
 from http import HTTPStatus
-from typing import Any, Dict, Literal, Optional, Type, TypeVar
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Literal, Optional, Type, TypeVar, cast
 
 import aiohttp
+import ijson
+import orjson
 from pydantic import BaseModel
 
-from source.clients.binance.errors import BinanceHttpError
+from source.clients.binance.errors import BINANCE_REQUEST_ERRORS, BinanceHttpError
+from source.clients.binance.rate_limits import REQUEST_WEIGHTS, RateLimitGovernor, rate_limit_governor
+from source.clients.binance.retry import RetryPolicy
+from source.clients.binance.schemas.base import TrustedModel
 from source.config import config
+from source.metrics import BINANCE_ERRORS, BINANCE_REQUEST_SECONDS, BINANCE_RESPONSE_BYTES, error_label
+from source.tracing import tracing
+
+if TYPE_CHECKING:
+    from opentelemetry.trace import Span
 
 ResponseModel = TypeVar('ResponseModel', bound=BaseModel)
 
-HTTP_METHOD_TYPE = Literal['GET', 'POST', 'PUT']
+HTTP_METHOD_TYPE = Literal['GET', 'POST', 'PUT', 'DELETE']
 RESPONSE_MODEL_TYPE = Type[ResponseModel]
 PARAMS_TYPE = Optional[Dict[str, Any]]
 BODY_TYPE = Optional[str]
+JSON_LOADS_TYPE = Callable[[bytes], Any]
+ITEM_FILTER_TYPE = Callable[[Dict[str, Any]], bool]
+
+
+class _RawResponse(BaseModel):
+    """
+    Ответ Binance как есть, без разбора в модель, см. BinanceConnectorAbstract.request_items
+    """
+    __root__: Any
+
+
+def _select_items(data: Any, prefix: str) -> List[Any]:
+    """
+    Значения по пути prefix в формате ijson: ключи через точку, item - элементы массива
+    """
+    values = [data]
+    for key in prefix.split('.'):
+        if key == 'item':
+            values = [item for value in values for item in value]
+        else:
+            values = [value[key] for value in values]
+    return values
+
+
+def _trace_request(span: 'Span', path: str, method: str, started_at: float) -> None:
+    """
+    Атрибуты span запроса: URL без query, в котором подпись, и ожидание лимитов Binance
+    """
+    span.set_attribute('http.method', method)
+    span.set_attribute('http.url', config.get_binance_api(path))
+    span.set_attribute('binance.rate_limit_wait_ms', (time.perf_counter() - started_at) * 1000)
+
+
+def _trace_response(span: 'Span', status: int, size: int) -> None:
+    span.set_attribute('http.status_code', status)
+    span.set_attribute('http.response_content_length', size)
 
 
 class BinanceConnectorAbstract(abc.ABC):
@@ -30,17 +77,69 @@ class BinanceConnectorAbstract(abc.ABC):
             response_model: RESPONSE_MODEL_TYPE,
             body: BODY_TYPE = None,
             params: PARAMS_TYPE = None,
+            trusted: bool = False,
             **kwargs: Any,
     ) -> ResponseModel:
-        ...
+        """
+        :param trusted: разобрать ответ без валидации, см. TrustedModel
+        """
+
+    async def wait_limits(self, weight: int = 1, orders: int = 0) -> None:
+        """
+        Ожидание лимитов Binance без резервирования, см. BinanceClient._send_order.
+        По умолчанию коннектор лимиты не учитывает
+        """
+
+    async def request_items(
+            self,
+            path: str,
+            method: HTTP_METHOD_TYPE,
+            prefix: str,
+            item_filter: ITEM_FILTER_TYPE,
+            params: PARAMS_TYPE = None,
+            **kwargs: Any,
+    ) -> List[Dict[str, Any]]:
+        """
+        Из массива по пути prefix (в формате ijson, например 'symbols.item') возвращаются только
+        элементы, для которых item_filter вернул True. По умолчанию ответ целиком получается
+        через request, DefaultBinanceConnector разбирает его потоково
+        """
+        response: _RawResponse = await self.request(path, method, _RawResponse, params=params, **kwargs)
+        return [item for item in _select_items(response.__root__, prefix) if item_filter(item)]
 
 
 class DefaultBinanceConnector(BinanceConnectorAbstract):
 
-    def __init__(self, **aiohttp_kwargs):
+    def __init__(
+            self,
+            governor: Optional[RateLimitGovernor] = None,
+            get_retry_policy: Optional[RetryPolicy] = None,
+            json_loads: JSON_LOADS_TYPE = orjson.loads,
+            **aiohttp_kwargs: Any,
+    ) -> None:
+        """
+        :param governor: учет лимитов Binance, по умолчанию общий для процесса rate_limit_governor
+        :param get_retry_policy: повторы GET запросов, по умолчанию по настройкам из config.
+            POST запросы коннектор не повторяет, повтор создания ордера см. BinanceClient.create_new_order
+        :param json_loads: разбор тела ответа из bytes, по умолчанию orjson
+        """
         self._aiohttp_kwargs = aiohttp_kwargs
+        self._governor = governor or rate_limit_governor
+        self._json_loads = json_loads
+        self._get_retry_policy = get_retry_policy or RetryPolicy(
+            max_attempts=config.BINANCE_GET_RETRY_ATTEMPTS,
+            base_delay=config.BINANCE_RETRY_BASE_DELAY,
+            max_delay=config.BINANCE_RETRY_MAX_DELAY,
+        )
         self._session: Optional[aiohttp.ClientSession] = None
 
+    @property
+    def governor(self) -> RateLimitGovernor:
+        return self._governor
+
+    async def wait_limits(self, weight: int = 1, orders: int = 0) -> None:
+        await self._governor.wait(weight=weight, orders=orders)
+
     async def close(self) -> None:
         if self._session and not self._session.closed:
             await self._session.close()
@@ -55,7 +154,16 @@ class DefaultBinanceConnector(BinanceConnectorAbstract):
                 total=config.BINANCE_API_TIMEOUT,
             )
         if 'connector' not in kwargs:
-            kwargs['connector'] = aiohttp.TCPConnector(ssl=False)
+            # Сессия живет все время работы приложения, поэтому держим пул
+            # keep-alive соединений и кэш DNS, чтобы не делать TCP+TLS handshake на каждый запрос
+            kwargs['connector'] = aiohttp.TCPConnector(
+                ssl=False,
+                limit=config.BINANCE_CONNECTION_LIMIT,
+                limit_per_host=config.BINANCE_CONNECTION_LIMIT_PER_HOST,
+                keepalive_timeout=config.BINANCE_KEEPALIVE_TIMEOUT,
+                ttl_dns_cache=config.BINANCE_DNS_CACHE_TTL,
+                use_dns_cache=True,
+            )
         return aiohttp.ClientSession(**kwargs)
 
     async def request(
@@ -65,26 +173,164 @@ class DefaultBinanceConnector(BinanceConnectorAbstract):
             response_model: RESPONSE_MODEL_TYPE,
             body: BODY_TYPE = None,
             params: PARAMS_TYPE = None,
+            trusted: bool = False,
             **kwargs: Any,
     ) -> ResponseModel:
         """
         Send request to Binance API.
         """
+        if method == 'GET':
+            return await self._get_retry_policy.call(
+                lambda: self._send(path, method, response_model, body, params, trusted, **kwargs),
+            )
+        return await self._send(path, method, response_model, body, params, trusted, **kwargs)
+
+    async def _send(
+            self,
+            path: str,
+            method: HTTP_METHOD_TYPE,
+            response_model: RESPONSE_MODEL_TYPE,
+            body: BODY_TYPE = None,
+            params: PARAMS_TYPE = None,
+            trusted: bool = False,
+            **kwargs: Any,
+    ) -> ResponseModel:
         if self._session is None:
             self._session = self._create_session()
-        response = await self._session.request(
-            url=config.get_binance_api(path),
-            method=method,
-            params=params,
-            data=body,
-            headers={
-                'X-MBX-APIKEY': config.BINANCE_API_KEY,
-            },
-            **kwargs,
-        )
-        if response.status in (HTTPStatus.NOT_FOUND, HTTPStatus.TOO_MANY_REQUESTS):
+        orders = 1 if method == 'POST' and path == '/api/v3/order' else 0
+        started_at = time.perf_counter()
+        status = 'error'
+        with tracing.span(f'binance {method} {path}', kind='client') as span:
+            try:
+                await self._governor.acquire(weight=REQUEST_WEIGHTS.get(path, 1), orders=orders)
+                if span is not None:
+                    _trace_request(span, path, method, started_at)
+                response = await self._session.request(
+                    url=config.get_binance_api(path),
+                    method=method,
+                    params=params,
+                    data=body,
+                    headers={
+                        'X-MBX-APIKEY': config.BINANCE_API_KEY,
+                    },
+                    **kwargs,
+                )
+                status = str(response.status)
+                self._governor.update(response.status, response.headers)
+                if response.status in (HTTPStatus.NOT_FOUND, HTTPStatus.TOO_MANY_REQUESTS, HTTPStatus.IM_A_TEAPOT):
+                    response.raise_for_status()
+                data = await response.read()
+                BINANCE_RESPONSE_BYTES.labels(path).observe(len(data))
+                if span is not None:
+                    _trace_response(span, response.status, len(data))
+                content = self._decode(response, data)
+                if not response.ok:
+                    raise BinanceHttpError(**content, status=response.status)
+            except BINANCE_REQUEST_ERRORS as error:
+                BINANCE_ERRORS.labels(path, error_label(error)).inc()
+                if span is not None:
+                    span.set_attribute('binance.error', error_label(error))
+                raise
+            finally:
+                BINANCE_REQUEST_SECONDS.labels(path, method, status).observe(time.perf_counter() - started_at)
+        if trusted:
+            if not issubclass(response_model, TrustedModel):
+                raise TypeError(f'{response_model.__name__} does not support trusted parsing')
+            return cast(ResponseModel, response_model.construct_trusted(content))
+        return response_model.parse_obj(content)
+
+    async def request_items(
+            self,
+            path: str,
+            method: HTTP_METHOD_TYPE,
+            prefix: str,
+            item_filter: ITEM_FILTER_TYPE,
+            params: PARAMS_TYPE = None,
+            **kwargs: Any,
+    ) -> List[Dict[str, Any]]:
+        if method == 'GET':
+            return await self._get_retry_policy.call(
+                lambda: self._send_items(path, method, prefix, item_filter, params, **kwargs),
+            )
+        return await self._send_items(path, method, prefix, item_filter, params, **kwargs)
+
+    async def _send_items(
+            self,
+            path: str,
+            method: HTTP_METHOD_TYPE,
+            prefix: str,
+            item_filter: ITEM_FILTER_TYPE,
+            params: PARAMS_TYPE = None,
+            **kwargs: Any,
+    ) -> List[Dict[str, Any]]:
+        """
+        Тело ответа не читается целиком: ijson разбирает его по мере получения,
+        в памяти одновременно только текущий элемент и отобранные
+        """
+        if self._session is None:
+            self._session = self._create_session()
+        started_at = time.perf_counter()
+        status = 'error'
+        with tracing.span(f'binance {method} {path}', kind='client') as span:
+            try:
+                await self._governor.acquire(weight=REQUEST_WEIGHTS.get(path, 1))
+                if span is not None:
+                    _trace_request(span, path, method, started_at)
+                async with self._session.request(
+                    url=config.get_binance_api(path),
+                    method=method,
+                    params=params,
+                    headers={
+                        'X-MBX-APIKEY': config.BINANCE_API_KEY,
+                    },
+                    **kwargs,
+                ) as response:
+                    status = str(response.status)
+                    items = await self._read_items(response, prefix, item_filter)
+                    if span is not None:
+                        _trace_response(span, response.status, response.content.total_bytes)
+                    return items
+            except BINANCE_REQUEST_ERRORS as error:
+                BINANCE_ERRORS.labels(path, error_label(error)).inc()
+                if span is not None:
+                    span.set_attribute('binance.error', error_label(error))
+                raise
+            finally:
+                BINANCE_REQUEST_SECONDS.labels(path, method, status).observe(time.perf_counter() - started_at)
+
+    async def _read_items(
+            self,
+            response: aiohttp.ClientResponse,
+            prefix: str,
+            item_filter: ITEM_FILTER_TYPE,
+    ) -> List[Dict[str, Any]]:
+        self._governor.update(response.status, response.headers)
+        if response.status in (HTTPStatus.NOT_FOUND, HTTPStatus.TOO_MANY_REQUESTS, HTTPStatus.IM_A_TEAPOT):
             response.raise_for_status()
-        content = await response.json()
         if not response.ok:
-            raise BinanceHttpError(**content)
-        return response_model.parse_obj(content)
+            raise BinanceHttpError(**self._decode(response, await response.read()), status=response.status)
+        try:
+            items = [item async for item in ijson.items(response.content, prefix) if item_filter(item)]
+        except ijson.JSONError:
+            raise self._not_json_error(response)
+        BINANCE_RESPONSE_BYTES.labels(response.url.path).observe(response.content.total_bytes)
+        return items
+
+    def _decode(self, response: aiohttp.ClientResponse, data: bytes) -> Any:
+        try:
+            return self._json_loads(data)
+        except ValueError:
+            raise self._not_json_error(response)
+
+    @staticmethod
+    def _not_json_error(response: aiohttp.ClientResponse) -> aiohttp.ContentTypeError:
+        """
+        Как response.json(): не JSON ответ (например HTML 502 от балансировщика) - ClientResponseError
+        """
+        return aiohttp.ContentTypeError(
+            response.request_info,
+            response.history,
+            status=response.status,
+            message=f'Attempt to decode JSON with unexpected mimetype: {response.content_type}',
+            headers=response.headers,
+        )
@@ -1,8 +1,33 @@
+import asyncio
+from typing import Any, Optional
+
+import aiohttp
+
+
 class BinanceHttpError(Exception):
 
-    def __init__(self, code: int, msg: str) -> None:
+    def __init__(self, code: int, msg: str, status: Optional[int] = None) -> None:
+        super().__init__(code, msg)
         self.code = code
         self.msg = msg
+        self.status = status
 
     def __str__(self) -> str:
         return f'<Binance status={self.code} msg={self.msg}>'
+
+
+class OrderNotFilledError(Exception):
+    """
+    Ордер завершился без полного исполнения: отменен, отклонен или истек
+    """
+
+    def __init__(self, order: Any) -> None:
+        super().__init__(order)
+        self.order = order
+
+    def __str__(self) -> str:
+        return f'<Order {self.order.client_order_id} status={self.order.status}>'
+
+
+# Ошибки одного запроса к Binance: ответ с ошибкой, сетевая ошибка или таймаут
+BINANCE_REQUEST_ERRORS = (BinanceHttpError, aiohttp.ClientError, asyncio.TimeoutError)
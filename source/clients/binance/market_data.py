@@ -0,0 +1,144 @@
+import asyncio
+import json
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Set
+
+from websockets.client import WebSocketClientProtocol, connect
+from websockets.exceptions import WebSocketException
+
+from source.clients.binance.schemas.market.schemas import MarketPrice
+from source.logger import logger
+
+# https://binance-docs.github.io/apidocs/spot/en/#websocket-market-streams
+MARKET_DATA_STREAMS = ('miniTicker', 'bookTicker', 'avgPrice')
+
+# Ошибки разбора одного сообщения: не JSON, неожиданная структура или не число в цене.
+# Такое сообщение пропускается, стрим продолжает работать
+MESSAGE_ERRORS = (ValueError, LookupError, TypeError, AttributeError, ArithmeticError)
+
+
+class MarketDataFeed:
+    """
+    Последние цены по символам из WebSocket стримов Binance
+    @miniTicker (цена последней сделки), @bookTicker (лучшие bid/ask) и @avgPrice.
+    Подключение восстанавливается само с экспоненциальной задержкой,
+    после переподключения подписки отправляются заново
+    """
+
+    def __init__(
+            self,
+            url: str,
+            symbols: Iterable[str] = (),
+            stale_after: float = 5,
+            reconnect_delay: float = 1,
+            max_reconnect_delay: float = 30,
+    ) -> None:
+        self.url = url.rstrip('/')
+        self.stale_after = stale_after
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self._symbols: Set[str] = {symbol.lower() for symbol in symbols}
+        self._prices: Dict[str, MarketPrice] = {}
+        self._websocket: Optional[WebSocketClientProtocol] = None
+        self._task: Optional[asyncio.Task] = None
+        # Ссылки на фоновые подписки, иначе задачу может собрать GC до завершения
+        self._subscribe_tasks: Set[asyncio.Task] = set()
+        self._request_id = 0
+
+    @property
+    def connected(self) -> bool:
+        return self._websocket is not None
+
+    @property
+    def symbols(self) -> Set[str]:
+        return set(self._symbols)
+
+    def get(self, symbol: str) -> Optional[MarketPrice]:
+        return self._prices.get(symbol.upper())
+
+    def get_price(self, symbol: str) -> Optional[Decimal]:
+        """
+        Цена последней сделки, если она обновлялась не раньше stale_after секунд назад
+        """
+        market_price = self.get(symbol)
+        if market_price is None or market_price.price is None:
+            return None
+        if asyncio.get_running_loop().time() - market_price.updated_at > self.stale_after:
+            return None
+        return market_price.price
+
+    def subscribe(self, symbol: str) -> None:
+        symbol = symbol.lower()
+        if symbol in self._symbols:
+            return
+        self._symbols.add(symbol)
+        if self._websocket is not None:
+            task = asyncio.create_task(self._send_subscribe(self._websocket, [symbol]))
+            self._subscribe_tasks.add(task)
+            task.add_done_callback(self._subscribe_tasks.discard)
+
+    async def _send_subscribe(self, websocket: WebSocketClientProtocol, symbols: List[str]) -> None:
+        self._request_id += 1
+        try:
+            await websocket.send(json.dumps({
+                'method': 'SUBSCRIBE',
+                'params': [f'{symbol}@{stream}' for symbol in symbols for stream in MARKET_DATA_STREAMS],
+                'id': self._request_id,
+            }))
+        except WebSocketException as error:
+            # Подписка будет отправлена заново после переподключения
+            logger.warning('Failed to subscribe market data streams: %r', error)
+
+    def _handle_message(self, message: str) -> None:
+        payload = json.loads(message)
+        data = payload.get('data')
+        if not isinstance(data, dict) or 's' not in data:
+            return  # Ответ на SUBSCRIBE
+        stream = payload['stream'].split('@', 1)[1]
+        market_price = self._prices.setdefault(data['s'], MarketPrice(symbol=data['s']))
+        if stream == 'miniTicker':
+            market_price.price = Decimal(data['c']).quantize(Decimal('0.000000'))
+        elif stream == 'bookTicker':
+            market_price.bid = Decimal(data['b']).quantize(Decimal('0.000000'))
+            market_price.ask = Decimal(data['a']).quantize(Decimal('0.000000'))
+        elif stream == 'avgPrice':
+            market_price.avg_price = Decimal(data['w']).quantize(Decimal('0.000000'))
+        else:
+            return
+        market_price.updated_at = asyncio.get_running_loop().time()
+
+    async def _run(self) -> None:
+        delay = self.reconnect_delay
+        while True:
+            try:
+                async with connect(f'{self.url}/stream') as websocket:
+                    self._websocket = websocket
+                    delay = self.reconnect_delay
+                    if self._symbols:
+                        await self._send_subscribe(websocket, sorted(self._symbols))
+                    async for message in websocket:
+                        try:
+                            self._handle_message(message)  # type:ignore
+                        except MESSAGE_ERRORS as error:
+                            logger.warning('Skipped invalid market data message %.200r: %r', message, error)
+            except (OSError, asyncio.TimeoutError, WebSocketException) as error:
+                logger.warning('Market data stream disconnected: %r', error)
+            finally:
+                self._websocket = None
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_reconnect_delay)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        for task in list(self._subscribe_tasks):
+            task.cancel()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
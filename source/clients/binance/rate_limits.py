@@ -0,0 +1,207 @@
+import asyncio
+from typing import Callable, Dict, Mapping, Optional
+
+from source.clients.binance.clock import server_clock
+from source.config import config
+
+# Вес запросов, https://binance-docs.github.io/apidocs/spot/en/#limits
+REQUEST_WEIGHTS = {
+    '/api/v3/exchangeInfo': 20,
+    '/api/v3/ticker/price': 2,
+}
+
+
+class TokenBucket:
+    """
+    Token bucket: capacity токенов, которые равномерно восполняются за period секунд.
+    Между проверкой delay и consume нет await, поэтому блокировка
+    в пределах одного event loop не нужна
+    """
+
+    def __init__(self, capacity: int, period: float, clock: Optional[Callable[[], float]] = None) -> None:
+        """
+        :param clock: текущее время в секундах, по умолчанию loop.time()
+        """
+        self.capacity = capacity
+        self.period = period
+        self._clock = clock or (lambda: asyncio.get_running_loop().time())
+        self._tokens = float(capacity)
+        self._updated_at: Optional[float] = None
+
+    @property
+    def rate(self) -> float:
+        return self.capacity / self.period
+
+    def _refill(self, now: float) -> None:
+        if self._updated_at is not None:
+            # Если clock пошел назад, считаем, что время не прошло
+            elapsed = max(0.0, now - self._updated_at)
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+        self._updated_at = now
+
+    def delay(self, tokens: int = 1) -> float:
+        """
+        Сколько секунд нужно подождать, чтобы в бакете оказалось tokens токенов
+        """
+        self._refill(self._clock())
+        if self._tokens >= tokens:
+            return 0.0
+        return (tokens - self._tokens) / self.rate
+
+    def consume(self, tokens: int = 1) -> None:
+        self._tokens -= tokens
+
+    async def acquire(self, tokens: int = 1) -> None:
+        if tokens > self.capacity:
+            raise ValueError(f'Cannot acquire {tokens} tokens from bucket with capacity {self.capacity}')
+        while delay := self.delay(tokens):
+            await asyncio.sleep(delay)
+        self.consume(tokens)
+
+
+class FixedWindow:
+    """
+    Лимит Binance на интервал: счетчик обнуляется в начале каждого интервала
+    (минуты, 10 секунд, дня) по времени сервера
+    """
+
+    def __init__(self, limit: int, period: float) -> None:
+        self.limit = limit
+        self.period = period
+        self.used = 0
+        self._window = 0
+
+    def _roll(self, now: float) -> None:
+        window = int(now // self.period)
+        if window != self._window:
+            self._window = window
+            self.used = 0
+
+    def delay(self, now: float, amount: int) -> float:
+        """
+        Сколько секунд ждать начала следующего интервала, если amount не помещается в текущий
+        """
+        self._roll(now)
+        if self.used + amount <= self.limit:
+            return 0.0
+        return (self._window + 1) * self.period - now
+
+    def add(self, now: float, amount: int) -> None:
+        self._roll(now)
+        self.used += amount
+
+    def update(self, now: float, used: int) -> None:
+        """
+        Значение из заголовка ответа учитывает запросы других процессов с того же IP,
+        а локальное - запросы, ответ на которые еще не пришел, поэтому берем большее
+        """
+        self._roll(now)
+        self.used = max(self.used, used)
+
+
+class RateLimitGovernor:
+    """
+    Модель оставшихся лимитов Binance по заголовкам ответов
+    X-MBX-USED-WEIGHT-1M, X-MBX-ORDER-COUNT-10S, X-MBX-ORDER-COUNT-1D.
+    Запрос ждет, пока его вес и количество ордеров не поместятся в текущие интервалы,
+    после 429 / 418 все запросы ждут Retry-After. Один экземпляр на процесс, см. rate_limit_governor.
+    Ордера, кроме того, проходят через token bucket order_pacing на orders_per_10s ордеров
+    за 10 секунд: так лимит не выбирается пачкой в начале интервала, а ордера идут равномерно.
+
+    Счетчики для метрик: requests, throttled (запросы, которые ждали лимит),
+    throttled_seconds, rate_limited (ответы 429), banned (ответы 418)
+    """
+
+    def __init__(
+            self,
+            request_weight_per_1m: int,
+            orders_per_10s: int,
+            orders_per_day: int,
+            clock: Optional[Callable[[], float]] = None,
+    ) -> None:
+        """
+        :param clock: текущее время сервера Binance в секундах, по умолчанию по server_clock
+            (order_pacing по умолчанию считает время по loop.time())
+        """
+        self.request_weight = FixedWindow(request_weight_per_1m, 60)
+        self.orders_10s = FixedWindow(orders_per_10s, 10)
+        self.orders_day = FixedWindow(orders_per_day, 24 * 60 * 60)
+        self._clock = clock or (lambda: server_clock.timestamp() / 1000)
+        # Равномерность темпа не привязана к интервалам Binance, поэтому по умолчанию по loop.time()
+        self.order_pacing = TokenBucket(orders_per_10s, 10, clock=clock)
+        # loop.time(), до которого ждем после Retry-After, не зависит от перевода часов
+        self.blocked_until = 0.0
+        self.requests = 0
+        self.throttled = 0
+        self.throttled_seconds = 0.0
+        self.rate_limited = 0
+        self.banned = 0
+
+    def _windows(self, weight: int, orders: int) -> Dict[FixedWindow, int]:
+        windows = {self.request_weight: weight}
+        if orders:
+            windows.update({self.orders_10s: orders, self.orders_day: orders})
+        return windows
+
+    def delay(self, weight: int = 1, orders: int = 0) -> float:
+        now = self._clock()
+        return max(
+            self.blocked_until - asyncio.get_running_loop().time(),
+            self.order_pacing.delay(orders) if orders else 0.0,
+            *(window.delay(now, amount) for window, amount in self._windows(weight, orders).items()),
+        )
+
+    async def wait(self, weight: int = 1, orders: int = 0) -> None:
+        """
+        Ожидание, пока вес и ордера не поместятся в лимиты, без резервирования.
+        Подписанный запрос ждет лимиты до подписи, чтобы timestamp не устарел за время ожидания
+        (см. recvWindow), а резервирует их уже acquire при отправке
+        """
+        delay = self.delay(weight, orders)
+        if delay > 0:
+            self.throttled += 1
+        while delay > 0:
+            self.throttled_seconds += delay
+            await asyncio.sleep(delay)
+            delay = self.delay(weight, orders)
+
+    async def acquire(self, weight: int = 1, orders: int = 0) -> None:
+        """
+        Между последней проверкой delay и резервированием нет await,
+        поэтому одновременные запросы не займут один и тот же остаток лимита
+        """
+        windows = self._windows(weight, orders)
+        for window, amount in windows.items():
+            if amount > window.limit:
+                raise ValueError(f'Cannot acquire {amount} from limit {window.limit}')
+        self.requests += 1
+        await self.wait(weight, orders)
+        now = self._clock()
+        for window, amount in windows.items():
+            window.add(now, amount)
+        if orders:
+            self.order_pacing.consume(orders)
+
+    def update(self, status: int, headers: Mapping[str, str]) -> None:
+        now = self._clock()
+        for header, window in (
+                ('X-MBX-USED-WEIGHT-1M', self.request_weight),
+                ('X-MBX-ORDER-COUNT-10S', self.orders_10s),
+                ('X-MBX-ORDER-COUNT-1D', self.orders_day),
+        ):
+            if header in headers:
+                window.update(now, int(headers[header]))
+        if status == 429:
+            self.rate_limited += 1
+        elif status == 418:
+            self.banned += 1
+        if 'Retry-After' in headers:
+            blocked_until = asyncio.get_running_loop().time() + float(headers['Retry-After'])
+            self.blocked_until = max(self.blocked_until, blocked_until)
+
+
+rate_limit_governor = RateLimitGovernor(
+    request_weight_per_1m=config.BINANCE_REQUEST_WEIGHT_PER_1M,
+    orders_per_10s=config.BINANCE_ORDERS_PER_10S,
+    orders_per_day=config.BINANCE_ORDERS_PER_DAY,
+)
@@ -0,0 +1,72 @@
+import asyncio
+import random
+from typing import Awaitable, Callable, FrozenSet, Iterator, Optional, TypeVar
+
+import aiohttp
+
+from source.clients.binance.errors import BINANCE_REQUEST_ERRORS, BinanceHttpError
+from source.logger import logger
+
+T = TypeVar('T')
+
+# 5xx Binance: запрос мог не дойти до matching engine или статус его выполнения неизвестен
+RETRY_STATUSES = frozenset({500, 502, 503, 504})
+
+
+class RetryPolicy:
+    """
+    Повтор запросов при временных ошибках: обрыв соединения, таймаут, статус из retry_statuses.
+    Задержки между попытками - decorrelated jitter:
+    delay = min(max_delay, uniform(base_delay, 3 * предыдущий delay)),
+    одновременные запросы после общего сбоя не повторяются синхронно.
+    429 и 418 не повторяются, их обрабатывает RateLimitGovernor
+    """
+
+    def __init__(
+            self,
+            max_attempts: int = 3,
+            base_delay: float = 0.1,
+            max_delay: float = 2,
+            retry_statuses: FrozenSet[int] = RETRY_STATUSES,
+            rng: Optional[random.Random] = None,
+    ) -> None:
+        if max_attempts < 1:
+            raise ValueError('max_attempts must be at least 1')
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_statuses = retry_statuses
+        self._random = rng or random.Random()
+
+    def delays(self) -> Iterator[float]:
+        """
+        Задержки перед каждой повторной попыткой, всего max_attempts - 1 значений
+        """
+        delay = self.base_delay
+        for _ in range(self.max_attempts - 1):
+            delay = min(self.max_delay, self._random.uniform(self.base_delay, delay * 3))
+            yield delay
+
+    def is_retryable(self, error: BaseException) -> bool:
+        if isinstance(error, (asyncio.TimeoutError, aiohttp.ClientConnectionError)):
+            return True
+        if isinstance(error, aiohttp.ClientResponseError):
+            return error.status in self.retry_statuses
+        if isinstance(error, BinanceHttpError):
+            return error.status in self.retry_statuses
+        return False
+
+    async def call(self, func: Callable[[], Awaitable[T]]) -> T:
+        """
+        Вызов func с повторами. Подходит только для идемпотентных запросов
+        """
+        delays = self.delays()
+        while True:
+            try:
+                return await func()
+            except BINANCE_REQUEST_ERRORS as error:
+                delay = next(delays, None)
+                if delay is None or not self.is_retryable(error):
+                    raise
+                logger.warning('Retry Binance request in %.3fs after error: %r', delay, error)
+                await asyncio.sleep(delay)
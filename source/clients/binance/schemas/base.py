@@ -0,0 +1,17 @@
+from typing import Any, Dict, Type, TypeVar
+
+from pydantic import BaseModel
+
+Model = TypeVar('Model', bound='TrustedModel')
+
+
+class TrustedModel(BaseModel):
+    """
+    Модель, которую можно собрать из ответа Binance без валидации pydantic.
+    Подходит для больших ответов известного формата (exchangeInfo), где полная валидация
+    занимает десятки миллисекунд event loop. Наследники приводят типы полей сами
+    """
+
+    @classmethod
+    def construct_trusted(cls: Type[Model], data: Dict[str, Any]) -> Model:
+        return cls.construct(**{name: data[name] for name in cls.__fields__ if name in data})
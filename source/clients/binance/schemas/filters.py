@@ -1,4 +1,5 @@
 from decimal import Decimal
+from typing import Dict, Type
 
 from pydantic import BaseModel, validator
 
@@ -14,6 +15,28 @@ class PriceFilter(BaseModel):
         return value.quantize(Decimal('0.000000'))
 
 
+class PercentPriceFilter(BaseModel):
+    filterType: str
+    multiplierUp: Decimal
+    multiplierDown: Decimal
+    avgPriceMins: int
+
+    @validator('multiplierUp', 'multiplierDown')
+    def _dec_value(cls, value: Decimal) -> Decimal:
+        return value.quantize(Decimal('0.000000'))
+
+
+class MinNotionalFilter(BaseModel):
+    filterType: str
+    minNotional: Decimal
+    applyToMarket: bool
+    avgPriceMins: int
+
+    @validator('minNotional')
+    def _dec_value(cls, value: Decimal) -> Decimal:
+        return value.quantize(Decimal('0.000000'))
+
+
 class NotionalFilter(BaseModel):
     filterType: str
     minNotional: Decimal
@@ -38,6 +61,10 @@ class LotSizeFilter(BaseModel):
         return value.quantize(Decimal('0.000000'))
 
 
+class MarketLotSizeFilter(LotSizeFilter):
+    ...
+
+
 class PercentPriceBySideFilter(BaseModel):
     filterType: str
     bidMultiplierUp: Decimal
@@ -49,3 +76,58 @@ class PercentPriceBySideFilter(BaseModel):
     @validator('bidMultiplierUp', 'bidMultiplierDown', 'askMultiplierUp', 'askMultiplierDown')
     def _dec_value(cls, value: Decimal) -> Decimal:
         return value.quantize(Decimal('0.000000'))
+
+
+class IcebergPartsFilter(BaseModel):
+    filterType: str
+    limit: int
+
+
+class MaxNumOrdersFilter(BaseModel):
+    filterType: str
+    maxNumOrders: int
+
+
+class MaxNumAlgoOrdersFilter(BaseModel):
+    filterType: str
+    maxNumAlgoOrders: int
+
+
+class MaxNumIcebergOrdersFilter(BaseModel):
+    filterType: str
+    maxNumIcebergOrders: int
+
+
+class MaxPositionFilter(BaseModel):
+    filterType: str
+    maxPosition: Decimal
+
+    @validator('maxPosition')
+    def _dec_value(cls, value: Decimal) -> Decimal:
+        return value.quantize(Decimal('0.000000'))
+
+
+class TrailingDeltaFilter(BaseModel):
+    filterType: str
+    minTrailingAboveDelta: int
+    maxTrailingAboveDelta: int
+    minTrailingBelowDelta: int
+    maxTrailingBelowDelta: int
+
+
+# https://binance-docs.github.io/apidocs/spot/en/#filters
+SYMBOL_FILTERS: Dict[str, Type[BaseModel]] = {
+    'PRICE_FILTER': PriceFilter,
+    'PERCENT_PRICE': PercentPriceFilter,
+    'PERCENT_PRICE_BY_SIDE': PercentPriceBySideFilter,
+    'LOT_SIZE': LotSizeFilter,
+    'MIN_NOTIONAL': MinNotionalFilter,
+    'NOTIONAL': NotionalFilter,
+    'ICEBERG_PARTS': IcebergPartsFilter,
+    'MARKET_LOT_SIZE': MarketLotSizeFilter,
+    'MAX_NUM_ORDERS': MaxNumOrdersFilter,
+    'MAX_NUM_ALGO_ORDERS': MaxNumAlgoOrdersFilter,
+    'MAX_NUM_ICEBERG_ORDERS': MaxNumIcebergOrdersFilter,
+    'MAX_POSITION': MaxPositionFilter,
+    'TRAILING_DELTA': TrailingDeltaFilter,
+}
@@ -1,14 +1,33 @@
 from decimal import Decimal
-from typing import Dict, List, Type
+from typing import Any, Dict, List, Optional, Type, TypeVar
 
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, Field, PrivateAttr, ValidationError, validator
 
-from source.clients.binance.schemas.filters import LotSizeFilter, NotionalFilter, PercentPriceBySideFilter, PriceFilter
+from source.clients.binance.schemas.base import TrustedModel
+from source.clients.binance.schemas.filters import (
+    SYMBOL_FILTERS,
+    IcebergPartsFilter,
+    LotSizeFilter,
+    MarketLotSizeFilter,
+    MaxNumAlgoOrdersFilter,
+    MaxNumIcebergOrdersFilter,
+    MaxNumOrdersFilter,
+    MaxPositionFilter,
+    MinNotionalFilter,
+    NotionalFilter,
+    PercentPriceBySideFilter,
+    PercentPriceFilter,
+    PriceFilter,
+    TrailingDeltaFilter,
+)
 from source.clients.binance.schemas.market.errors import NotFoundSymbolInExchangeInfo
 from source.enums import OrderType, SymbolStatus
+from source.logger import logger
 
+FilterModel = TypeVar('FilterModel', bound=BaseModel)
 
-class Symbol(BaseModel):
+
+class Symbol(TrustedModel):
     symbol: str
     status: SymbolStatus
     orderTypes: List[OrderType]
@@ -17,41 +36,147 @@ class Symbol(BaseModel):
     permissions: List[str]
     filters: List[Dict] = Field(description='https://binance-docs.github.io/apidocs/spot/en/#filters')
 
-    def _get_filter(self, filter_name: str, filter_model: Type[BaseModel]) -> BaseModel:
+    # Фильтры разбираются один раз при создании символа (и при замене filters),
+    # т.к. символ из кэша exchangeInfo используется в каждом запросе.
+    # У символа из construct_trusted - при первом обращении к фильтру
+    _parsed_filters: Optional[Dict[str, BaseModel]] = PrivateAttr(default=None)
+
+    def __init__(self, **data: Any) -> None:
+        super().__init__(**data)
+        self._parse_filters()
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        super().__setattr__(name, value)
+        if name == 'filters':
+            self._parse_filters()
+
+    @classmethod
+    def construct_trusted(cls, data: Dict[str, Any]) -> 'Symbol':
+        """
+        Из тысяч символов exchangeInfo используются единицы, поэтому фильтры не разбираются сразу
+        """
+        return cls.construct(
+            symbol=data['symbol'],
+            status=SymbolStatus(data['status']),
+            orderTypes=[OrderType(order_type) for order_type in data['orderTypes']],
+            quoteOrderQtyMarketAllowed=data['quoteOrderQtyMarketAllowed'],
+            isSpotTradingAllowed=data['isSpotTradingAllowed'],
+            permissions=data['permissions'],
+            filters=data['filters'],
+        )
+
+    def _parse_filters(self) -> Dict[str, BaseModel]:
+        """
+        Некорректный фильтр пропускается, чтобы не ломать весь exchangeInfo:
+        ошибка будет только при обращении к этому фильтру, см. _get_filter
+        """
+        parsed_filters = {}
         for _filter in self.filters:
-            if _filter['filterType'] == filter_name:
-                return filter_model.parse_obj(_filter)
-        raise ValueError(f'Not found {filter_name} filter')
+            filter_type = _filter.get('filterType')
+            if filter_type not in SYMBOL_FILTERS:
+                continue
+            try:
+                parsed_filters[filter_type] = SYMBOL_FILTERS[filter_type].parse_obj(_filter)
+            except ValidationError as error:
+                logger.warning(
+                    'Skip invalid %s filter of %s: %s', filter_type, self.symbol, error,
+                    extra={'symbol': self.symbol},
+                )
+        self._parsed_filters = parsed_filters
+        return parsed_filters
+
+    def _get_filter(self, filter_name: str, filter_model: Type[FilterModel]) -> FilterModel:
+        parsed_filters = self._parsed_filters if self._parsed_filters is not None else self._parse_filters()
+        _filter = parsed_filters.get(filter_name)
+        if not isinstance(_filter, filter_model):
+            raise ValueError(f'Not found {filter_name} filter')
+        return _filter
 
     @property
     def notional_filter(self) -> NotionalFilter:
-        return self._get_filter('NOTIONAL', NotionalFilter)  # type:ignore
+        return self._get_filter('NOTIONAL', NotionalFilter)
+
+    @property
+    def min_notional_filter(self) -> MinNotionalFilter:
+        return self._get_filter('MIN_NOTIONAL', MinNotionalFilter)
 
     @property
     def lot_size_filter(self) -> LotSizeFilter:
-        return self._get_filter('LOT_SIZE', LotSizeFilter)  # type:ignore
+        return self._get_filter('LOT_SIZE', LotSizeFilter)
+
+    @property
+    def market_lot_size_filter(self) -> MarketLotSizeFilter:
+        return self._get_filter('MARKET_LOT_SIZE', MarketLotSizeFilter)
 
     @property
     def price_filter(self) -> PriceFilter:
-        return self._get_filter('PRICE_FILTER', PriceFilter)  # type:ignore
+        return self._get_filter('PRICE_FILTER', PriceFilter)
+
+    @property
+    def percent_price_filter(self) -> PercentPriceFilter:
+        return self._get_filter('PERCENT_PRICE', PercentPriceFilter)
 
     @property
     def percent_price_by_side_filter(self) -> PercentPriceBySideFilter:
-        return self._get_filter('PERCENT_PRICE_BY_SIDE', PercentPriceBySideFilter)  # type:ignore
+        return self._get_filter('PERCENT_PRICE_BY_SIDE', PercentPriceBySideFilter)
 
+    @property
+    def iceberg_parts_filter(self) -> IcebergPartsFilter:
+        return self._get_filter('ICEBERG_PARTS', IcebergPartsFilter)
 
-class ExchangeInfoResponse(BaseModel):
+    @property
+    def max_num_orders_filter(self) -> MaxNumOrdersFilter:
+        return self._get_filter('MAX_NUM_ORDERS', MaxNumOrdersFilter)
+
+    @property
+    def max_num_algo_orders_filter(self) -> MaxNumAlgoOrdersFilter:
+        return self._get_filter('MAX_NUM_ALGO_ORDERS', MaxNumAlgoOrdersFilter)
+
+    @property
+    def max_num_iceberg_orders_filter(self) -> MaxNumIcebergOrdersFilter:
+        return self._get_filter('MAX_NUM_ICEBERG_ORDERS', MaxNumIcebergOrdersFilter)
+
+    @property
+    def max_position_filter(self) -> MaxPositionFilter:
+        return self._get_filter('MAX_POSITION', MaxPositionFilter)
+
+    @property
+    def trailing_delta_filter(self) -> TrailingDeltaFilter:
+        return self._get_filter('TRAILING_DELTA', TrailingDeltaFilter)
+
+
+class ExchangeInfoResponse(TrustedModel):
     """
     Поля оставил только те, которые непосредственно использую
     Понятно, что в респонсе их гораздо больше.
     """
     symbols: List[Symbol]
 
+    _symbols_index: Dict[str, Symbol] = PrivateAttr()
+
+    def __init__(self, **data: Any) -> None:
+        super().__init__(**data)
+        self._symbols_index = {symbol_data.symbol: symbol_data for symbol_data in self.symbols}
+
+    @classmethod
+    def construct_trusted(cls, data: Dict[str, Any]) -> 'ExchangeInfoResponse':
+        return cls.from_symbols([Symbol.construct_trusted(symbol) for symbol in data['symbols']])
+
+    @classmethod
+    def from_symbols(cls, symbols: List[Symbol]) -> 'ExchangeInfoResponse':
+        """
+        Из уже собранных символов, без повторной валидации
+        """
+        exchange_info = cls.construct(symbols=symbols)
+        # construct не вызывает __init__, индекс строим сами
+        exchange_info._symbols_index = {symbol_data.symbol: symbol_data for symbol_data in symbols}
+        return exchange_info
+
     def get_symbol(self, symbol: str) -> Symbol:
-        for symbol_data in self.symbols:
-            if symbol_data.symbol == symbol:
-                return symbol_data
-        raise NotFoundSymbolInExchangeInfo('Not found symbol')
+        try:
+            return self._symbols_index[symbol]
+        except KeyError:
+            raise NotFoundSymbolInExchangeInfo('Not found symbol')
 
 
 class LatestPriceResponse(BaseModel):
@@ -61,3 +186,20 @@ class LatestPriceResponse(BaseModel):
     @validator('price')
     def _dec_value(cls, value: Decimal) -> Decimal:
         return value.quantize(Decimal('0.000000'))
+
+
+class ServerTimeResponse(BaseModel):
+    serverTime: int
+
+
+class MarketPrice(BaseModel):
+    """
+    Последние данные по символу из WebSocket стримов, см. MarketDataFeed
+    updated_at - время (loop.time()) последнего сообщения по символу из любого стрима
+    """
+    symbol: str
+    price: Optional[Decimal] = None
+    bid: Optional[Decimal] = None
+    ask: Optional[Decimal] = None
+    avg_price: Optional[Decimal] = None
+    updated_at: float = 0
@@ -1,7 +1,7 @@
 from decimal import Decimal
 from typing import Optional
 
-from pydantic import BaseModel, validator
+from pydantic import BaseModel, Field, validator
 
 from source.clients.binance.signature import BaseSignature
 from source.enums import OrderSide, OrderType, TimeInForce
@@ -14,6 +14,8 @@ class NewOrderRequest(BaseSignature):
     quantity: Optional[Decimal] = None
     price: Optional[Decimal] = None
     timeInForce: Optional[TimeInForce] = None
+    # Уникальный id ордера на стороне клиента, по нему повторная попытка находит уже созданный ордер
+    newClientOrderId: Optional[str] = Field(default=None, regex=r'^[\.A-Z\:/a-z0-9_-]{1,36}$')
 
     class Config:
         use_enum_values = True
@@ -32,6 +34,7 @@ class NewOrderRequest(BaseSignature):
 class NewOrderResponse(BaseModel):
     symbol: str
     orderId: int
+    clientOrderId: Optional[str] = None
     transactTime: int
     price: Decimal
     status: str
@@ -44,3 +47,40 @@ class NewOrderResponse(BaseModel):
         if value is None:
             return value
         return value.quantize(Decimal('0.000000'))
+
+
+class QueryOrderRequest(BaseSignature):
+    symbol: str
+    origClientOrderId: str
+
+    @validator('symbol', pre=True)
+    def _symbol(cls, symbol: str) -> str:
+        return symbol.upper()
+
+
+class QueryOrderResponse(BaseModel):
+    symbol: str
+    orderId: int
+    clientOrderId: str
+    price: Decimal
+    origQty: Decimal
+    executedQty: Decimal = Decimal(0)
+    status: str
+    timeInForce: TimeInForce
+    type: OrderType  # noqa:A003,VNE003
+    side: OrderSide
+    time: int
+    updateTime: Optional[int] = None
+
+    def to_new_order_response(self) -> NewOrderResponse:
+        return NewOrderResponse(
+            symbol=self.symbol,
+            orderId=self.orderId,
+            clientOrderId=self.clientOrderId,
+            transactTime=self.time,
+            price=self.price,
+            status=self.status,
+            timeInForce=self.timeInForce,
+            type=self.type,
+            side=self.side,
+        )
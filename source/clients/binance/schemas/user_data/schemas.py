@@ -0,0 +1,80 @@
+from decimal import Decimal
+
+from pydantic import BaseModel, Field, validator
+
+from source.clients.binance.schemas.order.schemas import QueryOrderResponse
+from source.enums import OrderSide
+
+
+class ListenKeyResponse(BaseModel):
+    listenKey: str
+
+
+class EmptyResponse(BaseModel):
+    pass
+
+
+class ExecutionReport(BaseModel):
+    """
+    Событие executionReport из user data stream, поля названы как в Binance
+    https://binance-docs.github.io/apidocs/spot/en/#payload-order-update
+    """
+    event_time: int = Field(alias='E')
+    symbol: str = Field(alias='s')
+    client_order_id: str = Field(alias='c')
+    # Для отмены - clientOrderId отменяемого ордера, для остальных событий пустая строка
+    orig_client_order_id: str = Field(alias='C', default='')
+    side: OrderSide = Field(alias='S')
+    quantity: Decimal = Field(alias='q')
+    price: Decimal = Field(alias='p')
+    execution_type: str = Field(alias='x')
+    status: str = Field(alias='X')
+    order_id: int = Field(alias='i')
+    executed_quantity: Decimal = Field(alias='z')
+
+    @validator('quantity', 'price', 'executed_quantity')
+    def _dec_value(cls, value: Decimal) -> Decimal:
+        return value.quantize(Decimal('0.000000'))
+
+
+class OrderState(BaseModel):
+    """
+    Последнее известное состояние ордера по user data stream
+    """
+    symbol: str
+    order_id: int
+    client_order_id: str
+    side: OrderSide
+    status: str
+    price: Decimal
+    quantity: Decimal
+    executed_quantity: Decimal
+    updated_at: int = Field(description='Время события Binance в миллисекундах')
+
+    @classmethod
+    def from_execution_report(cls, report: ExecutionReport) -> 'OrderState':
+        return cls(
+            symbol=report.symbol,
+            order_id=report.order_id,
+            client_order_id=report.orig_client_order_id or report.client_order_id,
+            side=report.side,
+            status=report.status,
+            price=report.price,
+            quantity=report.quantity,
+            executed_quantity=report.executed_quantity,
+            updated_at=report.event_time,
+        )
+
+    @classmethod
+    def from_query_order(cls, order: QueryOrderResponse) -> 'OrderState':
+        return cls(
+            symbol=order.symbol,
+            order_id=order.orderId,
+            client_order_id=order.clientOrderId,
+            side=order.side,
+            status=order.status,
+            price=order.price.quantize(Decimal('0.000000')),
+            quantity=order.origQty.quantize(Decimal('0.000000')),
+            executed_quantity=order.executedQty.quantize(Decimal('0.000000')),
+            updated_at=order.updateTime or order.time,
+        )
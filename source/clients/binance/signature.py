@@ -1,17 +1,142 @@
+import abc
+import base64
+import functools
 import hashlib
 import hmac
-import time
-import urllib.parse
-from typing import Optional
-from urllib.parse import urlencode
+from typing import Any, Iterable, List, Optional
+from urllib.parse import quote, urlencode
 
-from pydantic import BaseModel, Field
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519, padding, rsa
+from pydantic import BaseModel, Field, PrivateAttr
 
+from source.clients.binance.clock import server_clock
 from source.config import config
+from source.enums import SignatureType
 
 
 def _timestamp() -> int:
-    return int(time.time() * 1000)
+    return server_clock.timestamp()
+
+
+class Signer(abc.ABC):
+    """
+    Подпись запросов к Binance. Реализации хранят уже загруженный ключ
+    и не меняют свое состояние при подписи, поэтому один signer можно использовать из разных потоков
+    """
+
+    @abc.abstractmethod
+    def signature(self, payload: bytes) -> str:
+        raise NotImplementedError
+
+    def sign(self, request: 'BaseSignature') -> str:
+        """
+        Подписывает request и возвращает подписанную query string
+        """
+        return request.sign(self)
+
+    def sign_many(self, requests: Iterable['BaseSignature']) -> List[str]:
+        return [request.sign(self) for request in requests]
+
+    @classmethod
+    def from_config(cls) -> 'Signer':
+        return _signer(
+            config.BINANCE_SIGNATURE_TYPE,
+            config.BINANCE_SECRET_KEY,
+            config.BINANCE_PRIVATE_KEY_PATH,
+            config.BINANCE_PRIVATE_KEY_PASSWORD,
+        )
+
+
+class HmacSigner(Signer):
+    """
+    Подпись HMAC SHA256. Ключ подготавливается один раз,
+    для каждой подписи копируется уже инициализированный объект hmac
+    """
+
+    def __init__(self, secret_key: str) -> None:
+        self._hmac = hmac.new(key=secret_key.encode(), digestmod=hashlib.sha256)
+
+    @classmethod
+    def from_config(cls) -> 'HmacSigner':
+        if config.BINANCE_SECRET_KEY is None:
+            raise ValueError('BINANCE_SECRET_KEY is required for HMAC signature')
+        return _hmac_signer(config.BINANCE_SECRET_KEY)
+
+    def signature(self, payload: bytes) -> str:
+        signer = self._hmac.copy()
+        signer.update(payload)
+        return signer.hexdigest()
+
+
+class RsaSigner(Signer):
+    """
+    Подпись RSA PKCS#1 v1.5 SHA256, подпись передается в base64
+    """
+
+    def __init__(self, private_key: rsa.RSAPrivateKey) -> None:
+        self._private_key = private_key
+
+    @classmethod
+    def from_pem(cls, data: bytes, password: Optional[str] = None) -> 'RsaSigner':
+        private_key = _load_private_key(data, password)
+        if not isinstance(private_key, rsa.RSAPrivateKey):
+            raise ValueError('Private key is not an RSA key')
+        return cls(private_key)
+
+    def signature(self, payload: bytes) -> str:
+        return base64.b64encode(self._private_key.sign(payload, padding.PKCS1v15(), hashes.SHA256())).decode()
+
+
+class Ed25519Signer(Signer):
+    """
+    Подпись Ed25519, подпись передается в base64
+    """
+
+    def __init__(self, private_key: ed25519.Ed25519PrivateKey) -> None:
+        self._private_key = private_key
+
+    @classmethod
+    def from_pem(cls, data: bytes, password: Optional[str] = None) -> 'Ed25519Signer':
+        private_key = _load_private_key(data, password)
+        if not isinstance(private_key, ed25519.Ed25519PrivateKey):
+            raise ValueError('Private key is not an Ed25519 key')
+        return cls(private_key)
+
+    def signature(self, payload: bytes) -> str:
+        return base64.b64encode(self._private_key.sign(payload)).decode()
+
+
+def _load_private_key(data: bytes, password: Optional[str]) -> Any:
+    return serialization.load_pem_private_key(data, password=password.encode() if password is not None else None)
+
+
+@functools.lru_cache(maxsize=4)
+def _hmac_signer(secret_key: str) -> HmacSigner:
+    return HmacSigner(secret_key)
+
+
+@functools.lru_cache(maxsize=4)
+def _signer(
+        signature_type: SignatureType,
+        secret_key: Optional[str],
+        private_key_path: Optional[str],
+        private_key_password: Optional[str],
+) -> Signer:
+    """
+    Signer по настройкам config. Ключ читается с диска и разбирается один раз на набор настроек
+    """
+    if signature_type is SignatureType.HMAC:
+        if secret_key is None:
+            raise ValueError('BINANCE_SECRET_KEY is required for HMAC signature')
+        return _hmac_signer(secret_key)
+    if private_key_path is None:
+        raise ValueError(f'BINANCE_PRIVATE_KEY_PATH is required for {signature_type.value} signature')
+    with open(private_key_path, 'rb') as file:
+        data = file.read()
+    if signature_type is SignatureType.RSA:
+        return RsaSigner.from_pem(data, private_key_password)
+    return Ed25519Signer.from_pem(data, private_key_password)
 
 
 class BaseSignature(BaseModel):
@@ -19,13 +144,23 @@ class BaseSignature(BaseModel):
     timestamp: int = Field(default_factory=_timestamp)
     signature: Optional[str]
 
-    def sign(self) -> None:
-        data = self.dict(exclude_none=True)
-        self.signature = hmac.new(
-            key=bytes(config.BINANCE_SECRET_KEY, 'UTF-8'),
-            msg=urlencode(data).encode(),
-            digestmod=hashlib.sha256,
-        ).hexdigest()
+    # Query string, по которой посчитана подпись, чтобы не сериализовать запрос второй раз в to_query
+    _signed_query: Optional[str] = PrivateAttr(default=None)
+
+    def _query(self) -> str:
+        return urlencode(self.dict(exclude_none=True, exclude={'signature'}))
+
+    def sign(self, signer: Optional[Signer] = None) -> str:
+        signer = signer or Signer.from_config()
+        query = self._query()
+        self.signature = signer.signature(query.encode())
+        self._signed_query = query
+        return self.to_query()
 
     def to_query(self) -> str:
-        return urllib.parse.urlencode(self.dict(exclude_none=True))
+        if self.signature is None:
+            return self._query()
+        query = self._signed_query if self._signed_query is not None else self._query()
+        # base64 подпись RSA и Ed25519 содержит '+', '/' и '=', hex подпись HMAC не меняется
+        signature = quote(self.signature, safe='')
+        return f'{query}&signature={signature}'
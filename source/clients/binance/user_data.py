@@ -0,0 +1,271 @@
+import asyncio
+import json
+from collections import OrderedDict, defaultdict
+from typing import TYPE_CHECKING, DefaultDict, Dict, FrozenSet, Iterable, List, Optional, Tuple, Union
+
+from pydantic import ValidationError
+from websockets.client import WebSocketClientProtocol, connect
+from websockets.exceptions import WebSocketException
+
+from source.clients.binance.errors import BINANCE_REQUEST_ERRORS, OrderNotFilledError
+from source.clients.binance.market_data import MESSAGE_ERRORS
+from source.clients.binance.schemas.user_data.schemas import ExecutionReport, OrderState
+from source.logger import logger
+
+if TYPE_CHECKING:
+    from source.clients.binance.client import BinanceClient
+
+# https://binance-docs.github.io/apidocs/spot/en/#public-api-definitions
+FINAL_ORDER_STATUSES = frozenset({'FILLED', 'CANCELED', 'REJECTED', 'EXPIRED', 'EXPIRED_IN_MATCH'})
+
+
+ORDER_KEY_TYPE = Union[int, str]
+
+
+class UserDataStream:
+    """
+    Состояние ордеров по user data stream Binance вместо опроса GET /api/v3/order.
+
+    listenKey создается при каждом подключении и продлевается в фоне раз в keepalive_interval.
+    Последнее состояние каждого ордера из executionReport хранится в памяти по orderId
+    и clientOrderId, wait_for / wait_filled ждут нужного статуса без запросов к REST API.
+    Пока стрим отключен, события теряются, поэтому после каждого подключения незавершенные
+    ордера, для которых известен символ, сверяются через query_order.
+    Из завершенных ордеров хранятся только последние max_finished_orders,
+    незавершенные хранятся до финального статуса
+    """
+
+    def __init__(
+            self,
+            client: 'BinanceClient',
+            url: str,
+            keepalive_interval: float = 1800,
+            reconnect_delay: float = 1,
+            max_reconnect_delay: float = 30,
+            max_finished_orders: int = 10000,
+    ) -> None:
+        self.url = url.rstrip('/')
+        self.keepalive_interval = keepalive_interval
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.max_finished_orders = max_finished_orders
+        self._client = client
+        self._orders: Dict[int, OrderState] = {}
+        self._order_ids: Dict[str, int] = {}
+        # orderId завершенных ордеров в порядке завершения, самые старые вытесняются первыми
+        self._finished: 'OrderedDict[int, None]' = OrderedDict()
+        # clientOrderId -> symbol ордеров, которые ждут, но событий по ним еще не было
+        self._pending: Dict[str, str] = {}
+        self._waiters: DefaultDict[ORDER_KEY_TYPE, List[Tuple[FrozenSet[str], asyncio.Future]]] = defaultdict(list)
+        self._websocket: Optional[WebSocketClientProtocol] = None
+        self._listen_key: Optional[str] = None
+        self._connected = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def connected(self) -> bool:
+        return self._websocket is not None
+
+    async def wait_connected(self, timeout: Optional[float] = None) -> None:
+        await asyncio.wait_for(self._connected.wait(), timeout)
+
+    def get(self, order_id: Optional[int] = None, client_order_id: Optional[str] = None) -> Optional[OrderState]:
+        if order_id is None and client_order_id is not None:
+            order_id = self._order_ids.get(client_order_id)
+        if order_id is None:
+            return None
+        return self._orders.get(order_id)
+
+    def apply(self, order: OrderState) -> bool:
+        """
+        Обновление состояния ордера. События старше уже известного и переход
+        из финального статуса обратно игнорируются, возвращается False
+        """
+        current = self._orders.get(order.order_id)
+        if current is not None:
+            if order.updated_at < current.updated_at:
+                return False
+            if current.status in FINAL_ORDER_STATUSES and order.status not in FINAL_ORDER_STATUSES:
+                return False
+        self._orders[order.order_id] = order
+        self._order_ids[order.client_order_id] = order.order_id
+        self._pending.pop(order.client_order_id, None)
+        self._notify(order.order_id, order)
+        self._notify(order.client_order_id, order)
+        if order.status in FINAL_ORDER_STATUSES:
+            self._finished[order.order_id] = None
+            self._finished.move_to_end(order.order_id)
+            self._evict()
+        return True
+
+    def _evict(self) -> None:
+        while len(self._finished) > self.max_finished_orders:
+            order_id, _ = self._finished.popitem(last=False)
+            order = self._orders.pop(order_id)
+            if self._order_ids.get(order.client_order_id) == order_id:
+                del self._order_ids[order.client_order_id]
+
+    def _notify(self, key: ORDER_KEY_TYPE, order: OrderState) -> None:
+        waiters = self._waiters.get(key)
+        if not waiters:
+            return
+        for statuses, future in waiters:
+            if order.status in statuses and not future.done():
+                future.set_result(order)
+
+    def _remove_waiter(self, key: ORDER_KEY_TYPE, waiter: Tuple[FrozenSet[str], asyncio.Future]) -> None:
+        waiters = self._waiters.get(key)
+        if waiters is None:
+            return
+        waiters.remove(waiter)
+        if not waiters:
+            del self._waiters[key]
+
+    async def wait_for(
+            self,
+            order_id: Optional[int] = None,
+            client_order_id: Optional[str] = None,
+            statuses: Iterable[str] = FINAL_ORDER_STATUSES,
+            timeout: Optional[float] = None,
+            symbol: Optional[str] = None,
+    ) -> OrderState:
+        """
+        Ожидание статуса ордера из statuses, по умолчанию любого финального.
+        :param symbol: вместе с client_order_id позволяет сверить ордер через REST после переподключения
+        :raises asyncio.TimeoutError: статус не получен за timeout секунд
+        """
+        key: ORDER_KEY_TYPE
+        if order_id is not None:
+            key = order_id
+        elif client_order_id is not None:
+            key = client_order_id
+        else:
+            raise TypeError('order_id or client_order_id is required')
+        waiter = (frozenset(statuses), asyncio.get_running_loop().create_future())
+        order = self.get(order_id, client_order_id)
+        if order is not None and order.status in waiter[0]:
+            return order
+        if order is None and client_order_id is not None and symbol is not None:
+            self._pending[client_order_id] = symbol.upper()
+        self._waiters[key].append(waiter)
+        try:
+            return await asyncio.wait_for(waiter[1], timeout)
+        finally:
+            self._remove_waiter(key, waiter)
+            if client_order_id is not None and client_order_id not in self._waiters:
+                self._pending.pop(client_order_id, None)
+
+    async def wait_filled(
+            self,
+            order_id: Optional[int] = None,
+            client_order_id: Optional[str] = None,
+            timeout: Optional[float] = None,
+            symbol: Optional[str] = None,
+    ) -> OrderState:
+        """
+        :raises OrderNotFilledError: ордер отменен, отклонен или истек
+        """
+        order = await self.wait_for(order_id, client_order_id, timeout=timeout, symbol=symbol)
+        if order.status != 'FILLED':
+            raise OrderNotFilledError(order)
+        return order
+
+    def _handle_message(self, message: Union[str, bytes]) -> bool:
+        """
+        :return: False, если listenKey истек и нужно переподключиться
+        """
+        payload = json.loads(message)
+        event = payload.get('e')
+        if event == 'listenKeyExpired':
+            return False
+        if event == 'executionReport':
+            try:
+                report = ExecutionReport.parse_obj(payload)
+            except ValidationError as error:
+                logger.warning('Invalid executionReport: %r', error)
+            else:
+                self.apply(OrderState.from_execution_report(report))
+        return True
+
+    async def _resync(self) -> None:
+        orders = {
+            order.client_order_id: order.symbol
+            for order in self._orders.values()
+            if order.status not in FINAL_ORDER_STATUSES
+        }
+        orders.update(self._pending)
+        for client_order_id, symbol in orders.items():
+            try:
+                order = await self._client.query_order(symbol, client_order_id)
+            except BINANCE_REQUEST_ERRORS as error:
+                logger.warning('Failed to resync order %s: %r', client_order_id, error)
+                continue
+            self.apply(OrderState.from_query_order(order))
+
+    async def _keepalive(self, websocket: WebSocketClientProtocol, listen_key: str) -> None:
+        while True:
+            await asyncio.sleep(self.keepalive_interval)
+            try:
+                await self._client.keepalive_listen_key(listen_key)
+            except BINANCE_REQUEST_ERRORS as error:
+                # Без продления listenKey стрим замолчит, подключаемся заново с новым
+                logger.warning('Failed to keepalive listenKey: %r', error)
+                await websocket.close()
+                return
+
+    async def _close_listen_key(self) -> None:
+        listen_key, self._listen_key = self._listen_key, None
+        if listen_key is None:
+            return
+        try:
+            await self._client.close_listen_key(listen_key)
+        except BINANCE_REQUEST_ERRORS as error:
+            logger.warning('Failed to close listenKey: %r', error)
+
+    async def _listen(self) -> None:
+        self._listen_key = (await self._client.create_listen_key()).listenKey
+        async with connect(f'{self.url}/ws/{self._listen_key}') as websocket:
+            keepalive = asyncio.create_task(self._keepalive(websocket, self._listen_key))
+            self._websocket = websocket
+            try:
+                await self._resync()
+                self._connected.set()
+                async for message in websocket:
+                    try:
+                        listening = self._handle_message(message)
+                    except MESSAGE_ERRORS as error:
+                        logger.warning('Skipped invalid user data message %.200r: %r', message, error)
+                        continue
+                    if not listening:
+                        logger.info('listenKey expired, reconnecting user data stream')
+                        break
+            finally:
+                self._connected.clear()
+                self._websocket = None
+                keepalive.cancel()
+
+    async def _run(self) -> None:
+        delay = self.reconnect_delay
+        while True:
+            try:
+                await self._listen()
+                delay = self.reconnect_delay
+            except (OSError, WebSocketException, *BINANCE_REQUEST_ERRORS) as error:
+                logger.warning('User data stream disconnected: %r', error)
+            await self._close_listen_key()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_reconnect_delay)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self._close_listen_key()
@@ -1,13 +1,55 @@
+from typing import List, Optional
+
 import pydantic
 from yarl import URL
 
+from source.enums import LogFormat, SignatureType
+
 
 class Config(pydantic.BaseSettings):
 
     BINANCE_API_KEY: str
-    BINANCE_SECRET_KEY: str
+    BINANCE_SECRET_KEY: Optional[str] = None
+    BINANCE_SIGNATURE_TYPE: SignatureType = SignatureType.HMAC
+    BINANCE_PRIVATE_KEY_PATH: Optional[str] = None
+    BINANCE_PRIVATE_KEY_PASSWORD: Optional[str] = None
     BINANCE_API_URL: str
     BINANCE_API_TIMEOUT: int = 15
+    BINANCE_GET_RETRY_ATTEMPTS: int = 3
+    BINANCE_ORDER_RETRY_ATTEMPTS: int = 3
+    BINANCE_RETRY_BASE_DELAY: float = 0.1
+    BINANCE_RETRY_MAX_DELAY: float = 2
+    BINANCE_CONNECTION_LIMIT: int = 100
+    BINANCE_CONNECTION_LIMIT_PER_HOST: int = 50
+    BINANCE_KEEPALIVE_TIMEOUT: float = 30
+    BINANCE_DNS_CACHE_TTL: int = 300
+    BINANCE_CLOCK_SYNC_INTERVAL: float = 60
+    BINANCE_CLOCK_SYNC_SAMPLES: int = 5
+    BINANCE_EXCHANGE_INFO_TTL: float = 300
+    BINANCE_EXCHANGE_INFO_TRUSTED: bool = False
+    BINANCE_EXCHANGE_INFO_SYMBOLS: List[str] = []
+    BINANCE_STREAM_URL: Optional[str] = None
+    BINANCE_MARKET_DATA_SYMBOLS: List[str] = []
+    BINANCE_MARKET_DATA_STALE_AFTER: float = 5
+    BINANCE_USER_DATA_STREAM: bool = False
+    BINANCE_LISTEN_KEY_KEEPALIVE_INTERVAL: float = 1800
+    BINANCE_ORDERS_CONCURRENCY: int = 10
+    BINANCE_ORDERS_PER_10S: int = 50
+    BINANCE_ORDERS_PER_DAY: int = 160000
+    BINANCE_REQUEST_WEIGHT_PER_1M: int = 6000
+    ORDERS_JOURNAL_PATH: Optional[str] = None
+    ORDERS_JOURNAL_FSYNC: bool = True
+    ORDERS_JOURNAL_COMPACT_SIZE: int = 64 * 1024 * 1024
+    ORDERS_JOB_WORKERS: int = 4
+    ORDERS_JOB_QUEUE_SIZE: int = 100
+    ORDERS_JOB_TTL: float = 3600
+    LOG_LEVEL: str = 'INFO'
+    LOG_FORMAT: LogFormat = LogFormat.JSON
+    LOG_QUEUE_SIZE: int = 10000
+    LOG_ORDERS_SAMPLE_SIZE: int = 20
+    TRACING_ENABLED: bool = False
+    TRACING_OTLP_ENDPOINT: Optional[str] = None
+    TRACING_SERVICE_NAME: str = 'binance-create-order'
 
     def get_binance_api(self, path: str) -> str:
         return str(URL(self.BINANCE_API_URL).with_path(path))
@@ -30,3 +30,30 @@ class TimeInForce(enum.Enum):
     GTC = 'GTC'
     IOC = 'IOC'
     FOK = 'FOK'
+
+
+class SignatureType(enum.Enum):
+    HMAC = 'HMAC'
+    RSA = 'RSA'
+    ED25519 = 'ED25519'
+
+
+class JobStatus(enum.Enum):
+    QUEUED = 'QUEUED'
+    RUNNING = 'RUNNING'
+    DONE = 'DONE'
+    FAILED = 'FAILED'
+    CANCELLED = 'CANCELLED'
+
+
+class LogFormat(enum.Enum):
+    JSON = 'JSON'
+    TEXT = 'TEXT'
+
+
+class PriceDistribution(enum.Enum):
+    RANDOM = 'RANDOM'
+    LINEAR = 'LINEAR'
+    GEOMETRIC = 'GEOMETRIC'
+    GAUSSIAN = 'GAUSSIAN'
+    WEIGHTED_RANDOM = 'WEIGHTED_RANDOM'
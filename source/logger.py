@@ -1,13 +1,111 @@
+import atexit
+import copy
 import logging
+import queue
 import sys
 from logging import Logger
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict
+
+import orjson
+
+from source.config import config
+from source.enums import LogFormat
+
+TEXT_FORMAT = '%(asctime)s [%(levelname)s] %(funcName)s:%(lineno)s >>> %(message)s'
+
+# Поля из extra, которые попадают в JSON запись, например logger.info('...', extra={'symbol': 'BTCUSDT'})
+LOG_FIELDS = (
+    'symbol', 'side', 'ladder_id', 'order_id', 'client_order_id', 'price', 'quantity', 'latency', 'error',
+)
+
+_formatter = logging.Formatter()
+
+
+def format_json_record(record: logging.LogRecord) -> str:
+    """
+    JSON запись: время, уровень, место вызова, сообщение и поля LOG_FIELDS
+    """
+    data: Dict[str, Any] = {
+        'time': _formatter.formatTime(record),
+        'level': record.levelname,
+        'func': record.funcName,
+        'line': record.lineno,
+        'message': record.getMessage(),
+    }
+    for field in LOG_FIELDS:
+        value = record.__dict__.get(field)
+        if value is not None:
+            data[field] = value
+    if record.exc_info and not record.exc_text:
+        record.exc_text = _formatter.formatException(record.exc_info)
+    if record.exc_text:
+        data['exc_info'] = record.exc_text
+    return orjson.dumps(data, default=str).decode()
+
+
+class JsonStreamHandler(logging.StreamHandler):
+    """
+    Одна JSON запись на строку, см. format_json_record
+    """
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            self.stream.write(format_json_record(record) + self.terminator)
+            self.flush()
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Запись уходит в очередь, в поток и в stdout ее пишет QueueListener в фоновом потоке,
+    так что медленный stdout не блокирует event loop.
+    В вызывающем потоке только подставляются аргументы сообщения и форматируется traceback,
+    JSON собирается в фоновом потоке. Если очередь заполнена, запись отбрасывается и считается в dropped
+    """
+
+    def __init__(self, log_queue: 'queue.Queue[logging.LogRecord]') -> None:
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        # Аргументы могут измениться до того, как запись дойдет до фонового потока
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def create_stream_handler() -> logging.Handler:
+    if config.LOG_FORMAT is LogFormat.JSON:
+        return JsonStreamHandler(stream=sys.stdout)
+    handler = logging.StreamHandler(stream=sys.stdout)
+    handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+    return handler
 
 
 def get_logger() -> Logger:
+    log_queue: 'queue.Queue[logging.LogRecord]' = queue.Queue(maxsize=config.LOG_QUEUE_SIZE)
+    listener = QueueListener(log_queue, create_stream_handler(), respect_handler_level=True)
+    listener.start()
+    # Дописываем оставшиеся в очереди записи при выходе
+    atexit.register(listener.stop)
     logging.basicConfig(
-        format='%(asctime)s [%(levelname)s] %(funcName)s:%(lineno)s >>> %(message)s',
-        level=logging.INFO,
-        handlers=[logging.StreamHandler(stream=sys.stdout)],
+        level=config.LOG_LEVEL,
+        handlers=[NonBlockingQueueHandler(log_queue)],
     )
 
     return logging.getLogger()
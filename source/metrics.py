@@ -0,0 +1,135 @@
+from typing import TYPE_CHECKING, Iterator, Optional
+
+import aiohttp
+from prometheus_client import CollectorRegistry, Counter, Histogram
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily, Metric
+from prometheus_client.registry import Collector
+
+from source.clients.binance.errors import BinanceHttpError
+
+if TYPE_CHECKING:
+    from source.clients.binance.cache import ExchangeInfoCache
+    from source.clients.binance.clock import ServerClock
+    from source.clients.binance.rate_limits import RateLimitGovernor
+
+registry = CollectorRegistry(auto_describe=True)
+
+# Ответ Binance обычно укладывается в десятки миллисекунд, ожидание лимита - в секунды
+_LATENCY_BUCKETS = (.001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10, 30)
+_BYTES_BUCKETS = (128, 512, 2 ** 10, 2 ** 12, 2 ** 14, 2 ** 16, 2 ** 18, 2 ** 20, 2 ** 22, 2 ** 24)
+
+BINANCE_REQUEST_SECONDS = Histogram(
+    'binance_request_seconds',
+    'Время запроса к Binance API, включая ожидание лимитов и чтение ответа',
+    ('path', 'method', 'status'),
+    buckets=_LATENCY_BUCKETS,
+    registry=registry,
+)
+BINANCE_RESPONSE_BYTES = Histogram(
+    'binance_response_bytes',
+    'Размер тела ответа Binance API',
+    ('path',),
+    buckets=_BYTES_BUCKETS,
+    registry=registry,
+)
+BINANCE_ERRORS = Counter(
+    'binance_errors',
+    'Ошибки запросов к Binance API: код Binance или класс исключения',
+    ('path', 'error'),
+    registry=registry,
+)
+ORDER_PHASE_SECONDS = Histogram(
+    'order_phase_seconds',
+    'Время этапов создания лесенки: checks, price_range, planning, submission',
+    ('phase',),
+    buckets=_LATENCY_BUCKETS,
+    registry=registry,
+)
+ORDER_ERRORS = Counter(
+    'order_errors',
+    'Ошибки создания лесенок: stage=pre_trade - проверки перед созданием, stage=order - создание ордера',
+    ('stage', 'error'),
+    registry=registry,
+)
+
+
+def error_label(error: BaseException) -> str:
+    """
+    Метка ошибки: код Binance, HTTP статус или класс исключения, чтобы число меток было ограничено
+    """
+    if isinstance(error, BinanceHttpError):
+        return str(error.code)
+    if isinstance(error, aiohttp.ClientResponseError):
+        return f'http_{error.status}'
+    return type(error).__name__
+
+
+class BinanceStateCollector(Collector):
+    """
+    Счетчики, которые уже ведут сами компоненты клиента: rate_limit_governor, server_clock и
+    ExchangeInfoCache. Значения читаются только при запросе /metrics, на запросы к Binance это не влияет
+    """
+
+    def __init__(self) -> None:
+        self.governor: Optional['RateLimitGovernor'] = None
+        self.clock: Optional['ServerClock'] = None
+        self.exchange_info_cache: Optional['ExchangeInfoCache'] = None
+
+    def bind(
+            self,
+            governor: Optional['RateLimitGovernor'] = None,
+            clock: Optional['ServerClock'] = None,
+            exchange_info_cache: Optional['ExchangeInfoCache'] = None,
+    ) -> None:
+        self.governor = governor
+        self.clock = clock
+        self.exchange_info_cache = exchange_info_cache
+
+    def _governor(self, governor: 'RateLimitGovernor') -> Iterator[Metric]:
+        for name, documentation, value in (
+                ('binance_governor_requests', 'Запросы через rate limit governor', governor.requests),
+                ('binance_governor_throttled', 'Запросы, которые ждали лимит', governor.throttled),
+                (
+                    'binance_governor_throttled_seconds',
+                    'Суммарное ожидание лимитов в секундах',
+                    governor.throttled_seconds,
+                ),
+                ('binance_governor_rate_limited', 'Ответы 429', governor.rate_limited),
+                ('binance_governor_banned', 'Ответы 418', governor.banned),
+        ):
+            yield CounterMetricFamily(name, documentation, value=value)
+        used = GaugeMetricFamily(
+            'binance_rate_limit_used', 'Израсходованный лимит в текущем интервале', labels=('limit',),
+        )
+        for label, window in (
+                ('request_weight_1m', governor.request_weight),
+                ('orders_10s', governor.orders_10s),
+                ('orders_1d', governor.orders_day),
+        ):
+            used.add_metric((label,), window.used)
+        yield used
+
+    def collect(self) -> Iterator[Metric]:
+        if self.governor is not None:
+            yield from self._governor(self.governor)
+        if self.clock is not None:
+            yield GaugeMetricFamily(
+                'binance_clock_offset_ms', 'Смещение часов сервера Binance относительно локальных',
+                value=self.clock.offset,
+            )
+            if self.clock.rtt is not None:
+                yield GaugeMetricFamily(
+                    'binance_clock_rtt_ms', 'rtt запроса времени при последней синхронизации', value=self.clock.rtt,
+                )
+        if self.exchange_info_cache is not None:
+            yield CounterMetricFamily(
+                'exchange_info_cache_hits', 'Ответы из кэша exchangeInfo', value=self.exchange_info_cache.hits,
+            )
+            yield CounterMetricFamily(
+                'exchange_info_cache_misses', 'Обращения к кэшу exchangeInfo без свежих данных',
+                value=self.exchange_info_cache.misses,
+            )
+
+
+binance_state_collector = BinanceStateCollector()
+registry.register(binance_state_collector)
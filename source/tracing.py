@@ -0,0 +1,128 @@
+import contextlib
+from typing import TYPE_CHECKING, Any, ContextManager, Dict, Optional
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+if TYPE_CHECKING:
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import SpanExporter
+    from opentelemetry.trace import Span, Tracer
+
+try:
+    from opentelemetry import propagate
+    from opentelemetry.sdk import trace as sdk_trace
+    from opentelemetry.sdk.resources import SERVICE_NAME, Resource
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, SimpleSpanProcessor
+    from opentelemetry.trace import SpanKind, Status, StatusCode
+
+    # None, если opentelemetry не установлен
+    _TRACER_PROVIDER: Optional[Any] = sdk_trace.TracerProvider
+except ImportError:  # pragma: no cover
+    _TRACER_PROVIDER = None
+
+# Один и тот же nullcontext на все span выключенной трассировки
+_DISABLED: ContextManager[None] = contextlib.nullcontext()
+
+
+class Tracing:
+    """
+    Трассировка OpenTelemetry. Пока не вызван setup, span возвращает общий nullcontext без span:
+    выключенная трассировка стоит одной проверки и не требует установленного opentelemetry
+    (зависимости см. requirements-tracing.txt)
+    """
+
+    def __init__(self) -> None:
+        self._provider: Optional['TracerProvider'] = None
+        self._tracer: Optional['Tracer'] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self._tracer is not None
+
+    def setup(
+            self,
+            service_name: str = 'binance-create-order',
+            endpoint: Optional[str] = None,
+            exporter: Optional['SpanExporter'] = None,
+    ) -> None:
+        """
+        :param endpoint: OTLP/HTTP коллектор, по умолчанию http://localhost:4318/v1/traces
+        :param exporter: экспорт вместо OTLP, например InMemorySpanExporter в тестах.
+            Такой exporter получает span сразу по завершении, OTLP - пачками в фоновом потоке
+        """
+        if _TRACER_PROVIDER is None:
+            raise RuntimeError('Tracing requires opentelemetry-sdk, install requirements-tracing.txt')
+        if exporter is None:
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+            processor: Any = BatchSpanProcessor(OTLPSpanExporter(endpoint=endpoint))
+        else:
+            processor = SimpleSpanProcessor(exporter)
+        self.shutdown()
+        provider: 'TracerProvider' = _TRACER_PROVIDER(resource=Resource.create({SERVICE_NAME: service_name}))
+        provider.add_span_processor(processor)
+        self._provider = provider
+        self._tracer = provider.get_tracer(__name__)
+
+    def shutdown(self) -> None:
+        """
+        Выгрузка накопленных span и выключение трассировки
+        """
+        if self._provider is not None:
+            self._provider.shutdown()
+        self._provider = None
+        self._tracer = None
+
+    def span(
+            self,
+            name: str,
+            kind: str = 'internal',
+            headers: Optional[Dict[str, str]] = None,
+    ) -> ContextManager[Optional['Span']]:
+        """
+        Дочерний span текущего. Исключение из блока записывается в span и помечает его ошибкой
+        :param kind: internal, server или client
+        :param headers: заголовки входящего запроса с контекстом родителя (traceparent)
+        """
+        if self._tracer is None:
+            return _DISABLED
+        context = propagate.extract(headers) if headers is not None else None
+        return self._tracer.start_as_current_span(name, context=context, kind=SpanKind[kind.upper()])
+
+
+tracing = Tracing()
+
+
+class TracingMiddleware:
+    """
+    Корневой span на каждый HTTP запрос к сервису. Пока трассировка выключена, запрос
+    передается дальше без изменений
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http' or not tracing.enabled:
+            await self.app(scope, receive, send)
+            return
+        headers = {key.decode('latin-1'): value.decode('latin-1') for key, value in scope['headers']}
+        with tracing.span(f'{scope["method"]} {scope["path"]}', kind='server', headers=headers) as span:
+            assert span is not None
+            span.set_attribute('http.method', scope['method'])
+            span.set_attribute('http.target', scope['path'])
+
+            async def _send(message: Message) -> None:
+                if span is not None and message['type'] == 'http.response.start':
+                    span.set_attribute('http.status_code', message['status'])
+                    if message['status'] >= 500:
+                        span.set_status(Status(StatusCode.ERROR))
+                await send(message)
+
+            try:
+                await self.app(scope, receive, _send)
+            finally:
+                # Шаблон пути известен только после роутинга, например /order/jobs/{job_id}
+                route = scope.get('route')
+                if route is not None:
+                    span.set_attribute('http.route', route.path)
+                    span.update_name(f'{scope["method"]} {route.path}')
@@ -0,0 +1,155 @@
+"""
+Нагрузочный прогон POST /order/create против локальной замены Binance (tests/stubs/binance.py)
+
+    python -m tests.benchmarks.load --numbers 1 10 50 --concurrency 20 --requests 200 --latency 0.005
+
+Для каждого number печатает req/s и p50/p95/p99 латентности в миллисекундах
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+from pydantic import BaseModel
+
+from source.api.app import app
+from source.api.dependencies import get_binance_client
+from source.clients.binance.client import BinanceClient
+from source.clients.binance.rate_limits import RateLimitGovernor
+from source.config import config
+from tests.stubs.binance import StubBinanceServer
+
+
+class LoadResult(BaseModel):
+    number: int
+    concurrency: int
+    requests: int
+    errors: int
+    duration: float
+    latencies: List[float]
+
+    @property
+    def rps(self) -> float:
+        return self.requests / self.duration
+
+    def percentile(self, percent: int) -> float:
+        if len(self.latencies) < 2:
+            return self.latencies[0] if self.latencies else 0.0
+        return statistics.quantiles(self.latencies, n=100, method='inclusive')[percent - 1]
+
+    def summary(self) -> str:
+        return (
+            f'number={self.number:<5} concurrency={self.concurrency:<4} requests={self.requests:<6} '
+            f'errors={self.errors:<4} rps={self.rps:>9.1f} '
+            f'p50={self.percentile(50) * 1000:>8.2f}ms p95={self.percentile(95) * 1000:>8.2f}ms '
+            f'p99={self.percentile(99) * 1000:>8.2f}ms'
+        )
+
+
+def _order_request(number: int) -> Dict[str, Any]:
+    return {
+        'symbol': 'dogeusdt',
+        'volume': 10 * number,
+        'number': number,
+        'amountDif': 1,
+        'side': 'SELL',
+        'priceMin': 0.068,
+        'priceMax': 0.078,
+    }
+
+
+async def run_load(
+        number: int,
+        concurrency: int,
+        requests: int,
+        server: StubBinanceServer,
+        client: BinanceClient,
+) -> LoadResult:
+    """
+    requests запросов с number ордеров в каждом, не больше concurrency одновременно
+    """
+    latencies: List[float] = []
+    errors = 0
+    queue: asyncio.Queue = asyncio.Queue()
+    for _ in range(requests):
+        queue.put_nowait(_order_request(number))
+
+    async def _worker(http: httpx.AsyncClient) -> None:
+        nonlocal errors
+        while not queue.empty():
+            payload = queue.get_nowait()
+            started_at = time.perf_counter()
+            response = await http.post('/order/create', json=payload)
+            latencies.append(time.perf_counter() - started_at)
+            if response.status_code != 200 or not response.json()['success']:
+                errors += 1
+
+    app.dependency_overrides[get_binance_client] = lambda: client
+    try:
+        async with httpx.AsyncClient(app=app, base_url='http://benchmark', timeout=None) as http:
+            started_at = time.perf_counter()
+            await asyncio.gather(*(_worker(http) for _ in range(concurrency)))
+            duration = time.perf_counter() - started_at
+    finally:
+        app.dependency_overrides.pop(get_binance_client, None)
+    return LoadResult(
+        number=number,
+        concurrency=concurrency,
+        requests=requests,
+        errors=errors,
+        duration=duration,
+        latencies=latencies,
+    )
+
+
+async def main(
+        numbers: List[int],
+        concurrency: int,
+        requests: int,
+        latency: float,
+        binance_limits: bool,
+        exchange_info_ttl: Optional[float],
+) -> List[LoadResult]:
+    results = []
+    async with StubBinanceServer(latency=latency, weight_limit=10 ** 9, order_limit_10s=10 ** 9) as server:
+        config.BINANCE_API_URL = server.url
+        governor = None
+        if not binance_limits:
+            # Меряем накладные расходы сервиса, а не ожидание лимитов Binance
+            governor = RateLimitGovernor(10 ** 9, 10 ** 9, 10 ** 9)
+        client = BinanceClient(exchange_info_ttl=exchange_info_ttl, governor=governor)
+        await client.start()
+        try:
+            for number in numbers:
+                result = await run_load(number, concurrency, requests, server, client)
+                sys.stdout.write(result.summary() + '\n')
+                results.append(result)
+        finally:
+            await client.close()
+    return results
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--numbers', type=int, nargs='+', default=[1, 10, 50])
+    parser.add_argument('--concurrency', type=int, default=10)
+    parser.add_argument('--requests', type=int, default=100)
+    parser.add_argument('--latency', type=float, default=0.0, help='Задержка ответа Binance в секундах')
+    parser.add_argument('--exchange-info-ttl', type=float, default=300, help='0 - без кэша exchangeInfo')
+    parser.add_argument('--binance-limits', action='store_true', help='Учитывать лимиты Binance из config')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = _parse_args()
+    asyncio.run(main(
+        numbers=args.numbers,
+        concurrency=args.concurrency,
+        requests=args.requests,
+        latency=args.latency,
+        binance_limits=args.binance_limits,
+        exchange_info_ttl=args.exchange_info_ttl or None,
+    ))
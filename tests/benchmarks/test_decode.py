@@ -0,0 +1,150 @@
+import asyncio
+import copy
+import json
+import tracemalloc
+
+import ijson
+import orjson
+import pytest
+
+from source.clients.binance.schemas.market.schemas import ExchangeInfoResponse, Symbol
+from tests.benchmarks.utils import ENABLED, check_baseline, measure
+from tests.stubs.binance import DEFAULT_SYMBOLS
+
+pytestmark = pytest.mark.skipif(not ENABLED, reason='Benchmarks are enabled with BENCHMARK=1')
+
+# Порядок числа символов в exchangeInfo Binance spot
+SYMBOLS_NUMBER = 2500
+
+
+def _exchange_info_payload() -> bytes:
+    """
+    exchangeInfo по размеру и составу как у Binance: символы из стаба с полями,
+    которые сервис не использует, но которые приходят в ответе
+    """
+    symbols = []
+    for index in range(SYMBOLS_NUMBER):
+        symbol = copy.deepcopy(DEFAULT_SYMBOLS[index % len(DEFAULT_SYMBOLS)])
+        base_asset = f'COIN{index}'
+        symbol.update({
+            'symbol': f'{base_asset}USDT',
+            'baseAsset': base_asset,
+            'baseAssetPrecision': 8,
+            'quoteAsset': 'USDT',
+            'quotePrecision': 8,
+            'quoteAssetPrecision': 8,
+            'baseCommissionPrecision': 8,
+            'quoteCommissionPrecision': 8,
+            'icebergAllowed': True,
+            'ocoAllowed': True,
+            'isMarginTradingAllowed': False,
+            'defaultSelfTradePreventionMode': 'NONE',
+            'allowedSelfTradePreventionModes': ['NONE', 'EXPIRE_TAKER', 'EXPIRE_MAKER', 'EXPIRE_BOTH'],
+        })
+        symbols.append(symbol)
+    payload = {
+        'timezone': 'UTC',
+        'serverTime': 1672567200000,
+        'rateLimits': [
+            {'rateLimitType': 'REQUEST_WEIGHT', 'interval': 'MINUTE', 'intervalNum': 1, 'limit': 6000},
+            {'rateLimitType': 'ORDERS', 'interval': 'SECOND', 'intervalNum': 10, 'limit': 100},
+            {'rateLimitType': 'ORDERS', 'interval': 'DAY', 'intervalNum': 1, 'limit': 200000},
+        ],
+        'exchangeFilters': [],
+        'symbols': symbols,
+    }
+    return json.dumps(payload).encode()
+
+
+@pytest.fixture(scope='module')
+def exchange_info_payload() -> bytes:
+    return _exchange_info_payload()
+
+
+def test_benchmark_exchange_info_stdlib_json_parse_obj(exchange_info_payload):
+    # Прежний путь: response.json() декодирует bytes в str и разбирает stdlib json, затем полная валидация
+    def _parse():
+        return ExchangeInfoResponse.parse_obj(json.loads(exchange_info_payload.decode()))
+
+    check_baseline('exchange_info[stdlib-parse_obj]', measure(_parse, repeat=3), gate=False)
+
+
+def test_benchmark_exchange_info_orjson_parse_obj(exchange_info_payload):
+    def _parse():
+        return ExchangeInfoResponse.parse_obj(orjson.loads(exchange_info_payload))
+
+    check_baseline('exchange_info[orjson-parse_obj]', measure(_parse, repeat=3))
+
+
+def test_benchmark_exchange_info_orjson_trusted(exchange_info_payload):
+    def _parse():
+        exchange_info = ExchangeInfoResponse.construct_trusted(orjson.loads(exchange_info_payload))
+        # Фильтры разбираются только у используемого символа
+        exchange_info.get_symbol('COIN7USDT').lot_size_filter
+        return exchange_info
+
+    check_baseline('exchange_info[orjson-trusted]', measure(_parse, repeat=3))
+
+
+def test_benchmark_exchange_info_json_decode_only(exchange_info_payload):
+    check_baseline(
+        'exchange_info[stdlib-decode]', measure(lambda: json.loads(exchange_info_payload.decode())), gate=False,
+    )
+    check_baseline('exchange_info[orjson-decode]', measure(lambda: orjson.loads(exchange_info_payload)))
+
+
+# Символы, которыми реально торгуем
+WHITELIST = {'COIN7USDT', 'COIN100USDT', 'COIN2001USDT'}
+
+
+class ChunkedReader:
+    """
+    Тело ответа, которое приходит из сети кусками, как aiohttp StreamReader
+    """
+
+    def __init__(self, data: bytes, chunk_size: int = 64 * 1024) -> None:
+        self._data = data
+        self._chunk_size = chunk_size
+        self._position = 0
+
+    async def read(self, size: int = -1) -> bytes:
+        size = self._chunk_size if size < 0 else min(size, self._chunk_size)
+        chunk = self._data[self._position:self._position + size]
+        self._position += len(chunk)
+        return chunk
+
+
+async def _stream_whitelist(payload: bytes) -> ExchangeInfoResponse:
+    # То же, что DefaultBinanceConnector.request_items + BinanceClient._stream_exchange_info
+    items = [
+        item async for item in ijson.items(ChunkedReader(payload), 'symbols.item')
+        if item['symbol'] in WHITELIST
+    ]
+    return ExchangeInfoResponse.from_symbols([Symbol.parse_obj(item) for item in items])
+
+
+async def _read_full(payload: bytes) -> ExchangeInfoResponse:
+    # Без потокового разбора ответ сначала читается целиком
+    reader = ChunkedReader(payload)
+    chunks = []
+    while chunk := await reader.read():
+        chunks.append(chunk)
+    return ExchangeInfoResponse.construct_trusted(orjson.loads(b''.join(chunks)))
+
+
+def test_benchmark_exchange_info_stream_whitelist(exchange_info_payload):
+    check_baseline(
+        'exchange_info[stream-whitelist]',
+        measure(lambda: asyncio.run(_stream_whitelist(exchange_info_payload)), repeat=3),
+    )
+
+
+def test_exchange_info_stream_whitelist_peak_memory(exchange_info_payload):
+    peaks = {}
+    for name, parse in (('full', _read_full), ('stream', _stream_whitelist)):
+        tracemalloc.start()
+        exchange_info = asyncio.run(parse(exchange_info_payload))
+        peaks[name] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        assert exchange_info.get_symbol('COIN7USDT').lot_size_filter
+    assert peaks['stream'] * 10 < peaks['full'], peaks
@@ -0,0 +1,66 @@
+import asyncio
+import os
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+
+from source.api.orders.journal import OrderJournal
+from source.enums import OrderSide
+from tests.benchmarks.utils import ENABLED, Measurement, check_baseline, measure
+
+pytestmark = pytest.mark.skipif(not ENABLED, reason='Benchmarks are enabled with BENCHMARK=1')
+
+LADDER_SIZE = 100
+
+
+async def _journal_ladder(journal: OrderJournal, index: int) -> None:
+    ladder_id = f'{index:024x}'
+    plan = [(f'{ladder_id}-{order}', Decimal('27000.01'), Decimal('0.00123')) for order in range(LADDER_SIZE)]
+    await journal.plan(ladder_id, 'BTCUSDT', OrderSide.BUY, plan)
+    for order in range(LADDER_SIZE):
+        journal.ack(f'{ladder_id}-{order}', order_id=order)
+    journal.complete(ladder_id)
+    await journal.flush()
+
+
+def _measure_ladder(path: Path, fsync: bool) -> float:
+    async def _run() -> float:
+        journal = OrderJournal(str(path), fsync=fsync)
+        journal.start()
+        counter = iter(range(10 ** 9))
+        loop = asyncio.get_running_loop()
+        try:
+            started_at = loop.time()
+            for _ in range(20):
+                await _journal_ladder(journal, next(counter))
+            return (loop.time() - started_at) / 20
+        finally:
+            await journal.stop()
+            os.unlink(path)
+    return asyncio.run(_run())
+
+
+def test_benchmark_journal_ack():
+    """
+    Стоимость ack на event loop: запись уходит в буфер, write и fsync делает фоновая задача
+    """
+    async def _run() -> Measurement:
+        journal = OrderJournal(os.devnull, fsync=False)
+        journal.start()
+        try:
+            return measure(lambda: journal.ack('0123456789abcdef01234567-42', order_id=42))
+        finally:
+            journal._buffer.clear()
+            await journal.stop()
+    check_baseline('journal_ack', asyncio.run(_run()))
+
+
+@pytest.mark.parametrize('fsync', [False, True])
+def test_benchmark_journal_ladder(tmp_path, fsync):
+    """
+    План, ack и done лесенки из LADDER_SIZE ордеров с ожиданием записи на диск
+    """
+    seconds = min(_measure_ladder(tmp_path / 'orders.journal', fsync) for _ in range(3))
+    # Время определяется диском и потоком записи, а не CPU, отношение к эталонной нагрузке не показательно
+    check_baseline(f'journal_ladder[{LADDER_SIZE}-fsync={fsync}]', seconds, gate=False)
@@ -0,0 +1,27 @@
+import pytest
+
+from source.metrics import BINANCE_REQUEST_SECONDS, ORDER_PHASE_SECONDS
+from tests.benchmarks.utils import ENABLED, check_baseline, measure
+
+pytestmark = pytest.mark.skipif(not ENABLED, reason='Benchmarks are enabled with BENCHMARK=1')
+
+
+def test_benchmark_metrics_request_observe():
+    """
+    Наблюдение запроса в connector: выбор дочерней метрики по меткам и observe
+    """
+    def _observe() -> None:
+        BINANCE_REQUEST_SECONDS.labels('/api/v3/order', 'POST', '200').observe(0.012)
+
+    check_baseline('metrics_request_observe', measure(_observe))
+
+
+def test_benchmark_metrics_phase_timer():
+    """
+    Таймер этапа create_order_handler
+    """
+    def _phase() -> None:
+        with ORDER_PHASE_SECONDS.labels('planning').time():
+            pass
+
+    check_baseline('metrics_phase_timer', measure(_phase))
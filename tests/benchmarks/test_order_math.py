@@ -0,0 +1,94 @@
+import random
+from decimal import Decimal
+
+import pytest
+
+from source.api.orders.handlers import prices
+from source.api.orders.handlers.create_order import _calculate_lots, _calculate_min_quantity, _jitter_lots
+from source.api.orders.handlers.prices import PRICE_DISTRIBUTIONS
+from tests.benchmarks.utils import ENABLED, SYMBOLS, SymbolParams, check_baseline, measure
+
+pytestmark = pytest.mark.skipif(not ENABLED, reason='Benchmarks are enabled with BENCHMARK=1')
+
+NUMBERS = [1, 10, 100, 1000, 10000]
+
+# Во сколько раз volume больше минимально возможного объема лесенки
+VOLUME_FACTORS = [Decimal('1.5'), Decimal(1000)]
+
+
+def _ladder(symbol: SymbolParams, number: int):
+    price_min = symbol.price * Decimal('0.9')
+    price_max = symbol.price * Decimal('1.1')
+    min_quantity = _calculate_min_quantity(symbol.min_notional, price_min, symbol.step_size)
+    rnd = random.Random(number)
+    prices = [
+        (price_min + (price_max - price_min) * Decimal(rnd.random())).quantize(symbol.tick_size)
+        for _ in range(number)
+    ]
+    return prices, min_quantity
+
+
+@pytest.mark.parametrize('symbol', SYMBOLS, ids=lambda symbol: symbol.name)
+@pytest.mark.parametrize('number', NUMBERS)
+@pytest.mark.parametrize('backend', ['numpy', 'python'])
+def test_benchmark_generate_prices(monkeypatch, symbol, number, backend):
+    if backend == 'numpy':
+        pytest.importorskip('numpy')
+    else:
+        monkeypatch.setattr(prices, 'numpy', None)
+    price_min = symbol.price * Decimal('0.9')
+    price_max = symbol.price * Decimal('1.1')
+    check_baseline(
+        f'generate_prices[{symbol.name}-{number}-{backend}]',
+        measure(lambda: prices.generate_prices(price_min, price_max, symbol.tick_size, number, seed=1)),
+        # Без numpy - запасной вариант, оптимизированный путь - numpy
+        gate=backend == 'numpy',
+    )
+
+
+@pytest.mark.parametrize('symbol', SYMBOLS, ids=lambda symbol: symbol.name)
+@pytest.mark.parametrize('number', [100, 1000])
+@pytest.mark.parametrize('distribution', list(PRICE_DISTRIBUTIONS), ids=lambda distribution: distribution.value)
+def test_benchmark_generate_prices_distribution(symbol, number, distribution):
+    price_min = symbol.price * Decimal('0.9')
+    price_max = symbol.price * Decimal('1.1')
+    check_baseline(
+        f'generate_prices[{symbol.name}-{number}-{distribution.value}]',
+        measure(lambda: prices.generate_prices(
+            price_min, price_max, symbol.tick_size, number, seed=1, distribution=distribution,
+        )),
+    )
+
+
+@pytest.mark.parametrize('symbol', SYMBOLS, ids=lambda symbol: symbol.name)
+@pytest.mark.parametrize('number', NUMBERS)
+def test_benchmark_jitter_lots(symbol, number):
+    ladder_prices, min_quantity = _ladder(symbol, number)
+    volume = (sum(ladder_prices) * min_quantity * 1000).quantize(Decimal('0.01'))
+    lots = _calculate_lots(ladder_prices, min_quantity, symbol.step_size, volume)
+    check_baseline(
+        f'jitter_lots[{symbol.name}-{number}]',
+        measure(lambda: _jitter_lots(
+            ladder_prices, lots, min_quantity, symbol.step_size, Decimal(50), random.Random(1),
+        )),
+    )
+
+
+@pytest.mark.parametrize('symbol', SYMBOLS, ids=lambda symbol: symbol.name)
+@pytest.mark.parametrize('number', NUMBERS)
+@pytest.mark.parametrize('volume_factor', VOLUME_FACTORS, ids=str)
+def test_benchmark_calculate_lots(symbol, number, volume_factor):
+    prices, min_quantity = _ladder(symbol, number)
+    volume = (sum(prices) * min_quantity * volume_factor).quantize(Decimal('0.01'))
+    check_baseline(
+        f'calculate_lots[{symbol.name}-{number}-{volume_factor}]',
+        measure(lambda: _calculate_lots(prices, min_quantity, symbol.step_size, volume)),
+    )
+
+
+@pytest.mark.parametrize('symbol', SYMBOLS, ids=lambda symbol: symbol.name)
+def test_benchmark_calculate_min_quantity(symbol):
+    check_baseline(
+        f'calculate_min_quantity[{symbol.name}]',
+        measure(lambda: _calculate_min_quantity(symbol.min_notional, symbol.price, symbol.step_size)),
+    )
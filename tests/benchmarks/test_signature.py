@@ -0,0 +1,68 @@
+import hashlib
+import hmac
+from decimal import Decimal
+from urllib.parse import urlencode
+
+import pytest
+from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+
+from source.clients.binance.schemas.order.schemas import NewOrderRequest
+from source.clients.binance.signature import Ed25519Signer, HmacSigner, RsaSigner
+from source.enums import OrderSide, OrderType, TimeInForce
+from tests.benchmarks.utils import ENABLED, check_baseline, measure
+
+pytestmark = pytest.mark.skipif(not ENABLED, reason='Benchmarks are enabled with BENCHMARK=1')
+
+SECRET_KEY = 'NhqPtmdSJYdKjVHjA7PZj4Mge3R5YNiP1e3UZjInClVN65XAbvqqM6A7H5fATj0j'
+
+
+def _order(index: int) -> NewOrderRequest:
+    return NewOrderRequest(
+        symbol='BTCUSDT', side=OrderSide.BUY, type=OrderType.LIMIT, timeInForce=TimeInForce.GTC,
+        quantity=Decimal('0.00123'), price=Decimal(27000 + index),
+    )
+
+
+def _legacy_sign(request: NewOrderRequest) -> str:
+    # Подпись до HmacSigner: ключ кодируется на каждый вызов, запрос сериализуется дважды
+    request.signature = hmac.new(
+        key=bytes(SECRET_KEY, 'UTF-8'),
+        msg=urlencode(request.dict(exclude_none=True, exclude={'signature'})).encode(),
+        digestmod=hashlib.sha256,
+    ).hexdigest()
+    return urlencode(request.dict(exclude_none=True))
+
+
+def test_benchmark_sign_legacy():
+    request = _order(0)
+    check_baseline('sign_legacy', measure(lambda: _legacy_sign(request)), gate=False)
+
+
+def test_benchmark_sign_hmac_signer():
+    signer = HmacSigner(SECRET_KEY)
+    request = _order(0)
+    check_baseline('sign_hmac_signer', measure(lambda: signer.sign(request)))
+
+
+def test_benchmark_sign_many_hmac_signer():
+    signer = HmacSigner(SECRET_KEY)
+    requests = [_order(index) for index in range(100)]
+    check_baseline('sign_many_hmac_signer[100]', measure(lambda: signer.sign_many(requests)))
+
+
+def test_benchmark_hmac_signature_only():
+    signer = HmacSigner(SECRET_KEY)
+    payload = _order(0).to_query().encode()
+    check_baseline('hmac_signature', measure(lambda: signer.signature(payload)))
+
+
+def test_benchmark_sign_ed25519_signer():
+    signer = Ed25519Signer(ed25519.Ed25519PrivateKey.generate())
+    request = _order(0)
+    check_baseline('sign_ed25519_signer', measure(lambda: signer.sign(request)))
+
+
+def test_benchmark_sign_rsa_signer():
+    signer = RsaSigner(rsa.generate_private_key(public_exponent=65537, key_size=2048))
+    request = _order(0)
+    check_baseline('sign_rsa_signer', measure(lambda: signer.sign(request)))
@@ -0,0 +1,20 @@
+import pytest
+
+from source.tracing import tracing
+from tests.benchmarks.utils import ENABLED, check_baseline, measure
+
+pytestmark = pytest.mark.skipif(not ENABLED, reason='Benchmarks are enabled with BENCHMARK=1')
+
+
+def test_benchmark_tracing_disabled_span():
+    """
+    span при выключенной трассировке: проверка и общий nullcontext
+    """
+    assert not tracing.enabled
+
+    def _span() -> None:
+        with tracing.span('order.submit') as span:
+            if span is not None:
+                span.set_attribute('order.client_order_id', '0123456789abcdef01234567-42')
+
+    check_baseline('tracing_disabled_span', measure(_span))
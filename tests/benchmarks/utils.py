@@ -0,0 +1,129 @@
+import json
+import os
+import statistics
+import timeit
+from decimal import Decimal
+from pathlib import Path
+from typing import Callable, Dict, NamedTuple, Union
+
+from pydantic import BaseModel
+
+BASELINE_PATH = Path(__file__).parent / 'baseline.json'
+
+# Во сколько раз замер может быть медленнее baseline, прежде чем тест упадет
+MAX_REGRESSION = float(os.environ.get('BENCHMARK_MAX_REGRESSION', '0.25'))
+# Замеры быстрее этого не сравниваются с baseline: шум таймера и планировщика сравним с самим замером
+MIN_GATED_SECONDS = 10e-6
+UPDATE_BASELINE = bool(os.environ.get('BENCHMARK_UPDATE_BASELINE'))
+ENABLED = bool(os.environ.get('BENCHMARK')) or UPDATE_BASELINE
+
+
+class SymbolParams(BaseModel):
+    """
+    Параметры реальных символов Binance
+    """
+    name: str
+    price: Decimal
+    tick_size: Decimal
+    step_size: Decimal
+    min_notional: Decimal
+
+
+SYMBOLS = [
+    SymbolParams(
+        name='BTCUSDT',
+        price=Decimal('27000'),
+        tick_size=Decimal('0.01'),
+        step_size=Decimal('0.00001'),
+        min_notional=Decimal('5'),
+    ),
+    SymbolParams(
+        name='DOGEUSDT',
+        price=Decimal('0.07'),
+        tick_size=Decimal('0.00001'),
+        step_size=Decimal('1'),
+        min_notional=Decimal('5'),
+    ),
+]
+
+
+class Measurement(NamedTuple):
+    seconds: float
+    # Время в единицах эталонной нагрузки, см. calibration
+    relative: float
+
+
+def _number(timer: timeit.Timer, min_time: float) -> int:
+    number = 1
+    while timer.timeit(number) < min_time:
+        number *= 2
+    return number
+
+
+def _reference_workload() -> None:
+    value = Decimal('0.07')
+    for i in range(1000):
+        value = (value * Decimal('1.0001') + i).quantize(Decimal('0.000000'))
+
+
+_REFERENCE_TIMER = timeit.Timer(_reference_workload)
+
+
+def measure(func: Callable[[], object], repeat: int = 7, min_time: float = 0.05) -> Measurement:
+    """
+    Время одного вызова func в секундах и в единицах эталонной нагрузки.
+    Замеры func и эталонной нагрузки чередуются repeat раундов, результат - медиана по раундам.
+    Частота CPU и фоновая нагрузка меняются за время прогона, но в одном раунде влияют
+    на оба замера почти одинаково, поэтому отношение устойчивее абсолютного времени
+    """
+    timer = timeit.Timer(func)
+    number = _number(timer, min_time)
+    reference_number = _number(_REFERENCE_TIMER, min_time)
+    seconds, relative = [], []
+    for _ in range(repeat):
+        elapsed = timer.timeit(number) / number
+        seconds.append(elapsed)
+        relative.append(elapsed / (_REFERENCE_TIMER.timeit(reference_number) / reference_number))
+    return Measurement(statistics.median(seconds), statistics.median(relative))
+
+
+def calibration() -> float:
+    """
+    Время эталонной нагрузки на текущей машине. В baseline хранится отношение замера к нему,
+    чтобы сравнение меньше зависело от железа
+    """
+    timer_number = _number(_REFERENCE_TIMER, 0.05)
+    return min(_REFERENCE_TIMER.repeat(repeat=3, number=timer_number)) / timer_number
+
+
+def _load_baseline() -> Dict[str, float]:
+    if not BASELINE_PATH.exists():
+        return {}
+    return json.loads(BASELINE_PATH.read_text())
+
+
+def check_baseline(name: str, measurement: Union[Measurement, float], gate: bool = True) -> None:
+    """
+    Сравнение замера с baseline.json. С BENCHMARK_UPDATE_BASELINE=1 baseline перезаписывается
+    :param measurement: результат measure или время в секундах, которое сравнивается
+        с эталонной нагрузкой, измеренной сразу после него
+    :param gate: False для эталонных вариантов (stdlib, реализация до оптимизации) - они
+        записываются в baseline для сравнения, но регрессией не считаются.
+        Замеры быстрее MIN_GATED_SECONDS тоже не проверяются
+    """
+    if not isinstance(measurement, Measurement):
+        measurement = Measurement(measurement, measurement / calibration())
+    seconds, relative = measurement
+    baseline = _load_baseline()
+    if UPDATE_BASELINE:
+        baseline[name] = round(relative, 6)
+        BASELINE_PATH.write_text(json.dumps(dict(sorted(baseline.items())), indent=2) + '\n')
+        return
+    if not gate or seconds < MIN_GATED_SECONDS:
+        return
+    assert name in baseline, f'No baseline for {name}, run with BENCHMARK_UPDATE_BASELINE=1'
+    limit = baseline[name] * (1 + MAX_REGRESSION)
+    assert relative <= limit, (
+        f'{name}: {relative:.4f} calibration units ({seconds * 1e6:.1f}us) '
+        f'is slower than baseline {baseline[name]:.4f} by more than {MAX_REGRESSION:.0%}'
+    )
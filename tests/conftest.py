@@ -6,8 +6,10 @@ from fastapi.testclient import TestClient
 
 from source.api.app import app
 from source.api.orders.schemas import CreateOrderRequest
+from source.clients.binance.cache import ExchangeInfoCache
 from source.clients.binance.client import BinanceClient
 from source.clients.binance.schemas.market.schemas import Symbol
+from source.config import config
 from source.enums import OrderSide, OrderType, SymbolStatus
 
 
@@ -22,7 +24,19 @@ def binance_client():
 
 @pytest.fixture(scope='session')
 def fast_api_app():
-    return TestClient(app)
+    # Фоновая сверка часов меняла бы timestamp в тестах подписи
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(config, 'BINANCE_CLOCK_SYNC_INTERVAL', 0)
+        # Фоновое обновление кэша exchangeInfo ходило бы в сеть, на старте приложения
+        # оно не запускается, кэш заполняется по запросу
+        startup = pytest.MonkeyPatch()
+        startup.setattr(ExchangeInfoCache, 'start', lambda self: None)
+        try:
+            with TestClient(app) as client:
+                startup.undo()
+                yield client
+        finally:
+            startup.undo()
 
 
 @pytest.fixture(scope='function')
@@ -1,6 +1,19 @@
+from decimal import Decimal
 from http import HTTPStatus
 
+import aiohttp
+import httpx
 import pytest
+import pytest_asyncio
+
+from source.api.app import app
+from source.api.dependencies import get_binance_client, get_order_jobs
+from source.clients.binance.client import BinanceClient
+from source.clients.binance.clock import TIMESTAMP_OUTSIDE_RECV_WINDOW, server_clock
+from source.clients.binance.errors import BinanceHttpError
+from source.clients.binance.rate_limits import RateLimitGovernor
+from source.config import config
+from tests.stubs.binance import StubBinanceServer
 
 
 @pytest.mark.asyncio
@@ -26,3 +39,178 @@ async def test_create_order_bad_request(fast_api_app, volume, number, price_min,
     }
     response = fast_api_app.post(url='/order/create', json=request)
     assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+@pytest_asyncio.fixture
+async def stub_binance(monkeypatch):
+    async with StubBinanceServer() as server:
+        monkeypatch.setattr(config, 'BINANCE_API_URL', server.url)
+        client = BinanceClient(exchange_info_ttl=60)
+        app.dependency_overrides[get_binance_client] = lambda: client
+        try:
+            yield server
+        finally:
+            app.dependency_overrides.pop(get_binance_client, None)
+            await client.close()
+
+
+def _order_request(number: int) -> dict:
+    return {
+        'symbol': 'dogeusdt',
+        'volume': 50,
+        'number': number,
+        'amountDif': 1,
+        'side': 'SELL',
+        'priceMin': 0.068,
+        'priceMax': 0.078,
+    }
+
+
+@pytest.mark.asyncio
+async def test_create_order_stub_binance(stub_binance):
+    async with httpx.AsyncClient(app=app, base_url='http://test') as http:
+        response = await http.post(url='/order/create', json=_order_request(3))
+    assert response.status_code == HTTPStatus.OK
+    body = response.json()
+    assert body['success'] is True
+    assert [order['order_id'] for order in body['orders']] == [1, 2, 3]
+    assert len(stub_binance.orders) == 3
+    assert sum(Decimal(order['price']) * Decimal(order['origQty']) for order in stub_binance.orders) <= 50
+
+
+@pytest.mark.asyncio
+async def test_create_order_async_without_order_jobs(stub_binance):
+    # Очередь лесенок не запущена: синхронный режим работает, фоновый отвечает 503
+    app.dependency_overrides[get_order_jobs] = lambda: None
+    try:
+        async with httpx.AsyncClient(app=app, base_url='http://test') as http:
+            response = await http.post(url='/order/create', params={'async': 'true'}, json=_order_request(3))
+    finally:
+        app.dependency_overrides.pop(get_order_jobs, None)
+    assert response.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    assert stub_binance.orders == []
+
+
+@pytest.mark.asyncio
+async def test_create_order_stub_binance_price_distribution(stub_binance):
+    request = {**_order_request(3), 'priceDistribution': 'GAUSSIAN', 'seed': 7}
+    async with httpx.AsyncClient(app=app, base_url='http://test') as http:
+        response = await http.post(url='/order/create', json=request)
+    body = response.json()
+    assert body['success'] is True
+    prices = [Decimal(order['price']) for order in body['orders']]
+    assert prices == sorted(set(prices))
+    assert all(Decimal('0.068') <= price <= Decimal('0.078') for price in prices)
+    assert sum(Decimal(order['price']) * Decimal(order['origQty']) for order in stub_binance.orders) <= 50
+
+
+@pytest.mark.asyncio
+async def test_create_order_stub_binance_too_many_orders(stub_binance):
+    request = {**_order_request(3), 'priceMin': 0.07, 'priceMax': 0.07001, 'priceDistribution': 'LINEAR'}
+    async with httpx.AsyncClient(app=app, base_url='http://test') as http:
+        response = await http.post(url='/order/create', json=request)
+    assert response.json() == {'success': False, 'error': 'Too many orders for price range', 'orders': None}
+    assert stub_binance.orders == []
+
+
+@pytest.mark.asyncio
+async def test_create_order_stub_binance_order_error(stub_binance):
+    stub_binance.inject_error('/api/v3/order', code=-2010, msg='Account has insufficient balance for requested action.')
+    async with httpx.AsyncClient(app=app, base_url='http://test') as http:
+        response = await http.post(url='/order/create', json=_order_request(3))
+    body = response.json()
+    assert body['success'] is False
+    assert body['error'] == 'Failed to create 1 of 3 orders'
+    assert len(stub_binance.orders) == 2
+
+
+@pytest.mark.asyncio
+async def test_create_order_stub_binance_api_trading_locked(stub_binance):
+    stub_binance.api_trading_locked = True
+    async with httpx.AsyncClient(app=app, base_url='http://test') as http:
+        response = await http.post(url='/order/create', json=_order_request(3))
+    assert response.json() == {'success': False, 'error': 'API trading function is locked', 'orders': None}
+    assert stub_binance.orders == []
+
+
+@pytest.mark.asyncio
+async def test_create_order_stub_binance_rate_limited(monkeypatch):
+    async with StubBinanceServer(weight_limit=0) as server:
+        monkeypatch.setattr(config, 'BINANCE_API_URL', server.url)
+        # Свой governor, чтобы Retry-After не задержал остальные тесты
+        async with BinanceClient(governor=RateLimitGovernor(6000, 50, 160000)) as client:
+            with pytest.raises(aiohttp.ClientResponseError) as error:
+                await client.get_latest_price('dogeusdt')
+    assert error.value.status == HTTPStatus.TOO_MANY_REQUESTS
+    assert error.value.headers['Retry-After'] == '1'
+
+
+@pytest.mark.asyncio
+async def test_stub_binance_server_clock_offset(monkeypatch):
+    monkeypatch.setattr(server_clock, 'offset', 0)
+    async with StubBinanceServer(time_offset=-20000) as server:
+        monkeypatch.setattr(config, 'BINANCE_API_URL', server.url)
+        async with BinanceClient() as client:
+            with pytest.raises(BinanceHttpError) as error:
+                await client.get_api_trading_status()
+            assert error.value.code == TIMESTAMP_OUTSIDE_RECV_WINDOW
+            await server_clock.sync(client.get_server_time)
+            assert abs(server_clock.offset + 20000) < 100
+            response = await client.get_api_trading_status()
+    assert response.data.isLocked is False
+
+
+@pytest.mark.asyncio
+async def test_create_order_stub_binance_lost_order_response(stub_binance):
+    stub_binance.lost_order_responses = 2
+    async with httpx.AsyncClient(app=app, base_url='http://test') as http:
+        response = await http.post(url='/order/create', json=_order_request(3))
+    body = response.json()
+    assert body['success'] is True
+    # Ордера с потерянным ответом найдены по newClientOrderId, дублей нет
+    assert len(stub_binance.orders) == 3
+    assert [order['client_order_id'] for order in body['orders']] == [
+        order['clientOrderId'] for order in stub_binance.orders
+    ]
+    assert ('GET', '/api/v3/order') in stub_binance.requests
+
+
+@pytest.mark.asyncio
+async def test_stub_binance_exchange_info_whitelist(monkeypatch):
+    async with StubBinanceServer() as server:
+        monkeypatch.setattr(config, 'BINANCE_API_URL', server.url)
+        async with BinanceClient(exchange_info_ttl=60, exchange_info_whitelist=['dogeusdt']) as client:
+            app.dependency_overrides[get_binance_client] = lambda: client
+            try:
+                async with httpx.AsyncClient(app=app, base_url='http://test') as http:
+                    doge = await http.post(url='/order/create', json=_order_request(2))
+                    btc = await http.post(url='/order/create', json={**_order_request(2), 'symbol': 'btcusdt'})
+            finally:
+                app.dependency_overrides.pop(get_binance_client, None)
+    assert doge.json()['success'] is True
+    # Символа нет в whitelist, значит нет и в кэше exchangeInfo
+    assert btc.json()['success'] is False
+    assert len(server.orders) == 2
+
+
+@pytest.mark.asyncio
+async def test_create_order_batch_stub_binance_unknown_symbol(monkeypatch):
+    async with StubBinanceServer() as server:
+        monkeypatch.setattr(config, 'BINANCE_API_URL', server.url)
+        # Без кэша exchangeInfo запрашивается на каждый батч
+        async with BinanceClient() as client:
+            app.dependency_overrides[get_binance_client] = lambda: client
+            try:
+                async with httpx.AsyncClient(app=app, base_url='http://test') as http:
+                    response = await http.post(url='/order/create-batch', json={'requests': [
+                        _order_request(2), {**_order_request(2), 'symbol': 'unknownusdt'},
+                    ]})
+            finally:
+                app.dependency_overrides.pop(get_binance_client, None)
+    body = response.json()
+    assert body['success'] is False
+    doge, unknown = body['results']
+    assert doge['symbol'] == 'DOGEUSDT'
+    assert doge['success'] is True
+    assert unknown == {'symbol': 'UNKNOWNUSDT', 'success': False, 'error': 'Not found trading symbol', 'orders': None}
+    assert len(server.orders) == 2
@@ -0,0 +1,116 @@
+import asyncio
+from http import HTTPStatus
+
+import httpx
+import pytest
+import pytest_asyncio
+
+from source.api.app import app
+from source.api.dependencies import get_binance_client, get_order_jobs
+from source.api.orders.jobs import CANCELLED, OrderJobManager
+from source.clients.binance.client import BinanceClient
+from source.config import config
+from tests.stubs.binance import StubBinanceServer
+
+
+def _order_request(number: int) -> dict:
+    return {
+        'symbol': 'dogeusdt',
+        'volume': 50 * number,
+        'number': number,
+        'amountDif': 1,
+        'side': 'SELL',
+        'priceMin': 0.068,
+        'priceMax': 0.078,
+    }
+
+
+@pytest_asyncio.fixture
+async def stub_binance(monkeypatch):
+    async with StubBinanceServer() as server:
+        monkeypatch.setattr(config, 'BINANCE_API_URL', server.url)
+        yield server
+
+
+@pytest_asyncio.fixture
+async def http(stub_binance, monkeypatch):
+    # Меньше ордеров в полете, чтобы задание можно было отменить посередине
+    monkeypatch.setattr(config, 'BINANCE_ORDERS_CONCURRENCY', 2)
+    async with BinanceClient(exchange_info_ttl=60) as client:
+        jobs = OrderJobManager(client, workers=1, queue_size=1)
+        jobs.start()
+        app.dependency_overrides[get_binance_client] = lambda: client
+        app.dependency_overrides[get_order_jobs] = lambda: jobs
+        try:
+            async with httpx.AsyncClient(app=app, base_url='http://test') as http:
+                yield http
+        finally:
+            app.dependency_overrides.pop(get_binance_client, None)
+            app.dependency_overrides.pop(get_order_jobs, None)
+            await jobs.stop()
+
+
+async def _wait_job(http: httpx.AsyncClient, job_id: str, status: str = 'DONE', timeout: float = 5) -> dict:
+    async def _wait() -> dict:
+        while True:
+            body = (await http.get(f'/order/jobs/{job_id}')).json()
+            if body['status'] == status:
+                return body
+            await asyncio.sleep(0.01)
+    return await asyncio.wait_for(_wait(), timeout)
+
+
+@pytest.mark.asyncio
+async def test_create_order_job(stub_binance, http):
+    response = await http.post(url='/order/create', params={'async': 'true'}, json=_order_request(3))
+    assert response.status_code == HTTPStatus.ACCEPTED
+    job = response.json()
+    assert job['status'] == 'QUEUED'
+    assert (job['total'], job['completed']) == (3, 0)
+    assert job['orders'] == [None] * 3
+
+    job = await _wait_job(http, job['job_id'])
+    assert (job['completed'], job['failed'], job['error']) == (3, 0, None)
+    assert [order['client_order_id'] for order in job['orders']] == [f'{job["job_id"]}-{index}' for index in range(3)]
+    assert sorted(order['order_id'] for order in job['orders']) == [1, 2, 3]
+    assert len(stub_binance.orders) == 3
+
+
+@pytest.mark.asyncio
+async def test_create_order_job_pre_trade_check_error(stub_binance, http):
+    stub_binance.api_trading_locked = True
+    response = await http.post(url='/order/create', params={'async': 'true'}, json=_order_request(5))
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {'success': False, 'error': 'API trading function is locked', 'orders': None}
+
+
+@pytest.mark.asyncio
+async def test_order_job_not_found(http):
+    assert (await http.get('/order/jobs/unknown')).status_code == HTTPStatus.NOT_FOUND
+    assert (await http.delete('/order/jobs/unknown')).status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.asyncio
+async def test_order_jobs_queue_full_and_cancel(stub_binance, http):
+    stub_binance.latency = 0.05
+    first = (await http.post(url='/order/create', params={'async': 'true'}, json=_order_request(8))).json()
+    await _wait_job(http, first['job_id'], status='RUNNING')
+    # Один worker занят, в очереди помещается одно задание
+    queued = (await http.post(url='/order/create', params={'async': 'true'}, json=_order_request(2))).json()
+    response = await http.post(url='/order/create', params={'async': 'true'}, json=_order_request(2))
+    assert response.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+
+    cancelled = (await http.delete(f'/order/jobs/{queued["job_id"]}')).json()
+    assert cancelled['status'] == 'CANCELLED'
+    assert [order['error'] for order in cancelled['orders']] == [CANCELLED] * 2
+
+    running = (await http.delete(f'/order/jobs/{first["job_id"]}')).json()
+    assert running['status'] == 'CANCELLED'
+    assert running['completed'] == 8
+    created = [order for order in running['orders'] if order['error'] is None]
+    assert 0 < len(created) < 8
+    assert all(order['error'] == CANCELLED for order in running['orders'] if order['order_id'] is None)
+    await asyncio.sleep(0.1)
+    # После отмены ордера не создаются, задание из очереди не запускается
+    assert len(stub_binance.orders) == len(created)
+    assert (await http.get(f'/order/jobs/{queued["job_id"]}')).json()['status'] == 'CANCELLED'
@@ -0,0 +1,124 @@
+from http import HTTPStatus
+
+import httpx
+import pytest
+import pytest_asyncio
+
+from source.api.app import app
+from source.api.dependencies import get_binance_client, get_order_jobs
+from source.api.orders.jobs import OrderJobManager
+from source.clients.binance.client import BinanceClient
+from source.config import config
+from source.tracing import tracing
+from tests.stubs.binance import StubBinanceServer
+
+in_memory_span_exporter = pytest.importorskip('opentelemetry.sdk.trace.export.in_memory_span_exporter')
+
+TRACE_ID = '0af7651916cd43dd8448eb211c80319c'
+
+
+@pytest.fixture
+def spans():
+    exporter = in_memory_span_exporter.InMemorySpanExporter()
+    tracing.setup(exporter=exporter)
+    try:
+        yield exporter
+    finally:
+        tracing.shutdown()
+
+
+@pytest_asyncio.fixture
+async def http(monkeypatch):
+    async with StubBinanceServer() as server:
+        monkeypatch.setattr(config, 'BINANCE_API_URL', server.url)
+        async with BinanceClient(exchange_info_ttl=60) as client:
+            app.dependency_overrides[get_binance_client] = lambda: client
+            app.dependency_overrides[get_order_jobs] = lambda: OrderJobManager(client)
+            try:
+                async with httpx.AsyncClient(app=app, base_url='http://test') as http:
+                    yield http
+            finally:
+                app.dependency_overrides.pop(get_binance_client, None)
+                app.dependency_overrides.pop(get_order_jobs, None)
+
+
+@pytest.mark.asyncio
+async def test_create_order_trace(spans, http):
+    response = await http.post(
+        url='/order/create',
+        json={
+            'symbol': 'dogeusdt',
+            'volume': 100,
+            'number': 2,
+            'amountDif': 1,
+            'side': 'SELL',
+            'priceMin': 0.068,
+            'priceMax': 0.078,
+        },
+        headers={'traceparent': f'00-{TRACE_ID}-b7ad6b7169203331-01'},
+    )
+    assert response.json()['success'] is True
+
+    finished = spans.get_finished_spans()
+    # Все span одной трассы, корневой продолжает трассу из traceparent
+    assert {format(span.context.trace_id, '032x') for span in finished} == {TRACE_ID}
+    (root,) = [span for span in finished if span.name == 'POST /order/create']
+    assert root.attributes['http.route'] == '/order/create'
+    assert root.attributes['http.status_code'] == HTTPStatus.OK
+    by_name = {}
+    for span in finished:
+        by_name.setdefault(span.name, []).append(span)
+    for name in ('order.checks', 'order.price_range', 'order.planning', 'order.submission'):
+        (span,) = by_name[name]
+        assert span.parent.span_id == root.context.span_id
+    (planning,) = by_name['order.planning']
+    assert planning.attributes['order.number'] == 2
+    for name in ('order.calculate_prices', 'order.calculate_lots'):
+        assert by_name[name][0].parent.span_id == planning.context.span_id
+
+    (submission,) = by_name['order.submission']
+    submits = by_name['order.submit']
+    assert len(submits) == 2
+    assert all(span.parent.span_id == submission.context.span_id for span in submits)
+    orders = by_name['binance POST /api/v3/order']
+    assert {span.parent.span_id for span in orders} == {span.context.span_id for span in submits}
+    assert orders[0].attributes['http.method'] == 'POST'
+    assert orders[0].attributes['http.url'] == config.get_binance_api('/api/v3/order')
+    assert orders[0].attributes['http.status_code'] == HTTPStatus.OK
+    assert orders[0].attributes['http.response_content_length'] > 0
+    assert 'binance.rate_limit_wait_ms' in orders[0].attributes
+    for name in ('binance GET /sapi/v1/account/apiTradingStatus', 'binance GET /api/v3/ticker/price'):
+        assert by_name[name][0].parent.span_id == root.context.span_id
+
+
+@pytest.mark.asyncio
+async def test_binance_error_trace(spans, http):
+    response = await http.post(
+        url='/order/create',
+        json={
+            'symbol': 'unknown',
+            'volume': 100,
+            'number': 2,
+            'amountDif': 1,
+            'side': 'SELL',
+            'priceMin': 0.068,
+            'priceMax': 0.078,
+        },
+    )
+    assert response.json()['success'] is False
+    by_name = {span.name: span for span in spans.get_finished_spans()}
+    price = by_name['binance GET /api/v3/ticker/price']
+    assert price.attributes['http.status_code'] == HTTPStatus.BAD_REQUEST
+    assert price.attributes['binance.error'] == '-1121'
+    assert not price.status.is_ok
+    assert not by_name['order.checks'].status.is_ok
+    assert 'order.planning' not in by_name
+
+
+@pytest.mark.asyncio
+async def test_tracing_disabled(http):
+    assert not tracing.enabled
+    with tracing.span('order.checks') as span:
+        assert span is None
+    response = await http.get('/order/jobs/unknown')
+    assert response.status_code == HTTPStatus.NOT_FOUND
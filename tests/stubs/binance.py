@@ -0,0 +1,312 @@
+import asyncio
+import json
+import random
+import time
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, DefaultDict, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl
+
+from aiohttp import web
+
+DEFAULT_SYMBOLS = [
+    {
+        'symbol': 'BTCUSDT',
+        'status': 'TRADING',
+        'orderTypes': ['LIMIT', 'LIMIT_MAKER', 'MARKET', 'STOP_LOSS_LIMIT', 'TAKE_PROFIT_LIMIT'],
+        'quoteOrderQtyMarketAllowed': True,
+        'isSpotTradingAllowed': True,
+        'permissions': ['SPOT', 'MARGIN'],
+        'filters': [
+            {'filterType': 'PRICE_FILTER', 'minPrice': '0.01', 'maxPrice': '1000000.00', 'tickSize': '0.01'},
+            {'filterType': 'LOT_SIZE', 'minQty': '0.00001', 'maxQty': '9000.00', 'stepSize': '0.00001'},
+            {'filterType': 'ICEBERG_PARTS', 'limit': 10},
+            {'filterType': 'MARKET_LOT_SIZE', 'minQty': '0.00', 'maxQty': '120.00', 'stepSize': '0.00'},
+            {
+                'filterType': 'TRAILING_DELTA',
+                'minTrailingAboveDelta': 10,
+                'maxTrailingAboveDelta': 2000,
+                'minTrailingBelowDelta': 10,
+                'maxTrailingBelowDelta': 2000,
+            },
+            {
+                'filterType': 'PERCENT_PRICE_BY_SIDE',
+                'bidMultiplierUp': '5',
+                'bidMultiplierDown': '0.2',
+                'askMultiplierUp': '5',
+                'askMultiplierDown': '0.2',
+                'avgPriceMins': 5,
+            },
+            {
+                'filterType': 'NOTIONAL',
+                'minNotional': '5.00',
+                'applyMinToMarket': True,
+                'maxNotional': '9000000.00',
+                'applyMaxToMarket': False,
+                'avgPriceMins': 5,
+            },
+            {'filterType': 'MAX_NUM_ORDERS', 'maxNumOrders': 200},
+            {'filterType': 'MAX_NUM_ALGO_ORDERS', 'maxNumAlgoOrders': 5},
+        ],
+    },
+    {
+        'symbol': 'DOGEUSDT',
+        'status': 'TRADING',
+        'orderTypes': ['LIMIT', 'LIMIT_MAKER', 'MARKET', 'STOP_LOSS_LIMIT', 'TAKE_PROFIT_LIMIT'],
+        'quoteOrderQtyMarketAllowed': True,
+        'isSpotTradingAllowed': True,
+        'permissions': ['SPOT', 'MARGIN'],
+        'filters': [
+            {'filterType': 'PRICE_FILTER', 'minPrice': '0.00001', 'maxPrice': '1000.00', 'tickSize': '0.00001'},
+            {'filterType': 'LOT_SIZE', 'minQty': '1.00', 'maxQty': '9000000.00', 'stepSize': '1.00'},
+            {'filterType': 'ICEBERG_PARTS', 'limit': 10},
+            {
+                'filterType': 'PERCENT_PRICE_BY_SIDE',
+                'bidMultiplierUp': '5',
+                'bidMultiplierDown': '0.2',
+                'askMultiplierUp': '5',
+                'askMultiplierDown': '0.2',
+                'avgPriceMins': 5,
+            },
+            {
+                'filterType': 'NOTIONAL',
+                'minNotional': '5.00',
+                'applyMinToMarket': True,
+                'maxNotional': '9000000.00',
+                'applyMaxToMarket': False,
+                'avgPriceMins': 5,
+            },
+            {'filterType': 'MAX_NUM_ORDERS', 'maxNumOrders': 200},
+        ],
+    },
+]
+
+DEFAULT_PRICES = {
+    'BTCUSDT': '27000.00',
+    'DOGEUSDT': '0.07000',
+}
+
+# Вес запросов, https://binance-docs.github.io/apidocs/spot/en/#limits
+REQUEST_WEIGHTS = {
+    '/api/v3/exchangeInfo': 20,
+    '/api/v3/ticker/price': 2,
+    '/sapi/v1/account/apiTradingStatus': 1,
+    '/api/v3/order': 1,
+    '/api/v3/time': 1,
+}
+
+SIGNED_PATHS = {'/sapi/v1/account/apiTradingStatus', '/api/v3/order'}
+
+Handler = Callable[[web.Request], Awaitable[web.StreamResponse]]
+
+
+class StubBinanceServer:
+    """
+    Локальная замена REST API Binance на aiohttp.
+
+    - latency: задержка перед каждым ответом в секундах
+    - weight_limit / order_limit_10s: лимиты, при превышении которых отдается 429 с Retry-After,
+      текущие значения возвращаются в заголовках X-MBX-USED-WEIGHT-1M и X-MBX-ORDER-COUNT-10S
+    - inject_error / error_rate: ошибки Binance для конкретного пути
+    - lost_order_responses: сколько следующих ордеров создать, но ответить 503,
+      как будто ответ потерялся по дороге
+    - listen_keys: действующие listenKey для user data stream, keepalives - сколько раз их продлевали
+    - time_offset: на сколько миллисекунд часы сервера отличаются от локальных,
+      timestamp подписанных запросов проверяется как в Binance (ошибка -1021)
+    """
+
+    def __init__(
+            self,
+            symbols: Optional[List[Dict[str, Any]]] = None,
+            prices: Optional[Dict[str, str]] = None,
+            latency: float = 0,
+            weight_limit: int = 6000,
+            order_limit_10s: int = 100,
+            error_rate: float = 0,
+            seed: Optional[int] = None,
+            time_offset: int = 0,
+    ) -> None:
+        self.symbols = symbols if symbols is not None else DEFAULT_SYMBOLS
+        self.prices = prices if prices is not None else dict(DEFAULT_PRICES)
+        self.latency = latency
+        self.weight_limit = weight_limit
+        self.order_limit_10s = order_limit_10s
+        self.error_rate = error_rate
+        self.time_offset = time_offset
+        self.requests: List[Tuple[str, str]] = []
+        self.orders: List[Dict[str, Any]] = []
+        self.api_trading_locked = False
+        self.lost_order_responses = 0
+        self.listen_keys: List[str] = []
+        self.keepalives = 0
+        self.listen_keys_created = 0
+        self._random = random.Random(seed)
+        self._errors: DefaultDict[str, List[Tuple[int, Dict[str, Any]]]] = defaultdict(list)
+        self._weight_window: Tuple[int, int] = (0, 0)
+        self._orders_window: Tuple[int, int] = (0, 0)
+        self._runner: Optional[web.AppRunner] = None
+        self.url = ''
+
+    def inject_error(
+            self,
+            path: str,
+            status: int = 400,
+            code: int = -1,
+            msg: str = 'Injected error',
+            times: int = 1,
+    ) -> None:
+        """
+        Следующие times запросов к path завершатся ошибкой Binance
+        """
+        self._errors[path].extend([(status, {'code': code, 'msg': msg})] * times)
+
+    @staticmethod
+    def _count(window: Tuple[int, int], period: int, value: int) -> Tuple[int, int]:
+        current = int(time.monotonic() // period)
+        started, used = window
+        return (current, value) if started != current else (current, used + value)
+
+    def _json(self, payload: Any, status: int = 200, headers: Optional[Dict[str, str]] = None) -> web.Response:
+        return web.Response(text=json.dumps(payload), status=status, content_type='application/json', headers=headers)
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler: Handler) -> web.StreamResponse:
+        self.requests.append((request.method, request.path))
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        weight = REQUEST_WEIGHTS.get(request.path, 1)
+        self._weight_window = self._count(self._weight_window, 60, weight)
+        headers = {'X-MBX-USED-WEIGHT-1M': str(self._weight_window[1])}
+        is_order = request.method == 'POST' and request.path == '/api/v3/order'
+        if is_order:
+            self._orders_window = self._count(self._orders_window, 10, 1)
+            headers['X-MBX-ORDER-COUNT-10S'] = str(self._orders_window[1])
+        if self._weight_window[1] > self.weight_limit or (is_order and self._orders_window[1] > self.order_limit_10s):
+            headers['Retry-After'] = '1'
+            return self._json({'code': -1003, 'msg': 'Too many requests.'}, status=429, headers=headers)
+        if request.path in SIGNED_PATHS and not await self._check_timestamp(request):
+            payload = {'code': -1021, 'msg': 'Timestamp for this request is outside of the recvWindow.'}
+            return self._json(payload, status=400, headers=headers)
+        if self._errors[request.path]:
+            status, payload = self._errors[request.path].pop(0)
+            return self._json(payload, status=status, headers=headers)
+        if self.error_rate and self._random.random() < self.error_rate:
+            return self._json({'code': -1000, 'msg': 'An unknown error occurred.'}, status=500, headers=headers)
+        response = await handler(request)
+        response.headers.update(headers)
+        return response
+
+    def _server_time(self) -> int:
+        return int(time.time() * 1000) + self.time_offset
+
+    async def _check_timestamp(self, request: web.Request) -> bool:
+        params = dict(request.query)
+        params.update(parse_qsl(await request.text()))
+        if 'timestamp' not in params:
+            return True
+        timestamp = int(params['timestamp'])
+        server_time = self._server_time()
+        return timestamp < server_time + 1000 and server_time - timestamp <= int(params.get('recvWindow', 5000))
+
+    async def _time(self, request: web.Request) -> web.Response:
+        return self._json({'serverTime': self._server_time()})
+
+    async def _exchange_info(self, request: web.Request) -> web.Response:
+        if 'symbol' in request.query:
+            names = {request.query['symbol']}
+        elif 'symbols' in request.query:
+            names = set(json.loads(request.query['symbols']))
+        else:
+            return self._json({'symbols': self.symbols})
+        symbols = [symbol for symbol in self.symbols if symbol['symbol'] in names]
+        # Как и Binance, отвечаем ошибкой на весь запрос, если неизвестен хотя бы один символ
+        if len(symbols) < len(names):
+            return self._json({'code': -1121, 'msg': 'Invalid symbol.'}, status=400)
+        return self._json({'symbols': symbols})
+
+    async def _ticker_price(self, request: web.Request) -> web.Response:
+        symbol = request.query.get('symbol', '')
+        if symbol not in self.prices:
+            return self._json({'code': -1121, 'msg': 'Invalid symbol.'}, status=400)
+        return self._json({'symbol': symbol, 'price': self.prices[symbol]})
+
+    async def _api_trading_status(self, request: web.Request) -> web.Response:
+        return self._json({'data': {'isLocked': self.api_trading_locked}})
+
+    def _find_order(self, symbol: str, client_order_id: str) -> Optional[Dict[str, Any]]:
+        for order in self.orders:
+            if order['symbol'] == symbol and order['clientOrderId'] == client_order_id:
+                return order
+        return None
+
+    async def _query_order(self, request: web.Request) -> web.Response:
+        order = self._find_order(request.query.get('symbol', ''), request.query.get('origClientOrderId', ''))
+        if order is None:
+            return self._json({'code': -2013, 'msg': 'Order does not exist.'}, status=400)
+        return self._json({**order, 'time': order['transactTime']})
+
+    async def _new_order(self, request: web.Request) -> web.Response:
+        # Клиент отправляет тело без Content-Type application/x-www-form-urlencoded
+        data = dict(parse_qsl(await request.text()))
+        if 'newClientOrderId' in data and self._find_order(data['symbol'], data['newClientOrderId']):
+            return self._json({'code': -2010, 'msg': 'Duplicate order sent.'}, status=400)
+        order = {
+            'symbol': data['symbol'],
+            'orderId': len(self.orders) + 1,
+            'clientOrderId': data.get('newClientOrderId', f'stub-{len(self.orders) + 1}'),
+            'transactTime': self._server_time(),
+            'price': data.get('price', '0'),
+            'origQty': data.get('quantity', '0'),
+            'executedQty': '0',
+            'status': 'NEW',
+            'timeInForce': data.get('timeInForce', 'GTC'),
+            'type': data['type'],
+            'side': data['side'],
+        }
+        self.orders.append(order)
+        if self.lost_order_responses:
+            self.lost_order_responses -= 1
+            return self._json({'code': -1001, 'msg': 'Internal error; unable to process your request.'}, status=503)
+        return self._json(order)
+
+    async def _create_listen_key(self, request: web.Request) -> web.Response:
+        self.listen_keys_created += 1
+        self.listen_keys.append(f'stub-listen-key-{self.listen_keys_created}')
+        return self._json({'listenKey': self.listen_keys[-1]})
+
+    async def _keepalive_listen_key(self, request: web.Request) -> web.Response:
+        if request.query.get('listenKey') not in self.listen_keys:
+            return self._json({'code': -1125, 'msg': 'This listenKey does not exist.'}, status=400)
+        self.keepalives += 1
+        return self._json({})
+
+    async def _close_listen_key(self, request: web.Request) -> web.Response:
+        if request.query.get('listenKey') not in self.listen_keys:
+            return self._json({'code': -1125, 'msg': 'This listenKey does not exist.'}, status=400)
+        self.listen_keys.remove(request.query['listenKey'])
+        return self._json({})
+
+    def _create_app(self) -> web.Application:
+        app = web.Application(middlewares=[self._middleware])
+        app.router.add_get('/api/v3/time', self._time)
+        app.router.add_get('/api/v3/exchangeInfo', self._exchange_info)
+        app.router.add_get('/api/v3/ticker/price', self._ticker_price)
+        app.router.add_get('/sapi/v1/account/apiTradingStatus', self._api_trading_status)
+        app.router.add_get('/api/v3/order', self._query_order)
+        app.router.add_post('/api/v3/order', self._new_order)
+        app.router.add_post('/api/v3/userDataStream', self._create_listen_key)
+        app.router.add_put('/api/v3/userDataStream', self._keepalive_listen_key)
+        app.router.add_delete('/api/v3/userDataStream', self._close_listen_key)
+        return app
+
+    async def __aenter__(self) -> 'StubBinanceServer':
+        self._runner = web.AppRunner(self._create_app())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, '127.0.0.1', 0)
+        await site.start()
+        host, port = site._server.sockets[0].getsockname()[:2]  # type:ignore
+        self.url = f'http://{host}:{port}'
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        assert self._runner is not None
+        await self._runner.cleanup()
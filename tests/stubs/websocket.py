@@ -0,0 +1,71 @@
+import asyncio
+import json
+from typing import Any, List, Optional, Set
+
+from websockets.server import WebSocketServer, WebSocketServerProtocol, serve
+
+
+class StubWebSocketServer:
+    """
+    Локальная замена WebSocket серверу Binance.
+    Запоминает входящие сообщения и рассылает подключенным клиентам то, что передано в publish
+    """
+
+    def __init__(self) -> None:
+        self.received: List[Any] = []
+        self.connections: Set[WebSocketServerProtocol] = set()
+        self.paths: List[str] = []
+        self._server: Optional[WebSocketServer] = None
+        self._message_received = asyncio.Event()
+
+    @property
+    def url(self) -> str:
+        assert self._server is not None
+        host, port = list(self._server.sockets)[0].getsockname()[:2]
+        return f'ws://{host}:{port}'
+
+    async def _handler(self, websocket: WebSocketServerProtocol) -> None:
+        self.connections.add(websocket)
+        self.paths.append(websocket.path)
+        try:
+            async for message in websocket:
+                payload = json.loads(message)
+                self.received.append(payload)
+                self._message_received.set()
+                if isinstance(payload, dict) and 'method' in payload:
+                    await websocket.send(json.dumps({'result': None, 'id': payload.get('id')}))
+        finally:
+            self.connections.discard(websocket)
+
+    async def wait_for_message(self, count: int = 1, timeout: float = 2) -> None:
+        async def _wait() -> None:
+            while len(self.received) < count:
+                self._message_received.clear()
+                await self._message_received.wait()
+        await asyncio.wait_for(_wait(), timeout)
+
+    async def wait_for_connections(self, count: int = 1, timeout: float = 2) -> None:
+        async def _wait() -> None:
+            while len(self.connections) < count:
+                await asyncio.sleep(0.01)
+        await asyncio.wait_for(_wait(), timeout)
+
+    async def publish(self, payload: Any) -> None:
+        await self.publish_raw(json.dumps(payload))
+
+    async def publish_raw(self, message: str) -> None:
+        for websocket in list(self.connections):
+            await websocket.send(message)
+
+    async def disconnect_all(self) -> None:
+        for websocket in list(self.connections):
+            await websocket.close()
+
+    async def __aenter__(self) -> 'StubWebSocketServer':
+        self._server = await serve(self._handler, '127.0.0.1', 0)
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        assert self._server is not None
+        self._server.close()
+        await self._server.wait_closed()
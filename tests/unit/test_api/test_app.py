@@ -0,0 +1,73 @@
+from typing import Any
+
+from source.api.app import app
+from source.api.dependencies import get_binance_client
+from source.clients.binance.client import BinanceClient
+from source.clients.binance.connector import BinanceConnectorAbstract
+from source.clients.binance.schemas.wallet.schemas import APITradingStatus, APITradingStatusResponse
+
+
+class LockedTradingStatusConnector(BinanceConnectorAbstract):
+
+    def __init__(self) -> None:
+        self.paths = []
+
+    async def close(self) -> None:
+        ...
+
+    async def request(self, path, method, response_model, body=None, params=None, **kwargs: Any):
+        self.paths.append(path)
+        return APITradingStatusResponse(data=APITradingStatus(isLocked=True))
+
+
+def test_app_binance_client_lifecycle(fast_api_app):
+    assert isinstance(app.state.binance_client, BinanceClient)
+
+
+def test_app_binance_client_custom_connector(fast_api_app):
+    connector = LockedTradingStatusConnector()
+    app.dependency_overrides[get_binance_client] = lambda: BinanceClient(connector=connector)
+    try:
+        response = fast_api_app.post(
+            url='/order/create',
+            json={
+                'symbol': 'btcusdt',
+                'volume': 100,
+                'number': 2,
+                'amountDif': 5,
+                'side': 'BUY',
+                'priceMin': 2,
+                'priceMax': 5,
+            },
+        )
+    finally:
+        app.dependency_overrides.clear()
+    assert response.json() == {'success': False, 'error': 'API trading function is locked', 'orders': None}
+    assert '/sapi/v1/account/apiTradingStatus' in connector.paths
+
+
+def test_app_metrics(fast_api_app):
+    app.dependency_overrides[get_binance_client] = lambda: BinanceClient(connector=LockedTradingStatusConnector())
+    try:
+        fast_api_app.post(
+            url='/order/create',
+            json={
+                'symbol': 'btcusdt',
+                'volume': 100,
+                'number': 2,
+                'amountDif': 5,
+                'side': 'BUY',
+                'priceMin': 2,
+                'priceMax': 5,
+            },
+        )
+    finally:
+        app.dependency_overrides.clear()
+    response = fast_api_app.get('/metrics')
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('text/plain')
+    assert 'order_phase_seconds_count{phase="checks"}' in response.text
+    assert 'order_errors_total{error="API trading function is locked",stage="pre_trade"}' in response.text
+    assert 'binance_governor_requests_total' in response.text
+    assert 'binance_clock_offset_ms' in response.text
+    assert 'exchange_info_cache_hits_total' in response.text
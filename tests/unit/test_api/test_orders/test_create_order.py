@@ -1,4 +1,6 @@
 import datetime
+import logging
+import random
 import re
 from decimal import Decimal
 
@@ -8,20 +10,27 @@ from aioresponses import aioresponses
 
 from source.api.orders.handlers.create_order import (
     _calculate_lots,
-    _calculate_price,
     _get_price_range,
+    _jitter_lots,
+    create_order_batch_handler,
     create_order_handler,
+    submit_orders,
 )
 from source.api.orders.handlers.errors import TooLowRequestedVolumeError, WrongPriceRangeError
-from source.api.orders.schemas import CreateOrderResponse
+from source.api.orders.schemas import CreateOrderBatchRequest, CreateOrderData, CreateOrderResponse
 from source.clients.binance.schemas.market.schemas import ExchangeInfoResponse
 from source.clients.binance.schemas.wallet.schemas import APITradingStatus, APITradingStatusResponse
+from source.config import config
 from source.enums import OrderSide, OrderType, SymbolStatus
-from tests.unit.test_api.test_orders.utils import get_parametrize_for_calculate_lots_test
+from source.metrics import registry
+from tests.unit.test_api.test_orders.utils import (
+    get_parametrize_for_calculate_lots_test,
+    get_parametrize_for_filled_volume_test,
+)
 
 
 def mock_exchange_info_response(mock: aioresponses, payload: ExchangeInfoResponse) -> None:
-    mock.get(url=re.compile(r'.+exchangeInfo.+$'), body=payload.json())
+    mock.get(url=re.compile(r'.+exchangeInfo.*$'), body=payload.json())
 
 
 def mock_api_trading_status_response(mock: aioresponses, status: bool = False) -> None:
@@ -54,6 +63,32 @@ async def test_create_order_handler_exchange_info_error(
     assert response == CreateOrderResponse(success=False, error=error)
 
 
+@pytest.mark.asyncio
+async def test_create_order_handler_wrong_price_range(
+        binance_client, binance_exchange_info_symbol, create_order_request, monkeypatch,
+):
+    monkeypatch.setattr(
+        target=binance_exchange_info_symbol,
+        name='filters',
+        value=[
+            {
+                'filterType': 'PERCENT_PRICE_BY_SIDE',
+                'bidMultiplierUp': '5',
+                'bidMultiplierDown': '0.2',
+                'askMultiplierUp': '5',
+                'askMultiplierDown': '0.2',
+                'avgPriceMins': 5,
+            },
+        ],
+    )
+    with aioresponses() as mock:
+        mock_exchange_info_response(mock, ExchangeInfoResponse(symbols=[binance_exchange_info_symbol]))
+        mock_api_trading_status_response(mock)
+        mock.get(url=re.compile(r'.+/api/v3/ticker/price.+'), payload={'symbol': 'BTCUSDT', 'price': 100})
+        response = await create_order_handler(create_order_request, binance_client)
+    assert response == CreateOrderResponse(success=False, error='Wrong price range')
+
+
 @pytest.mark.asyncio
 async def test_create_order_handler_api_status_disabled(binance_client, create_order_request):
     with aioresponses() as mock:
@@ -74,6 +109,70 @@ def test_calculate_lots(prices, min_quantity, step, volume, expected_lots):
     assert actual_lots == expected_lots
 
 
+@pytest.mark.parametrize(
+    'prices, min_quantity, step, volume, min_filled_volume',
+    get_parametrize_for_filled_volume_test(),
+)
+def test_calculate_lots_filled_volume(prices, min_quantity, step, volume, min_filled_volume):
+    lots = _calculate_lots(prices, min_quantity, step, volume)
+    filled_volume = sum(price * quantity for price, quantity in zip(prices, lots))
+    assert min_filled_volume <= filled_volume <= volume
+
+
+@pytest.mark.parametrize(
+    'prices, min_quantity, step, volume',
+    [
+        ([Decimal('0.068'), Decimal('0.07'), Decimal('0.0735')], Decimal(74), Decimal(1), Decimal(10 ** 9)),
+        ([Decimal('21150.5'), Decimal('21560.68')], Decimal('0.0005'), Decimal('0.00001'), Decimal('12345678.9')),
+    ],
+)
+def test_calculate_lots_large_volume(prices, min_quantity, step, volume):
+    lots = _calculate_lots(prices, min_quantity, step, volume)
+    filled_volume = sum(price * quantity for price, quantity in zip(prices, lots))
+    assert filled_volume <= volume
+    assert volume - filled_volume < min(prices) * step
+    assert all(quantity >= min_quantity and (quantity - min_quantity) % step == 0 for quantity in lots)
+
+
+@pytest.mark.parametrize(
+    'prices, min_quantity, step, volume, max_ratio',
+    [
+        (
+            [Decimal('2.02') + Decimal('0.44') * index for index in range(18)],
+            Decimal('0.1'), Decimal('0.1'), Decimal('27.21'), 3,
+        ),
+        (
+            [Decimal(price) for price in ('635.61', '543.2', '2.08', '60051', '3009.5', '7218.9', '120.07')],
+            Decimal(3), Decimal(1), Decimal('1090556.724'), 5,
+        ),
+    ],
+)
+def test_calculate_lots_spread(prices, min_quantity, step, volume, max_ratio):
+    lots = _calculate_lots(prices, min_quantity, step, volume)
+    filled_volume = sum(price * quantity for price, quantity in zip(prices, lots))
+    assert filled_volume <= volume
+    assert volume - filled_volume < min(prices) * step
+    # Остаток раздается по шагу за проход, а не целиком одному лоту
+    assert max(lots) / min(lots) <= max_ratio
+
+
+@pytest.mark.parametrize('amount_dif', [Decimal('0.5'), Decimal(5), Decimal(1000)])
+def test_jitter_lots(amount_dif):
+    rnd = random.Random(1)
+    prices = [Decimal(27000) + Decimal(rnd.randint(0, 1000)) / 100 for _ in range(51)]
+    min_quantity, step, volume = Decimal('0.00019'), Decimal('0.00001'), Decimal(2000)
+    lots = _calculate_lots(prices, min_quantity, step, volume)
+    jittered = _jitter_lots(prices, lots, min_quantity, step, amount_dif, random.Random(2))
+    assert jittered == _jitter_lots(prices, lots, min_quantity, step, amount_dif, random.Random(2))
+    assert sum(price * lot for price, lot in zip(prices, jittered)) <= volume
+    assert all(lot >= min_quantity and lot % step == 0 for lot in jittered)
+    deltas = [price * (new - old) for price, new, old in zip(prices, jittered, lots)]
+    # Разброс не больше amountDif и стоимости одного шага лота
+    assert all(abs(delta) <= amount_dif + price * step for delta, price in zip(deltas, prices))
+    if amount_dif > prices[0] * step:
+        assert sum(1 for delta in deltas if delta != 0) >= 25
+
+
 def test_calculate_lots_too_low_requested_volume_error():
     with pytest.raises(TooLowRequestedVolumeError):
         _calculate_lots(
@@ -180,14 +279,156 @@ async def test_get_price_range_wrong_price_range_error(
             )
 
 
-@pytest.mark.parametrize(
-    'price_min, price_max, tick_size', [
-        (Decimal(2), Decimal(10), Decimal(1))
+@pytest.mark.asyncio
+async def test_submit_orders_keeps_order_and_reports_failures(binance_client, create_order_request):
+    payload = {
+        'symbol': 'BTCUSDT',
+        'transactTime': 2,
+        'status': 'NEW',
+        'timeInForce': 'GTC',
+        'type': OrderType.LIMIT.value,
+        'side': OrderSide.BUY.value,
+    }
+    with aioresponses() as mock:
+        url = re.compile(r'.+/v3/order')
+        mock.post(url=url, payload={**payload, 'orderId': 1, 'price': 2})
+        mock.post(url=url, payload={'code': -2010, 'msg': 'Account has insufficient balance'}, status=400)
+        mock.post(url=url, payload={**payload, 'orderId': 3, 'price': 4})
+        orders = await submit_orders(
+            request=create_order_request,
+            client=binance_client,
+            prices=[Decimal(2), Decimal(3), Decimal(4)],
+            lots=[Decimal(1), Decimal(1), Decimal(1)],
+        )
+    assert [order.price for order in orders] == [Decimal(2), Decimal(3), Decimal(4)]
+    ladder_id = orders[0].client_order_id.rsplit('-', 1)[0]
+    assert orders[1] == CreateOrderData(
+        price=Decimal(3),
+        quantity=Decimal(1),
+        client_order_id=f'{ladder_id}-1',
+        error='Account has insufficient balance',
+    )
+    assert [order.order_id for order in orders] == [1, None, 3]
+    assert [order.client_order_id for order in orders] == [f'{ladder_id}-{index}' for index in range(3)]
+
+
+@pytest.mark.asyncio
+async def test_submit_orders_samples_order_logs(binance_client, create_order_request, caplog, monkeypatch):
+    monkeypatch.setattr(config, 'LOG_ORDERS_SAMPLE_SIZE', 3)
+    payload = {
+        'symbol': 'BTCUSDT',
+        'orderId': 1,
+        'price': 2,
+        'transactTime': 2,
+        'status': 'NEW',
+        'timeInForce': 'GTC',
+        'type': OrderType.LIMIT.value,
+        'side': OrderSide.BUY.value,
+    }
+    with aioresponses() as mock, caplog.at_level(logging.INFO):
+        mock.post(url=re.compile(r'.+/v3/order'), payload=payload, repeat=True)
+        orders = await submit_orders(
+            request=create_order_request,
+            client=binance_client,
+            prices=[Decimal(2)] * 7,
+            lots=[Decimal(1)] * 7,
+        )
+    ladder_id = orders[0].client_order_id.rsplit('-', 1)[0]
+    created = [record for record in caplog.records if record.msg == 'Created order %s']
+    # Из 7 ордеров при LOG_ORDERS_SAMPLE_SIZE=3 логируется каждый третий
+    assert sorted(record.client_order_id for record in created) == [f'{ladder_id}-{index}' for index in (0, 3, 6)]
+    assert {(record.symbol, record.side, record.order_id) for record in created} == {('BTCUSDT', 'BUY', 1)}
+    assert all(record.latency >= 0 for record in created)
+    (ladder,) = [record for record in caplog.records if getattr(record, 'ladder_id', None) == ladder_id]
+    assert ladder.getMessage() == f'Ladder {ladder_id}: created 7 of 7 orders'
+
+
+@pytest.mark.asyncio
+async def test_create_order_batch_handler(binance_client, binance_exchange_info_symbol, create_order_request):
+    binance_exchange_info_symbol.filters = [
+        {'filterType': 'PRICE_FILTER', 'minPrice': '0.01', 'maxPrice': '1000', 'tickSize': '0.01'},
+        {'filterType': 'LOT_SIZE', 'minQty': '1', 'maxQty': '1000', 'stepSize': '1'},
+        {
+            'filterType': 'PERCENT_PRICE_BY_SIDE',
+            'bidMultiplierUp': '5',
+            'bidMultiplierDown': '0.2',
+            'askMultiplierUp': '5',
+            'askMultiplierDown': '0.2',
+            'avgPriceMins': 5,
+        },
+        {
+            'filterType': 'NOTIONAL',
+            'minNotional': '5',
+            'applyMinToMarket': True,
+            'maxNotional': '10000',
+            'applyMaxToMarket': False,
+            'avgPriceMins': 5,
+        },
     ]
-)
-def test_calculate_price(price_min, price_max, tick_size):
-    for _ in range(30):
-        price = _calculate_price(price_min, price_max, tick_size)
-        assert isinstance(price, Decimal)
-        assert price_min <= price <= price_max
-        assert price % tick_size == 0
+    create_order_request.number = 2
+    create_order_request.volume = Decimal(100)
+    other_request = create_order_request.copy(update={'symbol': 'ethusdt'})
+    order = {
+        'symbol': 'BTCUSDT',
+        'transactTime': 2,
+        'price': 3,
+        'status': 'NEW',
+        'timeInForce': 'GTC',
+        'type': OrderType.LIMIT.value,
+        'side': OrderSide.BUY.value,
+    }
+    with aioresponses() as mock:
+        mock_exchange_info_response(mock, ExchangeInfoResponse(symbols=[binance_exchange_info_symbol]))
+        mock_api_trading_status_response(mock)
+        mock.get(url=re.compile(r'.+/api/v3/ticker/price\?symbol=BTCUSDT'), payload={'symbol': 'BTCUSDT', 'price': 3})
+        mock.get(url=re.compile(r'.+/api/v3/ticker/price\?symbol=ETHUSDT'), payload={'symbol': 'ETHUSDT', 'price': 3})
+        mock.post(url=re.compile(r'.+/v3/order'), payload={**order, 'orderId': 1})
+        mock.post(url=re.compile(r'.+/v3/order'), payload={**order, 'orderId': 2})
+        response = await create_order_batch_handler(
+            CreateOrderBatchRequest(requests=[create_order_request, other_request]),
+            binance_client,
+        )
+    assert response.success is False
+    first, second = response.results
+    assert first.symbol == 'BTCUSDT'
+    assert first.success is True
+    assert [order.order_id for order in first.orders] == [1, 2]
+    assert second.symbol == 'ETHUSDT'
+    assert second.success is False
+    assert second.error == 'Not found trading symbol'
+
+
+@pytest.mark.asyncio
+async def test_create_order_batch_handler_latest_price_error(
+        binance_client, binance_exchange_info_symbol, create_order_request,
+):
+    labels = {'stage': 'pre_trade', 'error': 'Latest price unavailable'}
+    errors = registry.get_sample_value('order_errors_total', labels) or 0
+    with aioresponses() as mock:
+        mock_exchange_info_response(mock, ExchangeInfoResponse(symbols=[binance_exchange_info_symbol]))
+        mock_api_trading_status_response(mock)
+        mock.get(
+            url=re.compile(r'.+/api/v3/ticker/price.+'), status=400,
+            payload={'code': -1003, 'msg': 'Way too much request weight used; IP banned until 1700000000000.'},
+        )
+        response = await create_order_batch_handler(
+            CreateOrderBatchRequest(requests=[create_order_request]),
+            binance_client,
+        )
+    assert response.results[0].error == 'Latest price unavailable'
+    assert registry.get_sample_value('order_errors_total', labels) == errors + 1
+
+
+@pytest.mark.asyncio
+async def test_create_order_batch_handler_api_status_disabled(binance_client, create_order_request):
+    with aioresponses() as mock:
+        mock_api_trading_status_response(mock, True)
+        mock.get(url=re.compile(r'.+exchangeInfo$'), payload={'symbols': []})
+        mock.get(url=re.compile(r'.+/api/v3/ticker/price.+'), payload={'symbol': 'BTCUSDT', 'price': 3})
+        response = await create_order_batch_handler(
+            CreateOrderBatchRequest(requests=[create_order_request]),
+            binance_client,
+        )
+    assert response.success is False
+    assert response.error == 'API trading function is locked'
+    assert response.results is None
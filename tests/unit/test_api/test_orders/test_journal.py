@@ -0,0 +1,180 @@
+import asyncio
+from decimal import Decimal
+
+import pytest
+import pytest_asyncio
+
+from source.api.orders.handlers.create_order import submit_orders
+from source.api.orders.journal import NOT_SUBMITTED, OrderJournal, load_journal
+from source.clients.binance.client import BinanceClient
+from source.config import config
+from source.enums import OrderSide
+from tests.stubs.binance import StubBinanceServer
+
+PLAN = [
+    ('ladder-0', Decimal('27000.01'), Decimal('0.001')),
+    ('ladder-1', Decimal('27000.02'), Decimal('0.002')),
+    ('ladder-2', Decimal('27000.03'), Decimal('0.003')),
+]
+
+
+@pytest_asyncio.fixture
+async def stub_binance(monkeypatch):
+    async with StubBinanceServer() as server:
+        monkeypatch.setattr(config, 'BINANCE_API_URL', server.url)
+        yield server
+
+
+@pytest.mark.asyncio
+async def test_order_journal_records_ladder(tmp_path):
+    path = str(tmp_path / 'orders.journal')
+    journal = OrderJournal(path)
+    journal.start()
+    try:
+        await journal.plan('ladder', 'btcusdt', OrderSide.BUY, PLAN)
+        # План на диске до отправки ордеров
+        ladder = load_journal(path)['ladder']
+        assert ladder.symbol == 'BTCUSDT'
+        assert [(order.client_order_id, order.price, order.quantity) for order in ladder.orders] == PLAN
+        assert ladder.unacked == ladder.orders
+        journal.ack('ladder-0', order_id=1)
+        journal.ack('ladder-1', error='Injected error')
+    finally:
+        await journal.stop()
+    ladder = load_journal(path)['ladder']
+    assert [(order.acked, order.order_id, order.error) for order in ladder.orders] == [
+        (True, 1, None), (True, None, 'Injected error'), (False, None, None),
+    ]
+    assert not ladder.completed
+
+
+@pytest.mark.asyncio
+async def test_order_journal_group_commit(tmp_path):
+    journal = OrderJournal(str(tmp_path / 'orders.journal'), fsync=False)
+    journal.start()
+    try:
+        for index in range(100):
+            journal.ack(f'ladder-{index}', order_id=index)
+        await journal.flush()
+        assert journal.records == 100
+        # Все ack накопились в буфере до первой записи и ушли одним write
+        assert journal.writes == 1
+        await asyncio.gather(*(
+            journal.plan(f'ladder-{index}', 'BTCUSDT', OrderSide.SELL, PLAN) for index in range(10)
+        ))
+        assert journal.writes == 2
+    finally:
+        await journal.stop()
+
+
+@pytest.mark.asyncio
+async def test_order_journal_requires_start(tmp_path):
+    journal = OrderJournal(str(tmp_path / 'orders.journal'))
+    with pytest.raises(RuntimeError):
+        journal.ack('ladder-0')
+
+
+@pytest.mark.asyncio
+async def test_order_journal_compacts_done_ladders(tmp_path):
+    path = str(tmp_path / 'orders.journal')
+    journal = OrderJournal(path, fsync=False, compact_size=1024)
+    journal.start()
+    try:
+        await journal.plan('ladder', 'BTCUSDT', OrderSide.BUY, PLAN)
+        journal.ack('ladder-0', order_id=1)
+        for index in range(10):
+            await journal.plan(f'done{index}', 'BTCUSDT', OrderSide.BUY, [(f'done{index}-0', Decimal(1), Decimal(1))])
+            journal.ack(f'done{index}-0', order_id=index)
+            journal.complete(f'done{index}')
+        await journal.flush()
+        assert journal.compactions >= 1
+        # Записи после сжатия дописываются в новый файл
+        journal.ack('ladder-1', error='Injected error')
+    finally:
+        await journal.stop()
+    ladders = load_journal(path)
+    # Завершенные до сжатия лесенки удалены, незавершенная осталась вместе со своими ack
+    assert 'done0' not in ladders
+    assert [(order.acked, order.order_id, order.error) for order in ladders['ladder'].orders] == [
+        (True, 1, None), (True, None, 'Injected error'), (False, None, None),
+    ]
+
+
+def test_load_journal_skips_torn_record(tmp_path):
+    path = tmp_path / 'orders.journal'
+    path.write_bytes(
+        b'{"t":"ladder","ladder_id":"ladder","symbol":"BTCUSDT","side":"BUY",'
+        b'"orders":[{"client_order_id":"ladder-0","price":"1","quantity":"2"}]}\n'
+        b'{"t":"ack","client_order_id":"ladder-0","ord',
+    )
+    ladders = load_journal(str(path))
+    assert list(ladders) == ['ladder']
+    assert ladders['ladder'].unacked == ladders['ladder'].orders
+
+
+@pytest.mark.asyncio
+async def test_submit_orders_with_journal(tmp_path, stub_binance, create_order_request):
+    path = str(tmp_path / 'orders.journal')
+    journal = OrderJournal(path)
+    journal.start()
+    stub_binance.inject_error('/api/v3/order', status=400, code=-2010, msg='Account has insufficient balance.')
+    async with BinanceClient() as client:
+        try:
+            orders = await submit_orders(
+                create_order_request, client, [Decimal('27000'), Decimal('27001')], [Decimal('1'), Decimal('2')],
+                journal=journal,
+            )
+        finally:
+            await journal.stop()
+    (ladder,) = load_journal(path).values()
+    assert ladder.completed
+    assert [order.client_order_id for order in ladder.orders] == [order.client_order_id for order in orders]
+    assert [(order.order_id, order.error) for order in ladder.orders] == [
+        (order.order_id, order.error) for order in orders
+    ]
+    assert {order.error for order in orders} == {None, 'Account has insufficient balance.'}
+
+
+@pytest.mark.asyncio
+async def test_order_journal_recover(tmp_path, stub_binance):
+    path = str(tmp_path / 'orders.journal')
+    journal = OrderJournal(path)
+    journal.start()
+    await journal.plan('ladder', 'BTCUSDT', OrderSide.BUY, PLAN)
+    await journal.plan('done', 'BTCUSDT', OrderSide.BUY, [('done-0', Decimal(1), Decimal(1))])
+    journal.ack('done-0', order_id=10)
+    journal.complete('done')
+    journal.ack('ladder-0', order_id=1)
+    await journal.stop()
+    # Процесс упал: ladder-1 успел уйти в Binance без ack, ladder-2 не отправлен
+    stub_binance.orders.append({
+        'symbol': 'BTCUSDT', 'orderId': 2, 'clientOrderId': 'ladder-1', 'transactTime': 1,
+        'price': '27000.02', 'origQty': '0.002', 'executedQty': '0', 'status': 'NEW',
+        'timeInForce': 'GTC', 'type': 'LIMIT', 'side': 'BUY',
+    })
+
+    async with BinanceClient() as client:
+        (ladder,) = await OrderJournal(path).recover(client)
+    assert ladder.ladder_id == 'ladder'
+    assert [(order.order_id, order.error) for order in ladder.orders] == [
+        (1, None), (2, None), (None, NOT_SUBMITTED),
+    ]
+    assert stub_binance.requests.count(('GET', '/api/v3/order')) == 2
+    # Сверенные лесенки из журнала удалены
+    assert load_journal(path) == {}
+
+
+@pytest.mark.asyncio
+async def test_order_journal_recover_keeps_ladder_on_error(tmp_path, stub_binance):
+    path = str(tmp_path / 'orders.journal')
+    journal = OrderJournal(path)
+    journal.start()
+    await journal.plan('ladder', 'BTCUSDT', OrderSide.BUY, PLAN)
+    journal.ack('ladder-0', order_id=1)
+    await journal.stop()
+    stub_binance.inject_error('/api/v3/order', status=400, code=-1000, msg='Unknown error', times=10)
+
+    async with BinanceClient() as client:
+        assert await OrderJournal(path).recover(client) == []
+    ladder = load_journal(path)['ladder']
+    assert [order.acked for order in ladder.orders] == [True, False, False]
@@ -0,0 +1,117 @@
+from decimal import Decimal
+
+import pytest
+
+from source.api.orders.handlers import prices
+from source.api.orders.handlers.errors import TooManyOrdersForPriceRangeError, WrongPriceRangeError
+from source.api.orders.handlers.prices import PRICE_DISTRIBUTIONS, generate_prices, price_tick_range, ticks_to_prices
+from source.enums import OrderSide, PriceDistribution
+
+
+@pytest.fixture(params=['numpy', 'python'])
+def backend(request, monkeypatch):
+    if request.param == 'numpy':
+        pytest.importorskip('numpy')
+    else:
+        monkeypatch.setattr(prices, 'numpy', None)
+    return request.param
+
+
+@pytest.mark.parametrize(
+    'price_min, price_max, tick_size', [
+        (Decimal(2), Decimal(10), Decimal(1)),
+        (Decimal('24300.005'), Decimal('29700'), Decimal('0.01000000')),
+        (Decimal('0.063'), Decimal('0.077'), Decimal('0.00001')),
+        (Decimal('0.00001234'), Decimal('0.00001299'), Decimal('0.00000001')),
+    ],
+)
+def test_generate_prices(backend, price_min, price_max, tick_size):
+    generated = generate_prices(price_min, price_max, tick_size, 1000)
+    assert len(generated) == 1000
+    for price in generated:
+        assert isinstance(price, Decimal)
+        assert price_min <= price <= price_max
+        assert price % tick_size == 0
+
+
+def test_generate_prices_seed(backend):
+    args = (Decimal('0.063'), Decimal('0.077'), Decimal('0.00001'), 100)
+    assert generate_prices(*args, seed=42) == generate_prices(*args, seed=42)
+    assert generate_prices(*args, seed=42) != generate_prices(*args, seed=43)
+
+
+def test_generate_prices_covers_range(backend):
+    # Оба края диапазона достижимы
+    assert set(generate_prices(Decimal(2), Decimal(4), Decimal(1), 300, seed=1)) == {
+        Decimal(2), Decimal(3), Decimal(4),
+    }
+
+
+def test_price_tick_range():
+    assert price_tick_range(Decimal('0.0631'), Decimal('0.0779'), Decimal('0.001')) == (64, 77)
+    assert price_tick_range(Decimal('27000'), Decimal('27000'), Decimal('0.01')) == (2700000, 2700000)
+    with pytest.raises(WrongPriceRangeError):
+        price_tick_range(Decimal('0.0631'), Decimal('0.0639'), Decimal('0.001'))
+
+
+def test_ticks_to_prices():
+    assert [str(price) for price in ticks_to_prices([2700001, 1], Decimal('0.01'))] == ['27000.010000', '0.010000']
+    assert [str(price) for price in ticks_to_prices([1234], Decimal('0.00000001'))] == ['0.00001234']
+
+
+@pytest.mark.parametrize('distribution', list(PRICE_DISTRIBUTIONS))
+@pytest.mark.parametrize('side', list(OrderSide))
+@pytest.mark.parametrize(
+    'price_min, price_max, tick_size, number', [
+        (Decimal('0.063'), Decimal('0.077'), Decimal('0.00001'), 1),
+        (Decimal('0.063'), Decimal('0.077'), Decimal('0.00001'), 100),
+        # Цен в диапазоне ровно столько, сколько ордеров
+        (Decimal('0.063'), Decimal('0.077'), Decimal('0.00001'), 1401),
+        (Decimal('24300'), Decimal('29700'), Decimal('0.01'), 1000),
+        (Decimal('2'), Decimal('2'), Decimal('1'), 1),
+    ],
+)
+def test_generate_prices_distribution(distribution, side, price_min, price_max, tick_size, number):
+    generated = generate_prices(price_min, price_max, tick_size, number, seed=1, distribution=distribution, side=side)
+    assert len(generated) == number
+    # Разные цены по возрастанию
+    assert generated == sorted(set(generated))
+    assert price_min <= generated[0] and generated[-1] <= price_max
+    assert all(price % tick_size == 0 for price in generated)
+
+
+@pytest.mark.parametrize('distribution', list(PRICE_DISTRIBUTIONS))
+def test_generate_prices_too_many_orders(distribution):
+    with pytest.raises(TooManyOrdersForPriceRangeError):
+        generate_prices(Decimal('0.063'), Decimal('0.064'), Decimal('0.001'), 3, distribution=distribution)
+
+
+def test_generate_prices_linear():
+    assert generate_prices(
+        Decimal(2), Decimal(10), Decimal(1), 5, distribution=PriceDistribution.LINEAR,
+    ) == [Decimal(2), Decimal(4), Decimal(6), Decimal(8), Decimal(10)]
+
+
+def test_generate_prices_geometric():
+    generated = generate_prices(Decimal(1), Decimal(16), Decimal('0.01'), 5, distribution=PriceDistribution.GEOMETRIC)
+    assert generated == [Decimal(1), Decimal(2), Decimal(4), Decimal(8), Decimal(16)]
+
+
+def test_generate_prices_gaussian():
+    generated = generate_prices(
+        Decimal('0.01'), Decimal(100), Decimal('0.01'), 100, distribution=PriceDistribution.GAUSSIAN,
+    )
+    # Около 68% цен в пределах одного отклонения от середины
+    assert 60 <= sum(1 for price in generated if abs(price - 50) <= Decimal('16.67')) <= 75
+    assert generated == [100 - price + Decimal('0.01') for price in reversed(generated)]
+
+
+@pytest.mark.parametrize('side', list(OrderSide))
+def test_generate_prices_weighted_random(side):
+    args = (Decimal('0.01'), Decimal(100), Decimal('0.01'), 1000)
+    generated = generate_prices(*args, seed=1, distribution=PriceDistribution.WEIGHTED_RANDOM, side=side)
+    assert generated == generate_prices(*args, seed=1, distribution=PriceDistribution.WEIGHTED_RANDOM, side=side)
+    assert generated != generate_prices(*args, seed=2, distribution=PriceDistribution.WEIGHTED_RANDOM, side=side)
+    # Плотность убывает от рыночной стороны: в ближней половине диапазона 3/4 цен
+    near = sum(1 for price in generated if (price < 50 if side is OrderSide.SELL else price > 50))
+    assert 700 <= near <= 800
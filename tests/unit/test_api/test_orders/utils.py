@@ -14,6 +14,8 @@ class _ParamModel(BaseModel):
     step: Decimal
     volume: Decimal
     expected_lots: List[Decimal]
+    # Σ(Pi * Qi) исходного алгоритма, новое разбиение не должно заполнять меньше
+    min_filled_volume: Decimal
 
     def to_tuple(self) -> Tuple[List[Decimal], Decimal, Decimal, Decimal, List[Decimal]]:
         return self.prices, self.min_quantity, self.step, self.volume, self.expected_lots
@@ -25,7 +27,8 @@ _parametrize = [
         min_quantity=Decimal(16),
         step=Decimal(1),
         volume=Decimal(100),
-        expected_lots=convert_values_list_to_decimal([32, 29, 17, 16]),
+        expected_lots=convert_values_list_to_decimal([23, 24, 23, 23]),
+        min_filled_volume=Decimal('99.9'),
     ),
     _ParamModel(
         prices=convert_values_list_to_decimal([10, 12, 11]),
@@ -33,20 +36,23 @@ _parametrize = [
         step=Decimal(1),
         volume=Decimal(104),
         expected_lots=convert_values_list_to_decimal([3, 3, 3]),
+        min_filled_volume=Decimal('99'),
     ),
     _ParamModel(
         prices=convert_values_list_to_decimal([0.068, 0.070, 0.072, 0.074]),
         min_quantity=Decimal(64),
         step=Decimal(0.04),
         volume=Decimal(56),
-        expected_lots=convert_values_list_to_decimal([213.64, 192, 192, 192]),
+        expected_lots=convert_values_list_to_decimal([197.12, 197.12, 197.12, 197.36]),
+        min_filled_volume=Decimal('55.99952'),
     ),
     _ParamModel(
         prices=convert_values_list_to_decimal([23, 23.5, 22]),
         min_quantity=Decimal(2),
         step=Decimal(1.5),
         volume=Decimal(1076.6),
-        expected_lots=convert_values_list_to_decimal([16, 16, 14]),
+        expected_lots=convert_values_list_to_decimal([15.5, 15.5, 15.5]),
+        min_filled_volume=Decimal('1052'),
     ),
     _ParamModel(
         prices=convert_values_list_to_decimal([200, 220, 250, 275, 216]),
@@ -54,6 +60,7 @@ _parametrize = [
         step=Decimal(1),
         volume=Decimal(10000),
         expected_lots=convert_values_list_to_decimal([9, 9, 9, 8, 8]),
+        min_filled_volume=Decimal('9958'),
     ),
     _ParamModel(
         prices=convert_values_list_to_decimal([0.5]),
@@ -61,23 +68,33 @@ _parametrize = [
         step=Decimal(1),
         volume=Decimal(7),
         expected_lots=convert_values_list_to_decimal([14]),
+        min_filled_volume=Decimal('7'),
     ),
     _ParamModel(
         prices=convert_values_list_to_decimal([0.5, 0.9, 0.4, 0.7]),
         min_quantity=Decimal(45),
         step=Decimal(0.8),
         volume=Decimal(2945.125),
-        expected_lots=convert_values_list_to_decimal([1210, 1170, 1170, 1170]),
+        expected_lots=convert_values_list_to_decimal([1177.8, 1177.8, 1177.8, 1178.6]),
+        min_filled_volume=Decimal('2945'),
     ),
     _ParamModel(
         prices=convert_values_list_to_decimal([21150.5, 21560.68, 21420, 21380.4]),
         min_quantity=Decimal(1),
         step=Decimal(1),
         volume=Decimal(2945040.125),
-        expected_lots=convert_values_list_to_decimal([35, 34, 34, 34]),
+        expected_lots=convert_values_list_to_decimal([34, 37, 33, 33]),
+        min_filled_volume=Decimal('2928544.22'),
     ),
 ]
 
 
 def get_parametrize_for_calculate_lots_test() -> List[Tuple[List[Decimal], Decimal, Decimal, Decimal, List[Decimal]]]:
     return [param.to_tuple() for param in _parametrize]
+
+
+def get_parametrize_for_filled_volume_test() -> List[Tuple[List[Decimal], Decimal, Decimal, Decimal, Decimal]]:
+    return [
+        (param.prices, param.min_quantity, param.step, param.volume, param.min_filled_volume)
+        for param in _parametrize
+    ]
@@ -0,0 +1,105 @@
+import re
+
+import pytest
+from aioresponses import aioresponses
+
+from source.clients.binance.cache import ExchangeInfoCache
+from source.clients.binance.client import BinanceClient
+from source.clients.binance.errors import BinanceHttpError
+from source.clients.binance.schemas.market.errors import NotFoundSymbolInExchangeInfo
+from source.clients.binance.schemas.market.schemas import ExchangeInfoResponse, Symbol
+from source.enums import OrderType, SymbolStatus
+
+
+def get_exchange_info(*symbols: str) -> ExchangeInfoResponse:
+    return ExchangeInfoResponse(
+        symbols=[
+            Symbol(
+                symbol=symbol,
+                status=SymbolStatus.TRADING,
+                orderTypes=[OrderType.LIMIT],
+                quoteOrderQtyMarketAllowed=False,
+                isSpotTradingAllowed=True,
+                permissions=['SPOT'],
+                filters=[],
+            )
+            for symbol in symbols
+        ],
+    )
+
+
+class Loader:
+
+    def __init__(self, *responses) -> None:
+        self.responses = list(responses)
+        self.calls = 0
+
+    async def __call__(self) -> ExchangeInfoResponse:
+        self.calls += 1
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+def test_exchange_info_get_symbol():
+    exchange_info = get_exchange_info('BTCUSDT', 'DOGEUSDT')
+    assert exchange_info.get_symbol('DOGEUSDT').symbol == 'DOGEUSDT'
+    with pytest.raises(NotFoundSymbolInExchangeInfo):
+        exchange_info.get_symbol('ETHUSDT')
+
+
+@pytest.mark.asyncio
+async def test_exchange_info_cache_hits_and_misses():
+    loader = Loader(get_exchange_info('BTCUSDT'))
+    cache = ExchangeInfoCache(loader, ttl=60)
+    first = await cache.get()
+    second = await cache.get()
+    assert first is second
+    assert loader.calls == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+@pytest.mark.asyncio
+async def test_exchange_info_cache_serves_stale_on_refresh_error():
+    loader = Loader(get_exchange_info('BTCUSDT'), BinanceHttpError(code=-1003, msg='Too many requests'))
+    cache = ExchangeInfoCache(loader, ttl=0)
+    first = await cache.get()
+    assert cache.is_stale
+    assert await cache.get() is first
+    assert loader.calls == 2
+    assert cache.misses == 2
+
+
+@pytest.mark.asyncio
+async def test_exchange_info_cache_cold_error():
+    cache = ExchangeInfoCache(Loader(BinanceHttpError(code=-1003, msg='Too many requests')), ttl=60)
+    with pytest.raises(BinanceHttpError):
+        await cache.get()
+
+
+@pytest.mark.asyncio
+async def test_exchange_info_cache_background_refresh():
+    loader = Loader(get_exchange_info('BTCUSDT'))
+    cache = ExchangeInfoCache(loader, ttl=60)
+    cache.start()
+    exchange_info = await cache.refresh()
+    await cache.stop()
+    assert loader.calls == 1
+    assert await cache.get() is exchange_info
+    assert cache.hits == 1
+
+
+@pytest.mark.asyncio
+async def test_binance_client_exchange_info_cached():
+    client = BinanceClient(exchange_info_ttl=60)
+    try:
+        with aioresponses() as mock:
+            mock.get(url=re.compile(r'.+exchangeInfo$'), body=get_exchange_info('BTCUSDT', 'ETHUSDT').json())
+            first = await client.exchange_info('btcusdt')
+            second = await client.exchange_info('ethusdt')
+        assert first is second
+        assert second.get_symbol('ETHUSDT').symbol == 'ETHUSDT'
+        assert (client.exchange_info_cache.hits, client.exchange_info_cache.misses) == (1, 1)
+    finally:
+        await client.close()
@@ -1,18 +1,30 @@
 import datetime
+import json
 import re
 from decimal import Decimal
 
+import aiohttp
 import freezegun
 import pytest
 from aioresponses import aioresponses
 
+from source.clients.binance.client import BinanceClient
+from source.clients.binance.clock import server_clock
+from source.clients.binance.connector import BinanceConnectorAbstract
 from source.clients.binance.errors import BinanceHttpError
-from source.clients.binance.schemas.market.schemas import ExchangeInfoResponse, LatestPriceResponse, Symbol
+from source.clients.binance.retry import RetryPolicy
+from source.clients.binance.schemas.market.schemas import (
+    ExchangeInfoResponse,
+    LatestPriceResponse,
+    ServerTimeResponse,
+    Symbol,
+)
 from source.clients.binance.schemas.order.schemas import NewOrderRequest, NewOrderResponse
 from source.clients.binance.schemas.wallet.schemas import APITradingStatusResponse
 from source.clients.binance.signature import BaseSignature
 from source.config import config
 from source.enums import OrderSide, OrderType, SymbolStatus, TimeInForce
+from tests.stubs.binance import DEFAULT_SYMBOLS
 
 
 @pytest.mark.asyncio
@@ -173,3 +185,180 @@ async def test_create_new_order(binance_client, monkeypatch):
             type=OrderType.LIMIT,
             side=OrderSide.SELL,
         )
+
+
+@pytest.mark.asyncio
+async def test_get_server_time(binance_client):
+    with aioresponses() as mock:
+        mock.get(url=re.compile(r'.+/api/v3/time$'), payload={'serverTime': 1672567200000})
+        response = await binance_client.get_server_time()
+    assert response == ServerTimeResponse(serverTime=1672567200000)
+
+
+@pytest.mark.asyncio
+async def test_create_new_order_timestamp_error_requests_clock_sync(binance_client, monkeypatch):
+    monkeypatch.setattr(config, 'BINANCE_SECRET_KEY', 'SECRET')
+    requested = []
+    monkeypatch.setattr(server_clock, 'request_sync', lambda: requested.append(True))
+    payload = {'code': -1021, 'msg': 'Timestamp for this request is outside of the recvWindow.'}
+    request = NewOrderRequest(
+        symbol='BTCUSDT', side=OrderSide.SELL, type=OrderType.LIMIT, timeInForce=TimeInForce.GTC,
+        quantity=Decimal('0.001'), price=Decimal('27000'),
+    )
+    with aioresponses() as mock:
+        mock.post(url=re.compile(r'.+/api/v3/order$'), payload=payload, status=400)
+        with pytest.raises(BinanceHttpError):
+            await binance_client.create_new_order(request)
+    assert requested == [True]
+
+
+ORDER_PAYLOAD = {
+    'symbol': 'BTCUSDT',
+    'orderId': 1,
+    'clientOrderId': 'ladder-0',
+    'price': '27000',
+    'origQty': '0.001',
+    'status': 'NEW',
+    'timeInForce': 'GTC',
+    'type': OrderType.LIMIT.value,
+    'side': OrderSide.SELL.value,
+}
+
+
+def _client_order_request(client_order_id=None) -> NewOrderRequest:
+    return NewOrderRequest(
+        symbol='BTCUSDT', side=OrderSide.SELL, type=OrderType.LIMIT, timeInForce=TimeInForce.GTC,
+        quantity=Decimal('0.001'), price=Decimal('27000'), newClientOrderId=client_order_id,
+    )
+
+
+@pytest.fixture
+def retry_client(monkeypatch):
+    monkeypatch.setattr(config, 'BINANCE_SECRET_KEY', 'SECRET')
+    client = BinanceClient(order_retry_policy=RetryPolicy(max_attempts=3, base_delay=0, max_delay=0))
+    yield client
+
+
+@pytest.mark.asyncio
+async def test_create_new_order_lost_response_reconciled(retry_client):
+    internal_error = {'code': -1001, 'msg': 'Internal error; unable to process your request.'}
+    async with retry_client:
+        with aioresponses() as mock:
+            mock.post(url=re.compile(r'.+/api/v3/order$'), payload=internal_error, status=503)
+            mock.get(url=re.compile(r'.+/api/v3/order\?.+'), payload={**ORDER_PAYLOAD, 'time': 3})
+            response = await retry_client.create_new_order(_client_order_request('ladder-0'))
+            requests = [(method, url.path) for method, url in mock.requests]
+    assert response.orderId == 1
+    assert response.transactTime == 3
+    # Ордер найден по newClientOrderId, повторно не отправляется
+    assert requests == [('POST', '/api/v3/order'), ('GET', '/api/v3/order')]
+
+
+@pytest.mark.asyncio
+async def test_create_new_order_retried_when_not_created(retry_client):
+    not_found = {'code': -2013, 'msg': 'Order does not exist.'}
+    async with retry_client:
+        with aioresponses() as mock:
+            url = re.compile(r'.+/api/v3/order$')
+            mock.post(url=url, exception=aiohttp.ServerDisconnectedError())
+            mock.get(url=re.compile(r'.+/api/v3/order\?.+'), payload=not_found, status=400)
+            mock.post(url=url, payload={**ORDER_PAYLOAD, 'transactTime': 4})
+            response = await retry_client.create_new_order(_client_order_request('ladder-0'))
+    assert response.transactTime == 4
+
+
+@pytest.mark.asyncio
+async def test_create_new_order_without_client_order_id_not_retried(retry_client):
+    internal_error = {'code': -1001, 'msg': 'Internal error; unable to process your request.'}
+    async with retry_client:
+        with aioresponses() as mock:
+            mock.post(url=re.compile(r'.+/api/v3/order$'), payload=internal_error, status=503)
+            with pytest.raises(BinanceHttpError) as error:
+                await retry_client.create_new_order(_client_order_request())
+    assert error.value.status == 503
+
+
+@pytest.mark.asyncio
+async def test_get_request_retried(retry_client):
+    async with retry_client:
+        with aioresponses() as mock:
+            url = re.compile(r'.+ticker/price.+$')
+            mock.get(url=url, payload={'code': -1000, 'msg': 'An unknown error occurred.'}, status=500)
+            mock.get(url=url, payload={'symbol': 'BTCUSDT', 'price': '27000'})
+            response = await retry_client.get_latest_price('btcusdt')
+    assert response.price == Decimal('27000')
+
+
+@pytest.mark.asyncio
+async def test_exchange_info_trusted(monkeypatch):
+    async with BinanceClient(trusted_exchange_info=True) as client:
+        with aioresponses() as mock:
+            mock.get(url=re.compile(r'.+exchangeInfo$'), body=json.dumps({'symbols': DEFAULT_SYMBOLS}).encode())
+            response = await client.exchange_info()
+    assert response == ExchangeInfoResponse.parse_obj({'symbols': DEFAULT_SYMBOLS})
+    assert response.get_symbol('BTCUSDT').price_filter.tickSize == Decimal('0.01')
+
+
+@pytest.mark.asyncio
+async def test_trusted_request_not_supported(binance_client):
+    with aioresponses() as mock:
+        mock.get(url=re.compile(r'.+/api/v3/time$'), payload={'serverTime': 1})
+        with pytest.raises(TypeError):
+            await binance_client.connector.request('/api/v3/time', 'GET', ServerTimeResponse, trusted=True)
+
+
+@pytest.mark.asyncio
+async def test_not_json_response_retried(retry_client):
+    async with retry_client:
+        with aioresponses() as mock:
+            url = re.compile(r'.+/api/v3/time$')
+            mock.get(url=url, body='<html>502 Bad Gateway</html>', status=502, content_type='text/html')
+            mock.get(url=url, payload={'serverTime': 1})
+            response = await retry_client.get_server_time()
+    assert response.serverTime == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('trusted', [False, True])
+async def test_exchange_info_whitelist(trusted):
+    async with BinanceClient(trusted_exchange_info=trusted) as client:
+        with aioresponses() as mock:
+            mock.get(url=re.compile(r'.+exchangeInfo$'), body=json.dumps({'symbols': DEFAULT_SYMBOLS}).encode())
+            response = await client.exchange_info(whitelist=['dogeusdt', 'ethusdt'])
+    assert [symbol.symbol for symbol in response.symbols] == ['DOGEUSDT']
+    assert response.get_symbol('DOGEUSDT') == Symbol.parse_obj(DEFAULT_SYMBOLS[1])
+    assert response.get_symbol('DOGEUSDT').lot_size_filter.stepSize == Decimal('1')
+
+
+@pytest.mark.asyncio
+async def test_exchange_info_whitelist_error(binance_client):
+    with aioresponses() as mock:
+        mock.get(url=re.compile(r'.+exchangeInfo$'), payload={'code': -1003, 'msg': 'Too much weight'}, status=400)
+        with pytest.raises(BinanceHttpError) as error:
+            await binance_client.exchange_info(whitelist=['dogeusdt'])
+    assert error.value.code == -1003
+
+
+class _ExchangeInfoConnector(BinanceConnectorAbstract):
+
+    async def close(self) -> None:
+        ...
+
+    async def request(self, path, method, response_model, body=None, params=None, **kwargs):
+        return response_model.parse_obj({'symbols': DEFAULT_SYMBOLS})
+
+
+@pytest.mark.asyncio
+async def test_exchange_info_whitelist_custom_connector():
+    client = BinanceClient(connector=_ExchangeInfoConnector())
+    response = await client.exchange_info(whitelist=['dogeusdt'])
+    assert response.symbols == [Symbol.parse_obj(DEFAULT_SYMBOLS[1])]
+
+
+@pytest.mark.asyncio
+async def test_exchange_info_cache_whitelist():
+    async with BinanceClient(exchange_info_ttl=60, exchange_info_whitelist=['BTCUSDT']) as client:
+        with aioresponses() as mock:
+            mock.get(url=re.compile(r'.+exchangeInfo$'), body=json.dumps({'symbols': DEFAULT_SYMBOLS}).encode())
+            response = await client.exchange_info('dogeusdt')
+    assert [symbol.symbol for symbol in response.symbols] == ['BTCUSDT']
@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+
+from source.clients.binance import clock
+from source.clients.binance.clock import ServerClock
+from source.clients.binance.errors import BinanceHttpError
+from source.clients.binance.schemas.market.schemas import ServerTimeResponse
+
+
+class FakeTime:
+    """
+    Локальное время в миллисекундах, которое сдвигается только на время ответа сервера
+    """
+
+    def __init__(self, now: float) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class Loader:
+    """
+    Сервер, часы которого идут с offset относительно локальных. Для каждого ответа задается время
+    до сервера и обратно, чтобы проверить, что берется замер с минимальным rtt
+    """
+
+    def __init__(self, now: FakeTime, offset: float, *delays) -> None:
+        self.now = now
+        self.offset = offset
+        self.delays = list(delays)
+        self.calls = 0
+
+    async def __call__(self) -> ServerTimeResponse:
+        self.calls += 1
+        delay = self.delays.pop(0)
+        if isinstance(delay, Exception):
+            raise delay
+        there, back = delay
+        self.now.now += there
+        server_time = self.now.now + self.offset
+        self.now.now += back
+        return ServerTimeResponse(serverTime=int(server_time))
+
+
+async def _run_pending() -> None:
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+
+@pytest.fixture
+def fake_time(monkeypatch):
+    fake_time = FakeTime(1672567200000)
+    monkeypatch.setattr(clock, '_now_ms', fake_time)
+    return fake_time
+
+
+@pytest.mark.asyncio
+async def test_server_clock_sync_min_rtt(fake_time):
+    # Асимметричные задержки дают ошибку (there - back) / 2, у замера (5, 5) ее нет
+    loader = Loader(fake_time, -2000, (100, 10), (5, 5), (40, 200))
+    server_clock = ServerClock(samples=3)
+    assert server_clock.timestamp() == 1672567200000
+    assert await server_clock.sync(loader) == -2000
+    assert server_clock.rtt == 10
+    assert loader.calls == 3
+    assert server_clock.timestamp() == fake_time.now - 2000
+
+
+@pytest.mark.asyncio
+async def test_server_clock_sync_error_keeps_offset(fake_time):
+    server_clock = ServerClock(samples=2)
+    await server_clock.sync(Loader(fake_time, 1500, (1, 1), (1, 1)))
+    with pytest.raises(BinanceHttpError):
+        await server_clock.sync(Loader(fake_time, 0, (1, 1), BinanceHttpError(code=-1000, msg='error')))
+    assert server_clock.offset == 1500
+
+
+@pytest.mark.asyncio
+async def test_server_clock_background_sync(fake_time):
+    loader = Loader(fake_time, 300, BinanceHttpError(code=-1000, msg='error'), (1, 1), (1, 1))
+    server_clock = ServerClock(samples=1)
+    server_clock.start(loader, interval=60)
+    await _run_pending()
+    # Первая синхронизация не удалась, следующая только по request_sync или через interval
+    assert loader.calls == 1
+    assert server_clock.offset == 0
+    server_clock.request_sync()
+    await _run_pending()
+    assert loader.calls == 2
+    assert server_clock.offset == 300
+    await server_clock.stop()
+    server_clock.request_sync()
+    await _run_pending()
+    assert loader.calls == 2
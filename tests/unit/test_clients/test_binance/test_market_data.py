@@ -0,0 +1,119 @@
+import asyncio
+import re
+from decimal import Decimal
+
+import pytest
+from aioresponses import aioresponses
+
+from source.clients.binance.client import BinanceClient
+from source.clients.binance.market_data import MarketDataFeed
+from tests.stubs.websocket import StubWebSocketServer
+
+
+async def wait_for_price(feed: MarketDataFeed, symbol: str, timeout: float = 2) -> Decimal:
+    async def _wait() -> Decimal:
+        while (price := feed.get_price(symbol)) is None:
+            await asyncio.sleep(0.01)
+        return price
+    return await asyncio.wait_for(_wait(), timeout)
+
+
+@pytest.mark.asyncio
+async def test_market_data_feed_subscribes_and_updates_prices():
+    async with StubWebSocketServer() as server:
+        feed = MarketDataFeed(url=server.url, symbols=['BTCUSDT'])
+        feed.start()
+        try:
+            await server.wait_for_message()
+            assert server.paths == ['/stream']
+            assert server.received[0]['method'] == 'SUBSCRIBE'
+            assert server.received[0]['params'] == ['btcusdt@miniTicker', 'btcusdt@bookTicker', 'btcusdt@avgPrice']
+            for stream, data in (
+                ('btcusdt@miniTicker', {'e': '24hrMiniTicker', 's': 'BTCUSDT', 'c': '27000.5'}),
+                ('btcusdt@bookTicker', {'s': 'BTCUSDT', 'b': '27000.1', 'a': '27000.9'}),
+                ('btcusdt@avgPrice', {'e': 'avgPrice', 's': 'BTCUSDT', 'w': '26990'}),
+            ):
+                await server.publish({'stream': stream, 'data': data})
+            assert await wait_for_price(feed, 'btcusdt') == Decimal('27000.5')
+            await asyncio.sleep(0.05)
+            market_price = feed.get('btcusdt')
+            assert (market_price.bid, market_price.ask, market_price.avg_price) == (
+                Decimal('27000.1'), Decimal('27000.9'), Decimal('26990'),
+            )
+        finally:
+            await feed.stop()
+
+
+@pytest.mark.asyncio
+async def test_market_data_feed_skips_invalid_messages():
+    async with StubWebSocketServer() as server:
+        feed = MarketDataFeed(url=server.url, symbols=['btcusdt'])
+        feed.start()
+        try:
+            await server.wait_for_message()
+            await server.publish_raw('{"stream": ')
+            for payload in (
+                ['btcusdt@miniTicker'],
+                {'stream': 'btcusdt', 'data': {'s': 'BTCUSDT', 'c': '1'}},
+                {'stream': 'btcusdt@miniTicker', 'data': {'s': 'BTCUSDT'}},
+                {'stream': 'btcusdt@miniTicker', 'data': {'s': 'BTCUSDT', 'c': 'price'}},
+            ):
+                await server.publish(payload)
+            await server.publish({'stream': 'btcusdt@miniTicker', 'data': {'s': 'BTCUSDT', 'c': '2'}})
+            assert await wait_for_price(feed, 'btcusdt') == Decimal(2)
+            assert len(server.paths) == 1
+        finally:
+            await feed.stop()
+
+
+@pytest.mark.asyncio
+async def test_market_data_feed_stale_price():
+    async with StubWebSocketServer() as server:
+        feed = MarketDataFeed(url=server.url, symbols=['btcusdt'], stale_after=0.05)
+        feed.start()
+        try:
+            await server.wait_for_message()
+            await server.publish({'stream': 'btcusdt@miniTicker', 'data': {'s': 'BTCUSDT', 'c': '2'}})
+            assert await wait_for_price(feed, 'btcusdt') == Decimal(2)
+            await asyncio.sleep(0.1)
+            assert feed.get_price('btcusdt') is None
+        finally:
+            await feed.stop()
+
+
+@pytest.mark.asyncio
+async def test_market_data_feed_reconnects_and_resubscribes():
+    async with StubWebSocketServer() as server:
+        feed = MarketDataFeed(url=server.url, symbols=['btcusdt'], reconnect_delay=0.01)
+        feed.start()
+        try:
+            await server.wait_for_message()
+            await server.disconnect_all()
+            await server.wait_for_message(count=2)
+            assert server.received[1]['params'] == server.received[0]['params']
+            assert len(server.paths) == 2
+        finally:
+            await feed.stop()
+
+
+@pytest.mark.asyncio
+async def test_binance_client_latest_price_from_market_data():
+    async with StubWebSocketServer() as server:
+        feed = MarketDataFeed(url=server.url)
+        client = BinanceClient(market_data=feed)
+        await client.start()
+        try:
+            await server.wait_for_connections()
+            with aioresponses() as mock:
+                mock.get(url=re.compile(r'.+ticker/price.+$'), payload={'symbol': 'ETHUSDT', 'price': 1800})
+                # Данных в стриме еще нет - REST и подписка на символ
+                assert (await client.get_latest_price('ethusdt')).price == Decimal(1800)
+            await server.wait_for_message()
+            assert server.received[0]['params'][0] == 'ethusdt@miniTicker'
+            await server.publish({'stream': 'ethusdt@miniTicker', 'data': {'s': 'ETHUSDT', 'c': '1810'}})
+            await wait_for_price(feed, 'ethusdt')
+            response = await client.get_latest_price('ethusdt')
+            assert response.symbol == 'ETHUSDT'
+            assert response.price == Decimal(1810)
+        finally:
+            await client.close()
@@ -0,0 +1,162 @@
+import asyncio
+import re
+from http import HTTPStatus
+
+import aiohttp
+import pytest
+from aioresponses import aioresponses
+
+from source.clients.binance import rate_limits
+from source.clients.binance.connector import DefaultBinanceConnector
+from source.clients.binance.rate_limits import FixedWindow, RateLimitGovernor, TokenBucket
+from source.clients.binance.schemas.market.schemas import LatestPriceResponse
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_acquire_without_delay():
+    bucket = TokenBucket(capacity=5, period=10)
+    loop = asyncio.get_running_loop()
+    started_at = loop.time()
+    for _ in range(5):
+        await bucket.acquire()
+    assert loop.time() - started_at < 0.05
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_acquire_waits_for_refill():
+    bucket = TokenBucket(capacity=2, period=0.2)
+    loop = asyncio.get_running_loop()
+    started_at = loop.time()
+    for _ in range(3):
+        await bucket.acquire()
+    assert loop.time() - started_at >= 0.09
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_acquire_more_than_capacity():
+    with pytest.raises(ValueError):
+        await TokenBucket(capacity=2, period=1).acquire(3)
+
+
+class FakeClock:
+
+    def __init__(self, now: float) -> None:
+        self.now = now
+        self.sleeps = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    async def sleep(self, delay: float) -> None:
+        self.sleeps.append(delay)
+        self.now += delay
+
+
+@pytest.fixture
+def fake_clock(monkeypatch):
+    clock = FakeClock(1672567205.0)
+    monkeypatch.setattr(rate_limits.asyncio, 'sleep', clock.sleep)
+    return clock
+
+
+def test_fixed_window():
+    window = FixedWindow(limit=10, period=60)
+    window.add(125, 8)
+    assert window.delay(125, 2) == 0
+    assert window.delay(125, 3) == 55
+    # Заголовок меньше локального счетчика, если ответы на другие запросы еще не пришли
+    window.update(130, 5)
+    assert window.used == 8
+    window.update(130, 9)
+    assert window.used == 9
+    # Новая минута
+    assert window.delay(180, 10) == 0
+    assert window.used == 0
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_governor_waits_for_next_window(fake_clock):
+    governor = RateLimitGovernor(request_weight_per_1m=30, orders_per_10s=2, orders_per_day=100, clock=fake_clock)
+    await governor.acquire(weight=20)
+    await governor.acquire(weight=1, orders=1)
+    await governor.acquire(weight=1, orders=1)
+    assert fake_clock.sleeps == []
+    # Третий ордер ждет следующего 10-секундного интервала
+    await governor.acquire(weight=1, orders=1)
+    assert fake_clock.sleeps == [5]
+    # Вес ждет следующей минуты
+    await governor.acquire(weight=20)
+    assert fake_clock.sleeps == [5, 50]
+    assert (governor.requests, governor.throttled, governor.throttled_seconds) == (5, 2, 55)
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_governor_paces_orders(fake_clock):
+    governor = RateLimitGovernor(request_weight_per_1m=100, orders_per_10s=10, orders_per_day=100, clock=fake_clock)
+    for _ in range(10):
+        await governor.acquire(orders=1)
+    assert fake_clock.sleeps == []
+    # Новый интервал, но за 5 секунд order_pacing восполнился только на 5 ордеров:
+    # шестой ждет токен, хотя в интервале место еще есть
+    fake_clock.now += 5
+    for _ in range(5):
+        await governor.acquire(orders=1)
+    assert fake_clock.sleeps == []
+    await governor.acquire(orders=1)
+    assert fake_clock.sleeps == [pytest.approx(1)]
+    assert governor.orders_10s.used == 6
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_governor_update_from_headers(fake_clock):
+    governor = RateLimitGovernor(request_weight_per_1m=100, orders_per_10s=10, orders_per_day=100, clock=fake_clock)
+    governor.update(200, {'X-MBX-USED-WEIGHT-1M': '95', 'X-MBX-ORDER-COUNT-10S': '10', 'X-MBX-ORDER-COUNT-1D': '12'})
+    assert (governor.request_weight.used, governor.orders_10s.used, governor.orders_day.used) == (95, 10, 12)
+    assert governor.delay(weight=5) == 0
+    assert governor.delay(weight=6) == 55
+    assert governor.delay(weight=1, orders=1) == 5
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_governor_retry_after(fake_clock):
+    governor = RateLimitGovernor(request_weight_per_1m=100, orders_per_10s=10, orders_per_day=100, clock=fake_clock)
+    governor.update(429, {'Retry-After': '3'})
+    governor.update(418, {'Retry-After': '1'})
+    assert (governor.rate_limited, governor.banned) == (1, 1)
+    assert 2.9 < governor.delay() <= 3
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_governor_acquire_more_than_limit():
+    governor = RateLimitGovernor(request_weight_per_1m=10, orders_per_10s=10, orders_per_day=100)
+    with pytest.raises(ValueError):
+        await governor.acquire(weight=11)
+
+
+@pytest.mark.asyncio
+async def test_connector_updates_governor(fake_clock):
+    governor = RateLimitGovernor(request_weight_per_1m=100, orders_per_10s=10, orders_per_day=100, clock=fake_clock)
+    connector = DefaultBinanceConnector(governor=governor)
+    try:
+        with aioresponses() as mock:
+            mock.get(
+                url=re.compile(r'.+ticker/price.+$'),
+                payload={'symbol': 'BTCUSDT', 'price': '27000'},
+                headers={'X-MBX-USED-WEIGHT-1M': '40'},
+            )
+            mock.get(
+                url=re.compile(r'.+ticker/price.+$'),
+                payload={'code': -1003, 'msg': 'Way too many requests; IP banned.'},
+                status=418,
+                headers={'X-MBX-USED-WEIGHT-1M': '120', 'Retry-After': '120'},
+            )
+            params = {'symbol': 'BTCUSDT'}
+            await connector.request('/api/v3/ticker/price', 'GET', LatestPriceResponse, params=params)
+            assert governor.request_weight.used == 40
+            with pytest.raises(aiohttp.ClientResponseError) as error:
+                await connector.request('/api/v3/ticker/price', 'GET', LatestPriceResponse, params=params)
+    finally:
+        await connector.close()
+    assert error.value.status == HTTPStatus.IM_A_TEAPOT
+    assert governor.banned == 1
+    assert governor.delay() > 100
@@ -0,0 +1,83 @@
+import asyncio
+import random
+
+import aiohttp
+import pytest
+
+from source.clients.binance import retry
+from source.clients.binance.errors import BinanceHttpError
+from source.clients.binance.retry import RetryPolicy
+
+
+class Func:
+
+    def __init__(self, *results) -> None:
+        self.results = list(results)
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        result = self.results.pop(0)
+        if isinstance(result, BaseException):
+            raise result
+        return result
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    sleeps = []
+
+    async def sleep(delay: float) -> None:
+        sleeps.append(delay)
+
+    monkeypatch.setattr(retry.asyncio, 'sleep', sleep)
+    return sleeps
+
+
+def test_retry_policy_delays():
+    policy = RetryPolicy(max_attempts=50, base_delay=0.1, max_delay=2, rng=random.Random(1))
+    delays = list(policy.delays())
+    assert len(delays) == 49
+    assert all(0.1 <= delay <= 2 for delay in delays)
+    # Каждая задержка не больше утроенной предыдущей
+    previous = 0.1
+    for delay in delays:
+        assert delay <= previous * 3
+        previous = delay
+    assert len(set(delays)) > 1
+
+
+def test_retry_policy_is_retryable():
+    policy = RetryPolicy()
+    assert policy.is_retryable(asyncio.TimeoutError())
+    assert policy.is_retryable(aiohttp.ServerDisconnectedError())
+    assert policy.is_retryable(BinanceHttpError(code=-1001, msg='Internal error', status=503))
+    assert not policy.is_retryable(BinanceHttpError(code=-2010, msg='Insufficient balance', status=400))
+    request_info = aiohttp.RequestInfo(url=None, method='GET', headers=None)  # type:ignore
+    assert policy.is_retryable(aiohttp.ClientResponseError(request_info, (), status=502))
+    assert not policy.is_retryable(aiohttp.ClientResponseError(request_info, (), status=429))
+
+
+@pytest.mark.asyncio
+async def test_retry_policy_call(sleeps):
+    func = Func(asyncio.TimeoutError(), BinanceHttpError(code=-1001, msg='Internal error', status=503), 'ok')
+    assert await RetryPolicy(max_attempts=3).call(func) == 'ok'
+    assert func.calls == 3
+    assert len(sleeps) == 2
+
+
+@pytest.mark.asyncio
+async def test_retry_policy_call_gives_up(sleeps):
+    func = Func(asyncio.TimeoutError(), asyncio.TimeoutError())
+    with pytest.raises(asyncio.TimeoutError):
+        await RetryPolicy(max_attempts=2).call(func)
+    assert func.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_retry_policy_call_not_retryable(sleeps):
+    func = Func(BinanceHttpError(code=-2010, msg='Insufficient balance', status=400))
+    with pytest.raises(BinanceHttpError):
+        await RetryPolicy(max_attempts=3).call(func)
+    assert func.calls == 1
+    assert sleeps == []
@@ -1,8 +1,21 @@
 from decimal import Decimal
 
-from source.clients.binance.schemas.filters import LotSizeFilter, NotionalFilter, PercentPriceBySideFilter, PriceFilter
-from source.clients.binance.schemas.market.schemas import Symbol
+import pytest
+
+from source.clients.binance.schemas.filters import (
+    IcebergPartsFilter,
+    LotSizeFilter,
+    MarketLotSizeFilter,
+    MaxNumOrdersFilter,
+    NotionalFilter,
+    PercentPriceBySideFilter,
+    PriceFilter,
+    TrailingDeltaFilter,
+)
+from source.clients.binance.schemas.market.errors import NotFoundSymbolInExchangeInfo
+from source.clients.binance.schemas.market.schemas import ExchangeInfoResponse, Symbol
 from source.enums import OrderType, SymbolStatus
+from tests.stubs.binance import DEFAULT_SYMBOLS
 
 
 def get_symbol() -> Symbol:
@@ -42,6 +55,30 @@ def get_symbol() -> Symbol:
                 'applyMaxToMarket': False,
                 'avgPriceMins': 5,
             },
+            {
+                'filterType': 'ICEBERG_PARTS',
+                'limit': 10,
+            },
+            {
+                'filterType': 'MARKET_LOT_SIZE',
+                'minQty': '0.00000000',
+                'maxQty': '25000.00000000',
+                'stepSize': '0.00000000',
+            },
+            {
+                'filterType': 'TRAILING_DELTA',
+                'minTrailingAboveDelta': 10,
+                'maxTrailingAboveDelta': 2000,
+                'minTrailingBelowDelta': 10,
+                'maxTrailingBelowDelta': 2000,
+            },
+            {
+                'filterType': 'MAX_NUM_ORDERS',
+                'maxNumOrders': 200,
+            },
+            {
+                'filterType': 'UNKNOWN_FILTER',
+            },
         ],
     )
 
@@ -92,3 +129,60 @@ def test_symbol_percent_price_by_side_filter():
         askMultiplierDown=Decimal('0.200000'),
         avgPriceMins=5,
     )
+
+
+def test_symbol_other_filters():
+    symbol = get_symbol()
+    assert symbol.iceberg_parts_filter == IcebergPartsFilter(filterType='ICEBERG_PARTS', limit=10)
+    assert symbol.max_num_orders_filter == MaxNumOrdersFilter(filterType='MAX_NUM_ORDERS', maxNumOrders=200)
+    assert symbol.market_lot_size_filter == MarketLotSizeFilter(
+        filterType='MARKET_LOT_SIZE',
+        minQty=Decimal(0),
+        maxQty=Decimal(25000),
+        stepSize=Decimal(0),
+    )
+    assert symbol.trailing_delta_filter == TrailingDeltaFilter(
+        filterType='TRAILING_DELTA',
+        minTrailingAboveDelta=10,
+        maxTrailingAboveDelta=2000,
+        minTrailingBelowDelta=10,
+        maxTrailingBelowDelta=2000,
+    )
+
+
+def test_symbol_filters_parsed_once():
+    symbol = get_symbol()
+    assert symbol.price_filter is symbol.price_filter
+    assert symbol.lot_size_filter is symbol.lot_size_filter
+
+
+def test_symbol_filters_reparsed_on_assignment():
+    symbol = get_symbol()
+    symbol.filters = [{'filterType': 'MAX_NUM_ORDERS', 'maxNumOrders': 5}]
+    assert symbol.max_num_orders_filter.maxNumOrders == 5
+    with pytest.raises(ValueError):
+        symbol.price_filter
+
+
+def test_symbol_invalid_filter_skipped():
+    filters = get_symbol().filters
+    filters[1] = {'filterType': 'LOT_SIZE', 'minQty': 'invalid'}
+    payload = {'timezone': 'UTC', 'symbols': [{**DEFAULT_SYMBOLS[0], 'filters': filters}]}
+    symbol = ExchangeInfoResponse.parse_obj(payload).symbols[0]
+    assert symbol.price_filter.tickSize == Decimal('0.000010')
+    with pytest.raises(ValueError, match='Not found LOT_SIZE filter'):
+        symbol.lot_size_filter
+
+
+def test_exchange_info_construct_trusted():
+    payload = {'timezone': 'UTC', 'symbols': DEFAULT_SYMBOLS}
+    trusted = ExchangeInfoResponse.construct_trusted(payload)
+    assert trusted == ExchangeInfoResponse.parse_obj(payload)
+    symbol = trusted.get_symbol('DOGEUSDT')
+    assert symbol.status is SymbolStatus.TRADING
+    assert symbol.orderTypes[0] is OrderType.LIMIT
+    # Фильтры разбираются при первом обращении и дальше не пересчитываются
+    assert symbol.lot_size_filter.stepSize == Decimal('1.000000')
+    assert symbol.lot_size_filter is symbol.lot_size_filter
+    with pytest.raises(NotFoundSymbolInExchangeInfo):
+        trusted.get_symbol('ETHUSDT')
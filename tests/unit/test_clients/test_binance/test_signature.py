@@ -1,9 +1,16 @@
+import base64
 import datetime
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs
 
 import freezegun
+import pytest
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519, padding, rsa
 
-from source.clients.binance.signature import BaseSignature
+from source.clients.binance.signature import BaseSignature, Ed25519Signer, HmacSigner, RsaSigner, Signer
 from source.config import config
+from source.enums import SignatureType
 
 
 class Data(BaseSignature):
@@ -29,3 +36,149 @@ def test_to_query(monkeypatch):
         data='data',
     )
     assert data.to_query() == 'recvWindow=5000&timestamp=1672567200000&value=10&data=data'
+
+
+@freezegun.freeze_time(datetime.datetime(2023, 1, 1, 10, 0, 0, 0))
+def test_hmac_signer_sign():
+    data = Data(value=10, data='data')
+    query = HmacSigner('SECRET').sign(data)
+    assert data.signature == '224d668a41816e46fc69ab92ea570262e507d623001dda2a6013523972b2903d'
+    assert query == (
+        'recvWindow=5000&timestamp=1672567200000&value=10&data=data'
+        '&signature=224d668a41816e46fc69ab92ea570262e507d623001dda2a6013523972b2903d'
+    )
+    assert data.to_query() == query
+
+
+@freezegun.freeze_time(datetime.datetime(2023, 1, 1, 10, 0, 0, 0))
+def test_hmac_signer_sign_twice():
+    signer = HmacSigner('SECRET')
+    data = Data(value=10, data='data')
+    assert signer.sign(data) == signer.sign(data)
+
+
+@freezegun.freeze_time(datetime.datetime(2023, 1, 1, 10, 0, 0, 0))
+def test_hmac_signer_sign_many():
+    signer = HmacSigner('SECRET')
+    requests = [Data(value=value, data='data') for value in range(3)]
+    queries = signer.sign_many(requests)
+    assert queries == [request.to_query() for request in requests]
+    assert len({request.signature for request in requests}) == 3
+
+
+def test_hmac_signer_from_config(monkeypatch):
+    monkeypatch.setattr(config, 'BINANCE_SECRET_KEY', 'SECRET')
+    assert HmacSigner.from_config() is HmacSigner.from_config()
+    monkeypatch.setattr(config, 'BINANCE_SECRET_KEY', 'OTHER')
+    assert HmacSigner.from_config().signature(b'data') == HmacSigner('OTHER').signature(b'data')
+
+
+# RFC 8032, 7.1 TEST 1 и TEST 2
+ED25519_TEST_VECTORS = [
+    (
+        '9d61b19deffd5a60ba844af492ec2cc44449c5697b326919703bac031cae7f60',
+        '',
+        'e5564300c360ac729086e2cc806e828a84877f1eb8e5d974d873e065224901555fb8821590a33bacc61e39701cf9b46bd25bf5f0595bbe24655141438e7a100b',  # noqa: E501
+    ),
+    (
+        '4ccd089b28ff96da9db6c346ec114e0f5b8a319f35aba624da8cf6ed4fb8a6fb',
+        '72',
+        '92a009a9f0d4cab8720e820b5f642540a2b27b5416503f8fb3762223ebdb69da085ac1e43e15996e458f3613d0f11d8c387b2eaeb4302aeeb00d291612bb0c00',  # noqa: E501
+    ),
+]
+
+
+def _pem(private_key, password=None):
+    encryption = (
+        serialization.BestAvailableEncryption(password.encode()) if password else serialization.NoEncryption()
+    )
+    return private_key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, encryption)
+
+
+@pytest.fixture(scope='module')
+def rsa_private_key():
+    return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+
+def test_hmac_signer_binance_example():
+    # Пример из документации Binance SIGNED endpoint
+    signer = HmacSigner('NhqPtmdSJYdKjVHjA7PZj4Mge3R5YNiP1e3UZjInClVN65XAbvqqM6A7H5fATj0j')
+    payload = b'symbol=LTCBTC&side=BUY&type=LIMIT&timeInForce=GTC&quantity=1&price=0.1&recvWindow=5000&timestamp=1499827319559'  # noqa: E501
+    assert signer.signature(payload) == 'c8db56825ae71d6d79447849e617115f4a920fa2acdcab2b053c4b2838bd6b71'
+
+
+@pytest.mark.parametrize('private_key, message, expected', ED25519_TEST_VECTORS)
+def test_ed25519_signer_test_vectors(private_key, message, expected):
+    signer = Ed25519Signer(ed25519.Ed25519PrivateKey.from_private_bytes(bytes.fromhex(private_key)))
+    assert base64.b64decode(signer.signature(bytes.fromhex(message))).hex() == expected
+
+
+def test_ed25519_signer_from_pem():
+    private_key = ed25519.Ed25519PrivateKey.from_private_bytes(bytes.fromhex(ED25519_TEST_VECTORS[1][0]))
+    signer = Ed25519Signer.from_pem(_pem(private_key, 'password'), 'password')
+    assert base64.b64decode(signer.signature(bytes.fromhex('72'))).hex() == ED25519_TEST_VECTORS[1][2]
+
+
+def test_rsa_signer(rsa_private_key):
+    signer = RsaSigner.from_pem(_pem(rsa_private_key))
+    signature = signer.signature(b'data')
+    # PKCS#1 v1.5 детерминирована
+    assert signature == signer.signature(b'data')
+    rsa_private_key.public_key().verify(base64.b64decode(signature), b'data', padding.PKCS1v15(), hashes.SHA256())
+
+
+def test_signer_from_pem_wrong_key_type(rsa_private_key):
+    with pytest.raises(ValueError):
+        Ed25519Signer.from_pem(_pem(rsa_private_key))
+    with pytest.raises(ValueError):
+        RsaSigner.from_pem(_pem(ed25519.Ed25519PrivateKey.generate()))
+
+
+@freezegun.freeze_time(datetime.datetime(2023, 1, 1, 10, 0, 0, 0))
+def test_ed25519_signer_to_query():
+    private_key = ed25519.Ed25519PrivateKey.generate()
+    data = Data(value=10, data='data')
+    query = Ed25519Signer(private_key).sign(data)
+    unsigned, signature = query.rsplit('&signature=', 1)
+    assert unsigned == 'recvWindow=5000&timestamp=1672567200000&value=10&data=data'
+    assert parse_qs(query)['signature'] == [data.signature]
+    private_key.public_key().verify(base64.b64decode(data.signature), unsigned.encode())
+
+
+def test_signer_thread_safe(rsa_private_key):
+    payloads = [str(index).encode() for index in range(200)]
+    signers = [HmacSigner('SECRET'), RsaSigner(rsa_private_key), Ed25519Signer(ed25519.Ed25519PrivateKey.generate())]
+    for signer in signers:
+        expected = [signer.signature(payload) for payload in payloads]
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            assert list(executor.map(signer.signature, payloads)) == expected
+
+
+def test_signer_from_config(monkeypatch, tmp_path, rsa_private_key):
+    key_path = tmp_path / 'key.pem'
+    key_path.write_bytes(_pem(rsa_private_key, 'password'))
+    monkeypatch.setattr(config, 'BINANCE_SIGNATURE_TYPE', SignatureType.RSA)
+    monkeypatch.setattr(config, 'BINANCE_PRIVATE_KEY_PATH', str(key_path))
+    monkeypatch.setattr(config, 'BINANCE_PRIVATE_KEY_PASSWORD', 'password')
+    signer = Signer.from_config()
+    assert isinstance(signer, RsaSigner)
+    # Ключ загружается один раз
+    assert Signer.from_config() is signer
+
+    key_path = tmp_path / 'ed25519.pem'
+    key_path.write_bytes(_pem(ed25519.Ed25519PrivateKey.generate()))
+    monkeypatch.setattr(config, 'BINANCE_SIGNATURE_TYPE', SignatureType.ED25519)
+    monkeypatch.setattr(config, 'BINANCE_PRIVATE_KEY_PATH', str(key_path))
+    monkeypatch.setattr(config, 'BINANCE_PRIVATE_KEY_PASSWORD', None)
+    assert isinstance(Signer.from_config(), Ed25519Signer)
+
+    monkeypatch.setattr(config, 'BINANCE_SIGNATURE_TYPE', SignatureType.HMAC)
+    monkeypatch.setattr(config, 'BINANCE_SECRET_KEY', 'SECRET')
+    assert Signer.from_config() is HmacSigner.from_config()
+
+
+def test_signer_from_config_missing_key(monkeypatch):
+    monkeypatch.setattr(config, 'BINANCE_SIGNATURE_TYPE', SignatureType.ED25519)
+    monkeypatch.setattr(config, 'BINANCE_PRIVATE_KEY_PATH', None)
+    with pytest.raises(ValueError):
+        Signer.from_config()
@@ -0,0 +1,197 @@
+import asyncio
+from decimal import Decimal
+
+import pytest
+import pytest_asyncio
+
+from source.clients.binance.client import BinanceClient
+from source.clients.binance.errors import OrderNotFilledError
+from source.clients.binance.schemas.user_data.schemas import OrderState
+from source.clients.binance.user_data import UserDataStream
+from source.config import config
+from source.enums import OrderSide
+from tests.stubs.binance import StubBinanceServer
+from tests.stubs.websocket import StubWebSocketServer
+
+
+def execution_report(status: str, event_time: int, executed: str = '0', **kwargs) -> dict:
+    return {
+        'e': 'executionReport',
+        'E': event_time,
+        's': 'BTCUSDT',
+        'c': 'ladder-0',
+        'C': '',
+        'S': 'BUY',
+        'o': 'LIMIT',
+        'q': '1.00000000',
+        'p': '27000.00000000',
+        'x': 'TRADE' if executed != '0' else 'NEW',
+        'X': status,
+        'i': 1,
+        'z': executed,
+        'T': event_time,
+        **kwargs,
+    }
+
+
+@pytest_asyncio.fixture
+async def binance(monkeypatch):
+    async with StubBinanceServer() as server:
+        monkeypatch.setattr(config, 'BINANCE_API_URL', server.url)
+        yield server
+
+
+@pytest_asyncio.fixture
+async def websocket():
+    async with StubWebSocketServer() as server:
+        yield server
+
+
+@pytest_asyncio.fixture
+async def stream(binance, websocket):
+    async with BinanceClient() as client:
+        user_data = UserDataStream(client, url=websocket.url, reconnect_delay=0.01)
+        user_data.start()
+        try:
+            await user_data.wait_connected(timeout=2)
+            yield user_data
+        finally:
+            await user_data.stop()
+
+
+@pytest.mark.asyncio
+async def test_user_data_stream_connects_with_listen_key(stream, binance, websocket):
+    assert websocket.paths == ['/ws/stub-listen-key-1']
+    await stream.stop()
+    assert binance.listen_keys == []
+
+
+@pytest.mark.asyncio
+async def test_user_data_stream_wait_filled(stream, websocket):
+    waiter = asyncio.create_task(stream.wait_filled(client_order_id='ladder-0', timeout=2))
+    await websocket.publish(execution_report('NEW', 1))
+    await websocket.publish(execution_report('PARTIALLY_FILLED', 2, executed='0.4'))
+    await websocket.publish(execution_report('FILLED', 3, executed='1'))
+    order = await waiter
+    assert order.order_id == 1
+    assert order.side == OrderSide.BUY
+    assert order.executed_quantity == Decimal('1.000000')
+    assert stream.get(order_id=1) == stream.get(client_order_id='ladder-0') == order
+    # Ордер уже исполнен, ожидание завершается сразу
+    assert await stream.wait_filled(order_id=1) == order
+
+
+@pytest.mark.asyncio
+async def test_user_data_stream_wait_for_status(stream, websocket):
+    waiter = asyncio.create_task(stream.wait_for(order_id=1, statuses={'PARTIALLY_FILLED'}, timeout=2))
+    await websocket.publish(execution_report('NEW', 1))
+    await websocket.publish(execution_report('PARTIALLY_FILLED', 2, executed='0.4'))
+    assert (await waiter).executed_quantity == Decimal('0.4')
+    with pytest.raises(asyncio.TimeoutError):
+        await stream.wait_for(order_id=2, timeout=0.05)
+    assert not stream._waiters
+
+
+@pytest.mark.asyncio
+async def test_user_data_stream_canceled_order(stream, websocket):
+    waiter = asyncio.create_task(stream.wait_filled(client_order_id='ladder-0', timeout=2))
+    # При отмене c - id запроса отмены, а clientOrderId ордера приходит в C
+    await websocket.publish(execution_report('CANCELED', 1, c='cancel-1', C='ladder-0'))
+    with pytest.raises(OrderNotFilledError) as error:
+        await waiter
+    assert error.value.order.client_order_id == 'ladder-0'
+
+
+@pytest.mark.asyncio
+async def test_user_data_stream_ignores_stale_events(stream, websocket):
+    await websocket.publish(execution_report('FILLED', 5, executed='1'))
+    await websocket.publish(execution_report('NEW', 1))
+    await websocket.publish(execution_report('PARTIALLY_FILLED', 6, executed='0.5'))
+    await websocket.publish({'e': 'outboundAccountPosition', 'E': 7})
+    order = await stream.wait_for(order_id=1, timeout=2)
+    await asyncio.sleep(0.05)
+    assert stream.get(order_id=1) == order
+    assert order.status == 'FILLED'
+
+
+@pytest.mark.asyncio
+async def test_user_data_stream_skips_invalid_messages(stream, websocket):
+    await websocket.publish_raw('{"e": ')
+    await websocket.publish(['executionReport'])
+    await websocket.publish(execution_report('FILLED', 1, executed='1'))
+    assert (await stream.wait_for(order_id=1, timeout=2)).status == 'FILLED'
+    assert websocket.paths == ['/ws/stub-listen-key-1']
+
+
+def test_user_data_stream_evicts_finished_orders():
+    user_data = UserDataStream(client=None, url='ws://localhost', max_finished_orders=2)
+    for order_id, status in enumerate(('NEW', 'FILLED', 'CANCELED', 'EXPIRED', 'FILLED'), start=1):
+        user_data.apply(OrderState(
+            symbol='BTCUSDT',
+            order_id=order_id,
+            client_order_id=f'ladder-{order_id}',
+            side=OrderSide.BUY,
+            status=status,
+            price=Decimal(27000),
+            quantity=Decimal(1),
+            executed_quantity=Decimal(0),
+            updated_at=order_id,
+        ))
+    # Незавершенный ордер не вытесняется, из завершенных остаются два последних
+    assert sorted(user_data._orders) == [1, 4, 5]
+    assert sorted(user_data._order_ids) == ['ladder-1', 'ladder-4', 'ladder-5']
+    assert user_data.get(client_order_id='ladder-2') is None
+
+
+@pytest.mark.asyncio
+async def test_user_data_stream_reconnects_on_expired_listen_key(stream, binance, websocket):
+    await websocket.publish({'e': 'listenKeyExpired', 'E': 1})
+    await websocket.wait_for_connections(1)
+    await asyncio.wait_for(_wait_for_path(websocket, '/ws/stub-listen-key-2'), 2)
+    assert binance.listen_keys == ['stub-listen-key-2']
+
+
+@pytest.mark.asyncio
+async def test_user_data_stream_resyncs_after_reconnect(stream, binance, websocket):
+    binance.orders.append({
+        'symbol': 'BTCUSDT',
+        'orderId': 1,
+        'clientOrderId': 'ladder-0',
+        'transactTime': 1,
+        'price': '27000',
+        'origQty': '1',
+        'executedQty': '0',
+        'status': 'NEW',
+        'timeInForce': 'GTC',
+        'type': 'LIMIT',
+        'side': 'BUY',
+    })
+    waiter = asyncio.create_task(stream.wait_filled(client_order_id='ladder-0', symbol='btcusdt', timeout=2))
+    await asyncio.sleep(0.01)
+    # Ордер исполнился, пока стрим был отключен
+    await websocket.disconnect_all()
+    binance.orders[0].update(status='FILLED', executedQty='1')
+    order = await waiter
+    assert order.executed_quantity == Decimal('1.000000')
+    assert ('GET', '/api/v3/order') in binance.requests
+
+
+@pytest.mark.asyncio
+async def test_user_data_stream_keepalive(binance, websocket):
+    async with BinanceClient() as client:
+        user_data = UserDataStream(client, url=websocket.url, keepalive_interval=0.02, reconnect_delay=0.01)
+        user_data.start()
+        try:
+            await user_data.wait_connected(timeout=2)
+            await asyncio.sleep(0.1)
+            assert binance.keepalives >= 2
+            # listenKey пропал на стороне Binance, keepalive переподключает стрим с новым
+            binance.listen_keys.clear()
+            await asyncio.wait_for(_wait_for_path(websocket, '/ws/stub-listen-key-2'), 2)
+        finally:
+            await user_data.stop()
+
+
+async def _wait_for_path(websocket: StubWebSocketServer, path: str) -> None:
+    while path not in websocket.paths:
+        await asyncio.sleep(0.01)
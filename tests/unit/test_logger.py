@@ -0,0 +1,78 @@
+import io
+import logging
+import queue
+import sys
+import threading
+from logging.handlers import QueueListener
+
+import orjson
+
+from source.logger import JsonStreamHandler, NonBlockingQueueHandler, format_json_record
+
+
+def _record(msg: str, *args: object, **extra: object) -> logging.LogRecord:
+    record = logging.LogRecord('test', logging.INFO, __file__, 10, msg, args, None, func='create_order')
+    record.__dict__.update(extra)
+    return record
+
+
+def test_format_json_record():
+    record = _record('Created order %s', 'ladder-0', symbol='BTCUSDT', side='BUY', order_id=1, latency=1.5, price=None)
+    data = orjson.loads(format_json_record(record))
+    assert data['message'] == 'Created order ladder-0'
+    assert data['level'] == 'INFO'
+    assert data['func'] == 'create_order'
+    assert (data['symbol'], data['side'], data['order_id'], data['latency']) == ('BTCUSDT', 'BUY', 1, 1.5)
+    assert 'price' not in data
+    assert 'exc_info' not in data
+
+
+def test_queue_handler_prepare():
+    handler = NonBlockingQueueHandler(queue.Queue())
+    args = {'price': 1}
+    try:
+        raise ValueError('Injected error')
+    except ValueError:
+        record = _record('Create order %s', args)
+        record.exc_info = sys.exc_info()
+    prepared = handler.prepare(record)
+    args['price'] = 2
+    # Сообщение собирается с аргументами на момент вызова, traceback уже отформатирован
+    assert (prepared.msg, prepared.args, prepared.exc_info) == ("Create order {'price': 1}", None, None)
+    assert 'ValueError: Injected error' in orjson.loads(format_json_record(prepared))['exc_info']
+    assert record.msg == 'Create order %s'
+
+
+def test_json_stream_handler():
+    stream = io.StringIO()
+    JsonStreamHandler(stream).handle(_record('Created order %s', 'ladder-0', order_id=1))
+    line, empty = stream.getvalue().split('\n')
+    assert empty == ''
+    assert orjson.loads(line)['order_id'] == 1
+
+
+def test_queue_handler_drops_records_when_queue_is_full():
+    log_queue: 'queue.Queue[logging.LogRecord]' = queue.Queue(maxsize=2)
+    handler = NonBlockingQueueHandler(log_queue)
+    for index in range(5):
+        handler.handle(_record('Record %d', index))
+    assert log_queue.qsize() == 2
+    assert handler.dropped == 3
+
+
+def test_queue_listener_writes_in_background_thread():
+    threads = []
+
+    class _Handler(logging.Handler):
+        def emit(self, record: logging.LogRecord) -> None:
+            threads.append((threading.current_thread(), self.format(record)))
+
+    log_queue: 'queue.Queue[logging.LogRecord]' = queue.Queue()
+    listener = QueueListener(log_queue, _Handler())
+    listener.start()
+    try:
+        NonBlockingQueueHandler(log_queue).handle(_record('Created order %s', 'ladder-0'))
+    finally:
+        listener.stop()
+    assert [message for _, message in threads] == ['Created order ladder-0']
+    assert threads[0][0] is not threading.current_thread()
@@ -0,0 +1,72 @@
+import re
+
+import pytest
+from aioresponses import aioresponses
+
+from source.clients.binance.cache import ExchangeInfoCache
+from source.clients.binance.clock import ServerClock
+from source.clients.binance.connector import DefaultBinanceConnector
+from source.clients.binance.errors import BinanceHttpError
+from source.clients.binance.rate_limits import RateLimitGovernor
+from source.clients.binance.schemas.market.schemas import LatestPriceResponse
+from source.metrics import BinanceStateCollector, registry
+
+
+def _sample(name: str, **labels: str) -> float:
+    return registry.get_sample_value(name, labels) or 0
+
+
+@pytest.mark.asyncio
+async def test_connector_request_metrics():
+    connector = DefaultBinanceConnector(governor=RateLimitGovernor(6000, 100, 1000))
+    labels = {'path': '/api/v3/ticker/price', 'method': 'GET'}
+    ok_count = _sample('binance_request_seconds_count', **labels, status='200')
+    error_count = _sample('binance_request_seconds_count', **labels, status='400')
+    errors = _sample('binance_errors_total', path='/api/v3/ticker/price', error='-1121')
+    bytes_sum = _sample('binance_response_bytes_sum', path='/api/v3/ticker/price')
+    try:
+        with aioresponses() as mock:
+            mock.get(re.compile(r'.+ticker/price.+$'), body='{"symbol":"BTCUSDT","price":"1.00"}')
+            mock.get(re.compile(r'.+ticker/price.+$'), status=400, payload={'code': -1121, 'msg': 'Invalid symbol.'})
+            await connector.request(
+                path='/api/v3/ticker/price', method='GET', params={'symbol': 'BTCUSDT'},
+                response_model=LatestPriceResponse,
+            )
+            with pytest.raises(BinanceHttpError):
+                await connector.request(
+                    path='/api/v3/ticker/price', method='GET', params={'symbol': 'BTCUSD'},
+                    response_model=LatestPriceResponse,
+                )
+    finally:
+        await connector.close()
+    assert _sample('binance_request_seconds_count', **labels, status='200') == ok_count + 1
+    assert _sample('binance_request_seconds_count', **labels, status='400') == error_count + 1
+    assert _sample('binance_errors_total', path='/api/v3/ticker/price', error='-1121') == errors + 1
+    assert _sample('binance_response_bytes_sum', path='/api/v3/ticker/price') > bytes_sum + 35
+
+
+def test_binance_state_collector():
+    governor = RateLimitGovernor(6000, 100, 1000, clock=lambda: 0)
+    governor.requests, governor.throttled, governor.rate_limited = 10, 2, 1
+    governor.request_weight.used = 42
+    clock = ServerClock()
+    clock.offset, clock.rtt = -12.5, 3.0
+    cache = ExchangeInfoCache(loader=None, ttl=60)  # type:ignore
+    cache.hits, cache.misses = 7, 1
+
+    collector = BinanceStateCollector()
+    assert list(collector.collect()) == []
+    collector.bind(governor=governor, clock=clock, exchange_info_cache=cache)
+    samples = {
+        (sample.name, tuple(sample.labels.values())): sample.value
+        for metric in collector.collect()
+        for sample in metric.samples
+    }
+    assert samples[('binance_governor_requests_total', ())] == 10
+    assert samples[('binance_governor_throttled_total', ())] == 2
+    assert samples[('binance_governor_rate_limited_total', ())] == 1
+    assert samples[('binance_rate_limit_used', ('request_weight_1m',))] == 42
+    assert samples[('binance_clock_offset_ms', ())] == -12.5
+    assert samples[('binance_clock_rtt_ms', ())] == 3.0
+    assert samples[('exchange_info_cache_hits_total', ())] == 7
+    assert samples[('exchange_info_cache_misses_total', ())] == 1